@@ -0,0 +1,115 @@
+"""
+This script compares the approximate IVF backend with the exact NumPy backend on synthetic clustered embeddings. It
+reports the build time of each index and, for each nprobe value, the recall@k against the exact results and the
+queries per second.
+
+Usage: python benchmark/bench_ann.py [--vectors 200000] [--dimension 512] [--nprobe 1 2 4 8 16 32 64]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from IvfBackend import IvfBackend  # noqa: E402
+from NumpyBackend import NumpyBackend  # noqa: E402
+
+
+def synthetic_embeddings(vectors: int, dimension: int, topics: int, seed: int = 0) -> np.ndarray:
+    """
+    Generates embeddings grouped around random topics, as the chunks of many CVs are.
+
+    Args:
+        vectors (int): The number of embeddings.
+        dimension (int): The embeddings dimension.
+        topics (int): The number of topics.
+        seed (int): The random seed.
+
+    Returns:
+        np.ndarray: The embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dimension), dtype=np.float32)
+    embeddings = centers[rng.integers(topics, size=vectors)]
+    embeddings += 1.0 * rng.standard_normal((vectors, dimension), dtype=np.float32)
+    return embeddings
+
+
+def build(backend, embeddings: np.ndarray, batch_size: int = 10000) -> float:
+    """
+    Creates an index and inserts the embeddings in batches, as the bulk ingestion does.
+
+    Args:
+        backend (VectorBackend): The backend.
+        embeddings (np.ndarray): The embeddings.
+        batch_size (int): The number of embeddings inserted together.
+
+    Returns:
+        float: The build time in seconds.
+    """
+    begin = time.perf_counter()
+    backend.create(embeddings.shape[1])
+    for start in range(0, len(embeddings), batch_size):
+        end = min(start + batch_size, len(embeddings))
+        backend.upsert([f"id-{i}" for i in range(start, end)], embeddings[start:end], [{}] * (end - start))
+    return time.perf_counter() - begin
+
+
+def search(backend, queries: np.ndarray, top_k: int) -> tuple[list[set[str]], float]:
+    """
+    Runs the queries one by one, as the application does.
+
+    Args:
+        backend (VectorBackend): The backend.
+        queries (np.ndarray): The query embeddings.
+        top_k (int): The number of results per query.
+
+    Returns:
+        tuple[list[set[str]], float]: The ids retrieved for each query and the queries per second.
+    """
+    begin = time.perf_counter()
+    results = [{match['id'] for match in backend.query(query, top_k)['matches']} for query in queries]
+    return results, len(queries) / (time.perf_counter() - begin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    embeddings = synthetic_embeddings(args.vectors, args.dimension, args.topics)
+    rng = np.random.default_rng(1)
+    queries = embeddings[rng.integers(args.vectors, size=args.queries)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape, dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        exact = NumpyBackend(temp_dir, "exact")
+        exact_build = build(exact, embeddings)
+        ivf = IvfBackend(temp_dir, "ivf", nlist=args.nlist)
+        ivf_build = build(ivf, embeddings)
+        print(f"{args.vectors} vectors of dimension {args.dimension}, {len(ivf.centroids)} IVF clusters")
+        print(f"build time: exact {exact_build:.1f} s, ivf {ivf_build:.1f} s")
+
+        truth, exact_qps = search(exact, queries, args.top_k)
+        print(f"{'index':<8}{'nprobe':>8}{f'recall@{args.top_k}':>12}{'QPS':>10}{'speedup':>10}")
+        print(f"{'exact':<8}{'-':>8}{1.0:>12.3f}{exact_qps:>10.0f}{1.0:>10.1f}")
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            results, qps = search(ivf, queries, args.top_k)
+            recall = np.mean([len(result & expected) / len(expected) for result, expected in zip(results, truth)])
+            print(f"{'ivf':<8}{nprobe:>8}{recall:>12.3f}{qps:>10.0f}{qps / exact_qps:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
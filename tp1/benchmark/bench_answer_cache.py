@@ -0,0 +1,105 @@
+"""
+This script measures the answer cache on a synthetic stream of recruiter questions: each question is a paraphrase of
+one of a few recurring questions, picked with a Zipf distribution, and the CV is saved again every few questions. For
+several similarity thresholds, it reports the hit rate, the rate of wrong hits, i.e. answers of another question, and
+the mean answer time against a fake retrieval and LLM completion latency.
+
+Usage: python benchmark/bench_answer_cache.py [--questions 2000] [--thresholds 0.85 0.9 0.95] [--latency 1.5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from AnswerCache import AnswerCache  # noqa: E402
+
+
+def question_embeddings(args) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Generates the embeddings of the stream of questions. The recurring questions share a common direction, so they
+    are similar to each other as questions about the same CV are, and each question asked is a noisy paraphrase.
+
+    Args:
+        args (argparse.Namespace): The benchmark arguments.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The recurring question of each question asked, and the embeddings.
+    """
+    rng = np.random.default_rng(0)
+    common = rng.standard_normal(args.dimension)
+    common /= np.linalg.norm(common)
+    own = rng.standard_normal((args.recurring, args.dimension))
+    own /= np.linalg.norm(own, axis=1, keepdims=True)
+    weight = np.sqrt(args.question_similarity)
+    recurring = weight * common + np.sqrt(1 - args.question_similarity) * own
+    ranks = np.arange(1, args.recurring + 1)
+    intents = rng.choice(args.recurring, size=args.questions, p=(1 / ranks) / np.sum(1 / ranks))
+    noise = rng.standard_normal((args.questions, args.dimension)) * args.paraphrase_noise / np.sqrt(args.dimension)
+    return intents, (recurring[intents] + noise).astype(np.float32)
+
+
+def run(threshold: float, intents: np.ndarray, embeddings: np.ndarray, args) -> dict:
+    """
+    Answers the stream of questions through an answer cache.
+
+    Args:
+        threshold (float): The similarity threshold of the cache.
+        intents (np.ndarray): The recurring question of each question asked.
+        embeddings (np.ndarray): The question embeddings.
+        args (argparse.Namespace): The benchmark arguments.
+
+    Returns:
+        dict: The cache metrics, the wrong hits and the mean answer time in seconds.
+    """
+    cache = AnswerCache(threshold=threshold, max_entries=args.max_entries)
+    version = 0
+    wrong = 0
+    elapsed = 0.0
+    for index, (intent, embedding) in enumerate(zip(intents, embeddings)):
+        if index > 0 and index % args.save_every == 0:
+            # The CV is saved again, as save_text does
+            version += 1
+            cache.invalidate("cv")
+        begin = time.perf_counter()
+        answer = cache.get(embedding, str(version))
+        elapsed += time.perf_counter() - begin
+        if answer is None:
+            elapsed += args.latency
+            cache.put(embedding, str(version), f"answer {intent}", ["cv"])
+        elif answer != f"answer {intent}":
+            wrong += 1
+    return {**cache.metrics(), 'wrong': wrong, 'mean_s': elapsed / len(intents)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--recurring", type=int, default=50, help="number of distinct questions asked")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.85, 0.9, 0.95, 0.98])
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--question-similarity", type=float, default=0.85,
+                        help="cosine similarity between two distinct questions")
+    parser.add_argument("--paraphrase-noise", type=float, default=0.2)
+    parser.add_argument("--save-every", type=int, default=500, help="questions between two saves of the CV")
+    parser.add_argument("--max-entries", type=int, default=1024)
+    parser.add_argument("--latency", type=float, default=1.5, help="seconds of the retrieval and LLM completion")
+    args = parser.parse_args()
+
+    intents, embeddings = question_embeddings(args)
+    print(f"{args.questions} questions, {args.recurring} distinct ones, CV saved every {args.save_every} questions, "
+          f"answer latency {args.latency * 1000:.0f} ms")
+    print(f"{'threshold':<11}{'hit rate':>10}{'wrong hits':>12}{'entries':>9}{'mean time (ms)':>16}")
+    print(f"{'no cache':<11}{0:>10.1%}{0:>12}{0:>9}{args.latency * 1000:>16.0f}")
+    for threshold in args.thresholds:
+        item = run(threshold, intents, embeddings, args)
+        print(f"{threshold:<11}{item['hit_rate']:>10.1%}{item['wrong']:>12}{item['entries']:>9}"
+              f"{item['mean_s'] * 1000:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
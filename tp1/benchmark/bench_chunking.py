@@ -0,0 +1,87 @@
+"""
+This script compares the TextProvider chunkers side by side on a synthetic CV PDF: the sequential and the concurrent
+LLM chunking against a local fake LLM with a configurable latency, and the local structural chunking. It checks that
+every chunker covers the whole text without exceeding the chunk max size and that the structural chunks only take the
+section headings of the CV as topics, and measures how far the concurrent chunks diverge from the sequential ones: the share of the sequential
+chunks also returned by the other chunkers, and whether the two chunk lists are equal.
+
+Usage: python benchmark/bench_chunking.py [--latency 0.2] [--pages 2] [--workers 8]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from ChunkCache import ChunkCache  # noqa: E402
+from fakes import SECTIONS, FakeGroq, synthetic_cv_pdf  # noqa: E402
+from TextProvider import TextProvider  # noqa: E402
+
+
+def chunk_content(chunk: str) -> str:
+    """
+    Extracts the content of a chunk, leaving out the topic.
+
+    Args:
+        chunk (str): A chunk returned by TextProvider.
+
+    Returns:
+        str: The chunk content.
+    """
+    return re.sub(r"^\{'topic': '.*?', '(content': '|chunk': )", "", chunk)[:-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--chunk-max-size", type=int, default=512)
+    args = parser.parse_args()
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file = os.path.join(temp_dir, "cv.pdf")
+        with open(file, 'wb') as output_file:
+            output_file.write(synthetic_cv_pdf(args.pages))
+        cache = ChunkCache(os.path.join(temp_dir, "cache"))
+        text = TextProvider(file, cache).get_text()
+        print(f"text: {len(text)} chars, fake LLM latency: {args.latency * 1000:.0f} ms, "
+              f"chunk max size: {args.chunk_max_size}")
+        print(f"{'chunker':<16}{'time (s)':>10}{'LLM calls':>11}{'chunks':>8}{'mean len':>10}{'max len':>9}"
+              f"{'sentence end':>14}{'covers text':>13}{'same as llm':>13}{'equal':>7}")
+        sequential = None
+        for chunker in TextProvider.CHUNKERS:
+            provider = TextProvider(file, cache)
+            provider.client = FakeGroq(args.latency)
+            begin = time.perf_counter()
+            if chunker == 'llm-concurrent':
+                chunks = provider.get_chunks_concurrent(args.chunk_max_size, max_workers=args.workers)
+            else:
+                chunks = provider.get_chunks(args.chunk_max_size, chunker=chunker)
+            elapsed = time.perf_counter() - begin
+            contents = [chunk_content(chunk) for chunk in chunks]
+            sentence_ends = sum(content.rstrip().endswith(('.', '!', '?')) for content in contents) / len(contents)
+            covers_text = "".join(contents) == text or " ".join(contents) == text
+            if sequential is None:
+                sequential = contents
+            same = len(set(sequential) & set(contents)) / len(set(sequential))
+            print(f"{chunker:<16}{elapsed:>10.3f}{provider.client.calls:>11}{len(chunks):>8}"
+                  f"{sum(map(len, contents)) / len(contents):>10.0f}{max(map(len, contents)):>9}"
+                  f"{sentence_ends:>14.0%}{str(covers_text):>13}{same:>13.0%}{str(contents == sequential):>7}")
+            if not covers_text:
+                raise AssertionError(f"The '{chunker}' chunks do not cover the text")
+            if max(map(len, contents)) > args.chunk_max_size:
+                raise AssertionError(f"The '{chunker}' chunks exceed {args.chunk_max_size} characters")
+            if chunker == 'structural':
+                topics = {topic for _, _, topic, _ in provider.iter_structural_chunks(args.chunk_max_size)}
+                if not topics <= set(SECTIONS) | {'unknown'}:
+                    raise AssertionError(f"Lines that are not headings were taken as topics: {topics - set(SECTIONS)}")
+
+
+if __name__ == "__main__":
+    main()
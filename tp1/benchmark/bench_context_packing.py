@@ -0,0 +1,68 @@
+"""
+This script measures the prompt context built from the retrieved chunks with and without the ContextPacker, as the
+number of chunks retrieved grows. The chunks are overlapping windows of a synthetic CV, as the concurrent chunker
+produces them, retrieved in a random order of decreasing scores. It reports the context tokens, the chunks kept and
+the milliseconds spent packing, for each top_k.
+
+Usage: python benchmark/bench_context_packing.py [--top-k 2 5 10 20 50] [--budget 2000] [--window 512]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from ContextPacker import ContextPacker  # noqa: E402
+from fakes import synthetic_cv  # noqa: E402
+
+
+def overlapping_windows(text: str, window: int, overlap: int) -> list[str]:
+    """
+    Splits a text into windows of characters overlapping their neighbours.
+
+    Args:
+        text (str): The text.
+        window (int): The characters of each window.
+        overlap (int): The characters shared by two consecutive windows.
+
+    Returns:
+        list[str]: The windows.
+    """
+    return [text[start:start + window] for start in range(0, max(len(text) - overlap, 1), window - overlap)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[2, 5, 10, 20, 50])
+    parser.add_argument("--budget", type=int, default=ContextPacker.MODEL_BUDGETS["llama-3.3-70b-versatile"])
+    parser.add_argument("--window", type=int, default=512)
+    parser.add_argument("--overlap", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    chunks = overlapping_windows(synthetic_cv(400), args.window, args.overlap)
+    rng = np.random.default_rng(0)
+    packer = ContextPacker(max_tokens=args.budget)
+    print(f"{len(chunks)} chunks of {args.window} chars overlapping by {args.overlap}, budget {args.budget} tokens")
+    print(f"{'top_k':<8}{'raw tokens':>12}{'packed tokens':>15}{'chunks kept':>13}{'pack (ms)':>11}")
+    for top_k in args.top_k:
+        # Consecutive windows are retrieved together, as they share the text matching the question
+        start = int(rng.integers(max(len(chunks) - top_k, 1)))
+        retrieved = list(rng.permutation(chunks[start:start + top_k]))
+        scores = sorted(rng.random(len(retrieved)), reverse=True)
+        begin = time.perf_counter()
+        for _ in range(args.repeat):
+            packed = packer.pack(retrieved, scores)
+        elapsed = (time.perf_counter() - begin) / args.repeat
+        raw_tokens = ContextPacker.estimate_tokens("\n".join(retrieved))
+        packed_tokens = ContextPacker.estimate_tokens("\n".join(packed))
+        print(f"{top_k:<8}{raw_tokens:>12}{packed_tokens:>15}{f'{len(packed)}/{len(retrieved)}':>13}"
+              f"{elapsed * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+This script measures the embedding throughput and memory of a CPU model on chunks of varied lengths, as a large
+document produces them. It compares the single model call VectorDB made before, which pads every chunk to the longest
+one, with micro-batches in the original order and with the BucketedEncoder micro-batches of similar lengths, for
+several batch sizes. Each configuration runs in its own process, so its peak RSS is measured alone.
+
+The fake transformer of fakes.py is used by default. With --model, the real model is loaded with transformers.
+
+Usage: python benchmark/bench_embedding_buckets.py [--chunks 256] [--batch-sizes 8 16 32 64] [--threads 4]
+       [--model jinaai/jina-embeddings-v2-small-en]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from BucketedEncoder import BucketedEncoder  # noqa: E402
+from fakes import FakeTransformer, synthetic_cv  # noqa: E402
+
+
+def varied_chunks(chunks: int, seed: int = 0) -> list[str]:
+    """
+    Cuts chunks of varied lengths, from a sentence to a few pages, out of a synthetic CV.
+
+    Args:
+        chunks (int): The number of chunks.
+        seed (int): The random seed.
+
+    Returns:
+        list[str]: The chunks.
+    """
+    rng = np.random.default_rng(seed)
+    text = synthetic_cv(2000)
+    lengths = np.minimum(rng.lognormal(6.0, 0.9, chunks).astype(int) + 50, 8000)
+    starts = rng.integers(0, len(text) - lengths)
+    return [text[start:start + length] for start, length in zip(starts, lengths)]
+
+
+def peak_rss_mib() -> float:
+    """
+    Returns the peak resident memory of the process.
+
+    Returns:
+        float: The peak RSS in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_configuration(name: str, batch_size: int, args, results):
+    """
+    Embeds the chunks with a configuration, in a new process, and checks that the embeddings follow the chunks order.
+
+    Args:
+        name (str): The configuration, 'single call', 'unsorted' or 'bucketed'.
+        batch_size (int): The maximum number of chunks per micro-batch.
+        args (argparse.Namespace): The benchmark arguments.
+        results (multiprocessing.Queue): The queue receiving the measures.
+    """
+    if args.model:
+        from transformers import AutoModel
+        model = AutoModel.from_pretrained(args.model, trust_remote_code=True)
+    else:
+        model = FakeTransformer()
+    chunks = varied_chunks(args.chunks)
+    if name == 'single call':
+        encoder = BucketedEncoder(model.encode, max_batch_size=len(chunks), max_batch_tokens=sys.maxsize,
+                                  threads=args.threads)
+    elif name == 'unsorted':
+        # Every chunk counts as a single token, so the micro-batches keep the order of the chunks
+        encoder = BucketedEncoder(model.encode, max_batch_size=batch_size, threads=args.threads,
+                                  count_tokens=lambda item: 1)
+    else:
+        encoder = BucketedEncoder(model.encode, max_batch_size=batch_size, max_batch_tokens=args.max_batch_tokens,
+                                  threads=args.threads)
+    loaded = peak_rss_mib()
+    begin = time.perf_counter()
+    embeddings = encoder.encode(chunks)
+    elapsed = time.perf_counter() - begin
+    for index in np.random.default_rng(1).integers(len(chunks), size=4):
+        expected = np.asarray(model.encode([chunks[index]]))[0]
+        if not np.allclose(embeddings[index], expected, atol=1e-3):
+            raise AssertionError(f"The embedding of chunk {index} is not in its place")
+    results.put({'name': name, 'batch_size': batch_size, 'chunks_per_s': len(chunks) / elapsed,
+                 'peak_rss_mib': peak_rss_mib(), 'added_rss_mib': peak_rss_mib() - loaded,
+                 'batches': len(encoder.batches(chunks))})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--max-batch-tokens", type=int, default=16384)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads of the real model")
+    parser.add_argument("--model", default=None, help="transformer model to load instead of the fake one")
+    args = parser.parse_args()
+
+    lengths = [len(item) // 4 for item in varied_chunks(args.chunks)]
+    print(f"{args.chunks} chunks of {min(lengths)} to {max(lengths)} tokens (median {int(np.median(lengths))}), "
+          f"model {args.model or 'fake transformer'}, cap {args.max_batch_tokens} padded tokens")
+    print(f"{'configuration':<16}{'batch':>7}{'calls':>7}{'chunks/s':>10}{'peak RSS (MiB)':>16}{'added (MiB)':>13}")
+    context = multiprocessing.get_context("spawn")
+    configurations = [('single call', args.chunks)] + [(name, batch_size) for name in ('unsorted', 'bucketed')
+                                                        for batch_size in args.batch_sizes]
+    for name, batch_size in configurations:
+        results = context.Queue()
+        process = context.Process(target=run_configuration, args=(name, batch_size, args, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"The {name} configuration failed")
+        item = results.get()
+        print(f"{item['name']:<16}{item['batch_size']:>7}{item['batches']:>7}{item['chunks_per_s']:>10.1f}"
+              f"{item['peak_rss_mib']:>16.0f}{item['added_rss_mib']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
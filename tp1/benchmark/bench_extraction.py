@@ -0,0 +1,124 @@
+"""
+This script measures the latency and the peak Python memory of the PDF text extraction on synthetic CVs of 1, 50 and
+500 pages. It compares the previous approach (writing the upload to a temporary file, concatenating the pages and
+normalising the whole text) with the page streaming extraction from the in-memory upload buffer, and with the
+structural chunking fed page by page.
+
+Usage: python benchmark/bench_extraction.py [--pages 1 50 500]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pymupdf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from ChunkCache import ChunkCache  # noqa: E402
+from fakes import synthetic_cv_pdf  # noqa: E402
+from TextProvider import TextProvider  # noqa: E402
+
+
+def temp_file_extraction(upload: io.BytesIO, temp_dir: str) -> int:
+    """
+    Extracts the text as the application did before, writing the upload to disk and building the whole text.
+
+    Args:
+        upload (io.BytesIO): The uploaded file.
+        temp_dir (str): The directory for the temporary file.
+
+    Returns:
+        int: The extracted text length.
+    """
+    temp_file = os.path.join(temp_dir, "temp_cv.pdf")
+    with open(temp_file, 'wb') as output_temporary_file:
+        output_temporary_file.write(upload.getvalue())
+    text = ""
+    for page in pymupdf.open(temp_file):
+        text += page.get_text()
+    text = text.replace("\n", " ")
+    text = " ".join(text.split())
+    os.remove(temp_file)
+    return len(text)
+
+
+def streaming_extraction(upload: io.BytesIO, cache: ChunkCache) -> int:
+    """
+    Extracts the text page by page from the upload buffer.
+
+    Args:
+        upload (io.BytesIO): The uploaded file.
+        cache (ChunkCache): The TextProvider cache, not used by the page streaming.
+
+    Returns:
+        int: The extracted text length.
+    """
+    length = -1
+    for page in TextProvider(upload.getbuffer(), cache).iter_pages():
+        length += len(page) + 1
+    return max(length, 0)
+
+
+def streaming_chunking(upload: io.BytesIO, cache: ChunkCache) -> int:
+    """
+    Splits the upload buffer into structural chunks while the pages are read.
+
+    Args:
+        upload (io.BytesIO): The uploaded file.
+        cache (ChunkCache): The TextProvider cache, not used by the structural chunks generator.
+
+    Returns:
+        int: The extracted text length.
+    """
+    end = 0
+    for _, end, _, _ in TextProvider(upload.getbuffer(), cache).iter_structural_chunks(512):
+        pass
+    return end
+
+
+def measure(function, *args) -> tuple[float, float, int]:
+    """
+    Runs a function measuring its latency and its peak Python memory allocation.
+
+    Args:
+        function: The function to run.
+        *args: The function arguments.
+
+    Returns:
+        tuple[float, float, int]: The latency in seconds, the peak memory in MiB and the function result.
+    """
+    tracemalloc.start()
+    begin = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 50, 500])
+    args = parser.parse_args()
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    print(f"{'pages':>6}{'PDF (MiB)':>11}  {'method':<22}{'latency (ms)':>14}{'peak (MiB)':>12}{'text chars':>12}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ChunkCache(os.path.join(temp_dir, "cache"))
+        for pages in args.pages:
+            upload = io.BytesIO(synthetic_cv_pdf(pages))
+            size = len(upload.getbuffer()) / 1024 / 1024
+            for name, function, function_args in [("temp file + concat", temp_file_extraction, (upload, temp_dir)),
+                                                  ("page streaming", streaming_extraction, (upload, cache)),
+                                                  ("streaming chunking", streaming_chunking, (upload, cache))]:
+                elapsed, peak, length = measure(function, *function_args)
+                print(f"{pages:>6}{size:>11.2f}  {name:<22}{elapsed * 1000:>14.1f}{peak:>12.2f}{length:>12}")
+
+
+if __name__ == "__main__":
+    main()
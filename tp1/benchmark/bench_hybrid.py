@@ -0,0 +1,116 @@
+"""
+This script measures the overhead of the hybrid retrieval of VectorDB: the BM25 query of the keyword index and the
+reciprocal rank fusion with the dense results. It indexes a synthetic corpus of CV chunks mentioning technologies,
+companies and degrees, and reports the mean and p99 milliseconds added per query, for a single CV and for larger
+corpora.
+
+Usage: python benchmark/bench_hybrid.py [--chunks 40 4000 40000] [--queries 1000] [--top-k 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from KeywordIndex import KeywordIndex  # noqa: E402
+
+TECHNOLOGIES = ["python", "java", "c++", "c#", "node.js", "react", "kubernetes", "docker", "terraform", "aws", "gcp",
+                "azure", "postgresql", "mongodb", "kafka", "spark", "pytorch", "tensorflow", "scikit-learn", "ci-cd",
+                "graphql", "rust", "go", "scala", "airflow", "redis", "elasticsearch", "langchain", "fastapi", "linux"]
+COMPANIES = ["Globant", "Mercado Libre", "Accenture", "Despegar", "Ualá", "Naranja X", "Santander", "Google",
+             "Amazon", "Microsoft", "Intel", "Oracle", "Spotify", "Rappi", "Auth0"]
+DEGREES = ["BSc in Computer Science", "MSc in Data Science", "Software Engineering degree", "MBA",
+           "PhD in Artificial Intelligence", "Systems Engineering degree"]
+WORDS = ["developed", "designed", "led", "team", "services", "platform", "data", "pipelines", "customers", "scalable",
+         "migrated", "reduced", "latency", "cost", "built", "features", "production", "models", "monitoring", "api"]
+
+
+def synthetic_chunks(chunks: int, seed: int = 0) -> list[str]:
+    """
+    Generates CV chunks, each one mixing common words with a few technologies, a company and sometimes a degree.
+
+    Args:
+        chunks (int): The number of chunks.
+        seed (int): The random seed.
+
+    Returns:
+        list[str]: The chunks.
+    """
+    rng = np.random.default_rng(seed)
+    text = []
+    for _ in range(chunks):
+        words = list(rng.choice(WORDS, size=rng.integers(30, 80)))
+        words += list(rng.choice(TECHNOLOGIES, size=rng.integers(1, 6)))
+        words.append(COMPANIES[rng.integers(len(COMPANIES))])
+        if rng.random() < 0.2:
+            words.append(DEGREES[rng.integers(len(DEGREES))])
+        rng.shuffle(words)
+        text.append(" ".join(words))
+    return text
+
+
+def synthetic_queries(queries: int, seed: int = 1) -> list[str]:
+    """
+    Generates questions about the technologies, companies and degrees of a candidate.
+
+    Args:
+        queries (int): The number of queries.
+        seed (int): The random seed.
+
+    Returns:
+        list[str]: The queries.
+    """
+    rng = np.random.default_rng(seed)
+    templates = ["Does the candidate have experience with {} and {}?", "Did the candidate work at {} using {}?",
+                 "Has the candidate a {} or experience with {}?"]
+    names = [TECHNOLOGIES, COMPANIES, DEGREES]
+    return [templates[i % 3].format(names[i % 3][rng.integers(len(names[i % 3]))],
+                                    TECHNOLOGIES[rng.integers(len(TECHNOLOGIES))]) for i in range(queries)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[40, 4000, 40000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = synthetic_queries(args.queries)
+    depth = max(2 * args.top_k, 10)
+    print(f"{args.queries} queries, top_k {args.top_k}, {depth} candidates per retriever")
+    print(f"{'chunks':>8}{'index (s)':>11}{'bm25 mean (ms)':>16}{'fusion mean (ms)':>18}{'total p99 (ms)':>16}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for chunks in args.chunks:
+            text = synthetic_chunks(chunks)
+            ids = [f"cv#{i}" for i in range(chunks)]
+            index = KeywordIndex(f"bench-{chunks}", temp_dir)
+            begin = time.perf_counter()
+            index.add(ids, text, [{"text": item} for item in text])
+            index_time = time.perf_counter() - begin
+            # The dense results are emulated by random matches, as only the fusion cost matters here
+            rng = np.random.default_rng(2)
+            dense = [{'matches': [{'id': ids[i], 'score': 0.0, 'metadata': {}}
+                                  for i in rng.choice(chunks, min(depth, chunks), replace=False)]}
+                     for _ in range(args.queries)]
+            for query in queries[:10]:
+                index.query(query, depth)
+            bm25_times, fusion_times = [], []
+            for query, dense_results in zip(queries, dense):
+                begin = time.perf_counter()
+                sparse_results = index.query(query, depth)
+                middle = time.perf_counter()
+                KeywordIndex.fuse([dense_results, sparse_results], args.top_k)
+                bm25_times.append(middle - begin)
+                fusion_times.append(time.perf_counter() - middle)
+            totals = (np.asarray(bm25_times) + np.asarray(fusion_times)) * 1000
+            print(f"{chunks:>8}{index_time:>11.2f}{np.mean(bm25_times) * 1000:>16.3f}"
+                  f"{np.mean(fusion_times) * 1000:>18.3f}{np.percentile(totals, 99):>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+This script compares the compact storage modes of the quantized backend with the exact NumPy backend on synthetic
+embeddings whose variance decays across dimensions, as the variance of sentence embeddings does. For each mode, it
+reports the bytes scanned per vector, the memory reduction of the scan, the float32 rows still read per query to
+rescore the candidates, the recall@k against the full precision results and the queries per second. The last mode
+ranks by the codes only, without reading the float32 vectors. It then measures the recall when the vectors added after
+the quantizer was trained come from another subspace than the first ones, with the quantizer trained once, and
+trained again as the index grows.
+
+Usage: python benchmark/bench_quantization.py [--vectors 100000] [--dimension 512] [--rescore 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from bench_ann import build, search  # noqa: E402
+from NumpyBackend import NumpyBackend  # noqa: E402
+from QuantizedBackend import QuantizedBackend  # noqa: E402
+
+
+def synthetic_embeddings(vectors: int, dimension: int, topics: int, seed: int = 0) -> np.ndarray:
+    """
+    Generates embeddings grouped around random topics, with a variance decaying across the dimensions.
+
+    Args:
+        vectors (int): The number of embeddings.
+        dimension (int): The embeddings dimension.
+        topics (int): The number of topics.
+        seed (int): The random seed.
+
+    Returns:
+        np.ndarray: The embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    decay = (np.arange(1, dimension + 1, dtype=np.float32) ** -0.5)
+    centers = rng.standard_normal((topics, dimension), dtype=np.float32)
+    embeddings = centers[rng.integers(topics, size=vectors)]
+    embeddings += 0.7 * rng.standard_normal((vectors, dimension), dtype=np.float32)
+    return embeddings * decay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, default=10)
+    parser.add_argument("--train-size", type=int, default=1024, help="vectors from which the quantizer is trained")
+    args = parser.parse_args()
+
+    embeddings = synthetic_embeddings(args.vectors, args.dimension, args.topics)
+    rng = np.random.default_rng(1)
+    queries = embeddings[rng.integers(args.vectors, size=args.queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape, dtype=np.float32) * queries.std(axis=0)
+    modes = [("int8", {}),
+             (f"int8 + pca {args.dimension // 2}", {'dimension': args.dimension // 2}),
+             (f"int8 + pca {args.dimension // 4}", {'dimension': args.dimension // 4}),
+             (f"int8 + truncate {args.dimension // 4}", {'dimension': args.dimension // 4, 'projection': 'truncate'}),
+             (f"int8 + pca {args.dimension // 4}, no rescore", {'dimension': args.dimension // 4, 'rescore': 0})]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        exact = NumpyBackend(temp_dir, "exact")
+        build(exact, embeddings)
+        truth, exact_qps = search(exact, queries, args.top_k)
+        print(f"{args.vectors} vectors of dimension {args.dimension}, {args.rescore} candidates rescored per result")
+        print(f"{'mode':<36}{'bytes/vector':>14}{'memory':>8}{'f32 rows/query':>16}{f'recall@{args.top_k}':>12}"
+              f"{'QPS':>8}{'speedup':>9}{'build (s)':>11}")
+        print(f"{'float32':<36}{4 * args.dimension:>14}{1.0:>7.0f}x{args.vectors:>16}{1.0:>12.3f}{exact_qps:>8.0f}"
+              f"{1.0:>9.1f}{'-':>11}")
+        for number, (name, options) in enumerate(modes):
+            options = {'rescore': args.rescore, **options}
+            backend = QuantizedBackend(temp_dir, f"quantized-{number}", **options)
+            begin = time.perf_counter()
+            build(backend, embeddings)
+            build_time = time.perf_counter() - begin
+            results, qps = search(backend, queries, args.top_k)
+            recall = np.mean([len(result & expected) / len(expected) for result, expected in zip(results, truth)])
+            code_bytes = backend.codes.shape[1]
+            print(f"{name:<36}{code_bytes:>14}{4 * args.dimension / code_bytes:>7.0f}x"
+                  f"{args.top_k * options['rescore']:>16}{recall:>12.3f}{qps:>8.0f}{qps / exact_qps:>9.1f}"
+                  f"{build_time:>11.1f}")
+
+        # The first vectors vary along the first dimensions, and the vectors added later along the last ones
+        first = synthetic_embeddings(args.train_size, args.dimension, args.topics)
+        later = synthetic_embeddings(args.vectors - args.train_size, args.dimension, args.topics, seed=2)[:, ::-1]
+        drifted = np.ascontiguousarray(np.vstack([first, later]))
+        drifted_queries = later[rng.integers(len(later), size=args.queries)]
+        exact = NumpyBackend(temp_dir, "drift-exact")
+        build(exact, drifted, batch_size=args.train_size)
+        truth, _ = search(exact, drifted_queries, args.top_k)
+        print(f"\nfirst {args.train_size} vectors from another subspace than the {args.vectors - args.train_size} "
+              f"added later, int8 + pca {args.dimension // 4}")
+        print(f"{'quantizer':<36}{'trained on':>14}{f'recall@{args.top_k}':>12}")
+        for name, growth in [("trained once", float('inf')), ("trained again after 4x growth", 4.0)]:
+            backend = QuantizedBackend(temp_dir, f"drift-{growth}", dimension=args.dimension // 4, rescore=args.rescore,
+                                       min_train_size=args.train_size, retrain_growth=growth)
+            build(backend, drifted, batch_size=args.train_size)
+            results, _ = search(backend, drifted_queries, args.top_k)
+            recall = np.mean([len(result & expected) / len(expected) for result, expected in zip(results, truth)])
+            print(f"{name:<36}{backend.trained_size:>14}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+This script benchmarks the vector backends behind VectorDB.get_similar_text as the data grows. For each scale, it
+generates synthetic chunk embeddings grouped around topics, computes the exact top-k of the queries as ground truth,
+and runs each backend: the local Pinecone stand-in, the exact NumPy backend, and the approximate IVF and quantized
+backends. It reports the build time, the peak Python memory of the build, the index size on disk, the p50 and p99
+query latencies, the queries per second under concurrency and the recall@k, and writes them to a JSON file. With
+--baseline, the results are compared with a previous JSON file, so regressions are visible.
+
+The embeddings are generated and inserted in batches, so the 1M scale needs about 2 GiB of disk per backend at
+dimension 512, but not that much memory beyond the backend itself.
+
+Usage: python benchmark/bench_retrieval.py [--scales 1000 100000 1000000] [--backends numpy ivf quantized]
+       [--output retrieval.json] [--baseline previous.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from IvfBackend import IvfBackend  # noqa: E402
+from LocalPinecone import LocalPinecone  # noqa: E402
+from NumpyBackend import NumpyBackend  # noqa: E402
+from PineconeBackend import PineconeBackend  # noqa: E402
+from QuantizedBackend import QuantizedBackend  # noqa: E402
+
+BACKENDS = ('local-pinecone', 'numpy', 'ivf', 'quantized')
+
+
+def create_backend(name: str, directory: str, index_name: str):
+    """
+    Creates a backend as VectorDB.create_backend does, stored in a given directory.
+
+    Args:
+        name (str): The backend name, one of BACKENDS.
+        directory (str): The directory of the index.
+        index_name (str): The index name.
+
+    Returns:
+        VectorBackend: The backend.
+    """
+    if name == 'local-pinecone':
+        return PineconeBackend(LocalPinecone(os.path.join(directory, "local_pinecone")), index_name)
+    elif name == 'numpy':
+        return NumpyBackend(directory, index_name)
+    elif name == 'ivf':
+        return IvfBackend(directory, index_name)
+    return QuantizedBackend(directory, index_name, dimension=128)
+
+
+def embedding_batches(centers: np.ndarray, vectors: int, batch_size: int, seed: int = 0):
+    """
+    Generates the chunk embeddings in batches, each embedding around a random topic. Each batch is generated from its
+    own seed, so the same batches are generated again for every backend.
+
+    Args:
+        centers (np.ndarray): The topics centers.
+        vectors (int): The number of embeddings.
+        batch_size (int): The number of embeddings per batch.
+        seed (int): The random seed.
+
+    Returns:
+        Iterator[tuple[int, np.ndarray]]: The start row and the embeddings of each batch.
+    """
+    for start in range(0, vectors, batch_size):
+        rng = np.random.default_rng([seed, start])
+        count = min(batch_size, vectors - start)
+        embeddings = centers[rng.integers(len(centers), size=count)]
+        embeddings += rng.standard_normal((count, centers.shape[1]), dtype=np.float32)
+        yield start, embeddings
+
+
+def ground_truth(centers: np.ndarray, vectors: int, queries: np.ndarray, top_k: int, batch_size: int) -> list[set]:
+    """
+    Computes the exact top-k of each query by cosine similarity, keeping a running top-k over the batches.
+
+    Args:
+        centers (np.ndarray): The topics centers.
+        vectors (int): The number of embeddings.
+        queries (np.ndarray): The queries.
+        top_k (int): The number of results per query.
+        batch_size (int): The number of embeddings per batch.
+
+    Returns:
+        list[set]: The ids of the exact top-k of each query.
+    """
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    for start, embeddings in embedding_batches(centers, vectors, batch_size):
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        scores = np.concatenate([best_scores, queries @ embeddings.T], axis=1)
+        rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(embeddings)),
+                                                          (len(queries), len(embeddings)))], axis=1)
+        keep = np.argpartition(-scores, min(top_k, scores.shape[1]) - 1, axis=1)[:, :top_k]
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_rows = np.take_along_axis(rows, keep, axis=1)
+    return [{f"id-{row}" for row in rows} for rows in best_rows]
+
+
+def directory_bytes(directory: str) -> int:
+    """
+    Returns the size of the files of a directory, recursively.
+
+    Args:
+        directory (str): The directory.
+
+    Returns:
+        int: The size in bytes.
+    """
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def run_backend(name: str, centers: np.ndarray, vectors: int, queries: np.ndarray, truth: list[set], args) -> dict:
+    """
+    Builds an index with a backend and measures it.
+
+    Args:
+        name (str): The backend name.
+        centers (np.ndarray): The topics centers.
+        vectors (int): The number of embeddings.
+        queries (np.ndarray): The queries.
+        truth (list[set]): The ids of the exact top-k of each query.
+        args (argparse.Namespace): The benchmark arguments.
+
+    Returns:
+        dict: The measures of the backend.
+    """
+    with tempfile.TemporaryDirectory(dir=args.directory) as temp_dir:
+        backend = create_backend(name, temp_dir, "bench")
+        tracemalloc.start()
+        begin = time.perf_counter()
+        backend.create(centers.shape[1])
+        for start, embeddings in embedding_batches(centers, vectors, args.batch_size):
+            backend.upsert([f"id-{i}" for i in range(start, start + len(embeddings))], embeddings,
+                           [{}] * len(embeddings))
+        build_time = time.perf_counter() - begin
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        for query in queries[:5]:
+            backend.query(query, args.top_k)
+        latencies = []
+        results = []
+        for query in queries:
+            begin = time.perf_counter()
+            matches = backend.query(query, args.top_k)['matches']
+            latencies.append(time.perf_counter() - begin)
+            results.append({match['id'] for match in matches})
+        begin = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(lambda query: backend.query(query, args.top_k), queries))
+        concurrent_qps = len(queries) / (time.perf_counter() - begin)
+        latencies = np.asarray(latencies) * 1000
+        return {
+            'backend': name,
+            'vectors': vectors,
+            'build_s': build_time,
+            'build_peak_python_mib': peak / 1024 / 1024,
+            'index_mib': directory_bytes(temp_dir) / 1024 / 1024,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'qps': float(1000 / latencies.mean()),
+            'concurrent_qps': concurrent_qps,
+            f'recall@{args.top_k}': float(np.mean([len(result & expected) / len(expected)
+                                                   for result, expected in zip(results, truth)]))
+        }
+
+
+def compare(results: list[dict], baseline_path: str, top_k: int):
+    """
+    Prints the relative change of the latency, the throughput and the recall against a previous run.
+
+    Args:
+        results (list[dict]): The results of this run.
+        baseline_path (str): The JSON file of the previous run.
+        top_k (int): The number of results per query.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as input_file:
+        baseline = {(item['backend'], item['vectors']): item for item in json.load(input_file)['results']}
+    print(f"\nChange against {baseline_path}")
+    print(f"{'backend':<16}{'vectors':>10}{'p50':>10}{'p99':>10}{'QPS xN':>10}{'recall':>10}")
+    for item in results:
+        previous = baseline.get((item['backend'], item['vectors']))
+        if previous is None or 'skipped' in item or 'skipped' in previous:
+            continue
+        changes = [item[key] / previous[key] - 1 for key in ('p50_ms', 'p99_ms', 'concurrent_qps')]
+        print(f"{item['backend']:<16}{item['vectors']:>10}{changes[0]:>+10.1%}{changes[1]:>+10.1%}{changes[2]:>+10.1%}"
+              f"{item[f'recall@{top_k}'] - previous[f'recall@{top_k}']:>+10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--stand-in-max-vectors", type=int, default=100000,
+                        help="largest scale run with the local Pinecone stand-in, which scans its records in Python")
+    parser.add_argument("--directory", default=None, help="directory of the temporary indexes")
+    parser.add_argument("--output", default="retrieval.json")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((args.topics, args.dimension), dtype=np.float32)
+    # The queries are new chunks of the same topics
+    queries = centers[rng.integers(args.topics, size=args.queries)]
+    queries = queries + rng.standard_normal(queries.shape, dtype=np.float32)
+
+    results = []
+    print(f"{'backend':<16}{'vectors':>10}{'build (s)':>11}{'peak (MiB)':>12}{'disk (MiB)':>12}{'p50 (ms)':>10}"
+          f"{'p99 (ms)':>10}{'QPS':>9}{f'QPS x{args.concurrency}':>9}{f'recall@{args.top_k}':>11}")
+    for vectors in args.scales:
+        truth = ground_truth(centers, vectors, queries, args.top_k, args.batch_size)
+        for name in args.backends:
+            if name == 'local-pinecone' and vectors > args.stand_in_max_vectors:
+                results.append({'backend': name, 'vectors': vectors, 'skipped': "above --stand-in-max-vectors"})
+                print(f"{name:<16}{vectors:>10}  skipped, above --stand-in-max-vectors")
+                continue
+            item = run_backend(name, centers, vectors, queries, truth, args)
+            results.append(item)
+            print(f"{name:<16}{vectors:>10}{item['build_s']:>11.1f}{item['build_peak_python_mib']:>12.0f}"
+                  f"{item['index_mib']:>12.0f}{item['p50_ms']:>10.2f}{item['p99_ms']:>10.2f}{item['qps']:>9.0f}"
+                  f"{item['concurrent_qps']:>9.0f}{item[f'recall@{args.top_k}']:>11.3f}")
+
+    with open(args.output, 'w', encoding='utf-8') as output_file:
+        json.dump({
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'platform': {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                         'cpus': os.cpu_count()},
+            'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+            'results': results
+        }, output_file, indent=1)
+    print(f"\nResults written to {args.output}")
+    if args.baseline:
+        compare(results, args.baseline, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
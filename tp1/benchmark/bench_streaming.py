@@ -0,0 +1,64 @@
+"""
+This script compares the blocking and the streamed answers of Chat against a local fake LLM that generates its tokens
+with a configurable latency. For each, it reports the time until the first text can be rendered, which is the
+perceived latency of the UI, and the time until the full answer is received, and checks that the streamed answer
+records the same full text and the usage as the blocking one.
+
+Usage: python benchmark/bench_streaming.py [--latency 0.3] [--token-ms 20] [--questions 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from Chat import Chat  # noqa: E402
+from DocumentStore import DocumentStore  # noqa: E402
+from fakes import FakeGroq  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds until the first token")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="milliseconds between two tokens")
+    parser.add_argument("--questions", type=int, default=5)
+    args = parser.parse_args()
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    context = {'matches': [{'metadata': {'text': "The candidate worked five years as a data engineer. "
+                                                 "She led the migration of the data platform to the cloud. "}}]}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        chat = Chat(DocumentStore(temp_dir))
+        chat.client = FakeGroq(args.latency, args.token_ms / 1000)
+        first = {'blocking': [], 'streamed': []}
+        total = {'blocking': [], 'streamed': []}
+        for index in range(args.questions):
+            question = f"Question {index}. What did the candidate do?"
+            begin = time.perf_counter()
+            answer = chat.answer(question, context)
+            first['blocking'].append(time.perf_counter() - begin)
+            total['blocking'].append(time.perf_counter() - begin)
+
+            begin = time.perf_counter()
+            stream = chat.answer_stream(question, context)
+            for _ in stream:
+                if len(first['streamed']) == index:
+                    first['streamed'].append(time.perf_counter() - begin)
+            total['streamed'].append(time.perf_counter() - begin)
+            if stream.text != answer or stream.usage is None:
+                raise AssertionError(f"The streamed answer of question {index} was not recorded")
+
+    print(f"{args.questions} answers, first token after {args.latency * 1000:.0f} ms, then a token every "
+          f"{args.token_ms:.0f} ms")
+    print(f"{'method':<12}{'first text (ms)':>17}{'full answer (ms)':>18}")
+    for method in ('blocking', 'streamed'):
+        print(f"{method:<12}{np.mean(first[method]) * 1000:>17.0f}{np.mean(total[method]) * 1000:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+This script measures the vector I/O throughput of PineconeBackend against a fake Pinecone client with a configurable
+latency per request. It compares the upsert of a large document in a single request, as VectorDB did before, with the
+size-bounded batches sent sequentially and concurrently, and the queries building an index handle per query, as
+before, with the cached handle and with the async queries of many concurrent sessions. It also compares the vectors carrying
+their chunk text in their metadata, as VectorDB did before, with the vectors carrying the offsets of their chunk in the
+document store.
+
+Usage: python benchmark/bench_vector_io.py [--latency 0.05] [--vectors 5000] [--workers 8] [--sessions 32]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from fakes import FakePinecone, synthetic_cv  # noqa: E402
+from PineconeBackend import PineconeBackend  # noqa: E402
+
+
+def upsert_throughput(name: str, upsert, vectors: int, index) -> None:
+    """
+    Runs an upsert and prints its throughput, or its error if the request was rejected.
+
+    Args:
+        name (str): The method name.
+        upsert: The function running the upsert.
+        vectors (int): The number of upserted vectors.
+        index (FakePineconeIndex): The fake index, to count the requests.
+    """
+    requests = index.requests
+    index.peak_in_flight = 0
+    begin = time.perf_counter()
+    try:
+        upsert()
+    except ValueError as error:
+        print(f"{name:<28}{'failed':>10}  {error}")
+        return
+    elapsed = time.perf_counter() - begin
+    print(f"{name:<28}{elapsed:>10.2f}{vectors / elapsed:>12.0f}{index.requests - requests:>10}"
+          f"{index.peak_in_flight:>10}")
+
+
+async def concurrent_sessions(backend: PineconeBackend, queries: np.ndarray, sessions: int):
+    """
+    Runs the queries from concurrent sessions, each one sending its queries one after the other.
+
+    Args:
+        backend (PineconeBackend): The backend.
+        queries (np.ndarray): The query vectors.
+        sessions (int): The number of concurrent sessions.
+    """
+    async def session(session_queries: np.ndarray):
+        for query in session_queries:
+            await backend.aquery(query, 3)
+
+    await asyncio.gather(*[session(queries[i::sessions]) for i in range(sessions)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.vectors, args.dimension), dtype=np.float32)
+    ids = [f"cv#{i:08d}" for i in range(args.vectors)]
+    text = synthetic_cv(args.vectors)
+    metadata = [{"text": sentence} for sentence in text.split(". ")][:args.vectors]
+    offsets = []
+    start = 0
+    for item in metadata:
+        end = start + len(item["text"].encode('utf-8'))
+        offsets.append({"document": "cv", "start": start, "end": end})
+        start = end + 1
+    pc = FakePinecone(args.latency)
+    pc.create_index("bench", args.dimension, "cosine", None)
+    index = pc.indexes["bench"]
+
+    print(f"{args.vectors} vectors of dimension {args.dimension}, {args.latency * 1000:.0f} ms per request")
+    print(f"{'upsert':<28}{'time (s)':>10}{'vectors/s':>12}{'requests':>10}{'parallel':>10}")
+    upsert_throughput("single request", lambda: index.upsert(
+        vectors=[(ids[i], embeddings[i].tolist(), metadata[i]) for i in range(args.vectors)]), args.vectors, index)
+    sequential = PineconeBackend(pc, "bench", max_workers=1)
+    upsert_throughput("sequential batches", lambda: sequential.upsert(ids, embeddings, metadata), args.vectors,
+                      index)
+    concurrent = PineconeBackend(pc, "bench", max_workers=args.workers)
+    upsert_throughput(f"concurrent batches ({args.workers})", lambda: concurrent.upsert(ids, embeddings, metadata),
+                      args.vectors, index)
+    upsert_throughput("concurrent, offsets metadata", lambda: concurrent.upsert(ids, embeddings, offsets),
+                      args.vectors, index)
+
+    print(f"\n{'metadata':<28}{'bytes/vector':>14}{'query response (bytes)':>24}")
+    for name, items in [("chunk text", metadata), ("document store offsets", offsets)]:
+        size = np.mean([len(json.dumps(item)) for item in items])
+        # A query returns the metadata of its 3 matches
+        print(f"{name:<28}{size:>14.0f}{3 * size:>24.0f}")
+
+    queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+    print(f"\n{'query':<28}{'QPS':>10}{'handles':>10}")
+    for name, run in [("handle per query", lambda: [pc.Index("bench").query(vector=query.tolist(), top_k=3,
+                                                                             include_metadata=True)
+                                                     for query in queries]),
+                      ("cached handle", lambda: [concurrent.query(query, 3) for query in queries]),
+                      (f"async, {args.sessions} sessions",
+                       lambda: asyncio.run(concurrent_sessions(concurrent, queries, args.sessions)))]:
+        handles = pc.handles
+        begin = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - begin
+        print(f"{name:<28}{args.queries / elapsed:>10.1f}{pc.handles - handles:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Local stand-ins for the remote services used by the application, so that the benchmarks can run offline.
+"""
+
+import json
+import textwrap
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pymupdf
+
+SECTIONS = ["EXPERIENCE", "EDUCATION", "SKILLS", "PROJECTS"]
+
+
+class FakeGroq:
+    """
+    This class emulates the Groq chat completion client with a configurable latency. For chunking prompts, it answers
+    with the input text up to its last full sentence, as a well-behaved LLM would. With stream=True, it yields the
+    answer in chunks of a few characters, the first one after the latency and each next one after the token latency,
+    with the usage in the last chunk as Groq sends it.
+    """
+
+    TOKEN_CHARS = 4
+
+    def __init__(self, latency: float = 0.0, token_latency: float = 0.0):
+        """
+        Initializes the fake client.
+
+        Args:
+            latency (float): The seconds until the first token of each completion.
+            token_latency (float): The seconds between two tokens of a completion.
+        """
+        self.latency = latency
+        self.token_latency = token_latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages: list[dict[str, str]], model: str, stream: bool = False, **kwargs):
+        """
+        Returns a completion for the given messages after sleeping the configured latencies.
+
+        Args:
+            messages (list[dict[str, str]]): The chat messages.
+            model (str): The model name, ignored.
+            stream (bool): If True, returns the completion chunks as they are generated.
+
+        Returns:
+            Union[SimpleNamespace, Iterator[SimpleNamespace]]: An object with the same shape as a Groq chat completion,
+                or the objects with the same shape as its chunks.
+        """
+        self.calls += 1
+        user_input = messages[-1]['content']
+        end = user_input.rfind('. ')
+        chunk = user_input[:end + 1] if end > 0 else user_input
+        content = str({'chunk': chunk, 'topic': f"topic {len(chunk)}"})
+        usage = SimpleNamespace(prompt_tokens=len(user_input) // 4, completion_tokens=len(content) // 4)
+        if stream:
+            return self._stream(content, usage)
+        time.sleep(self.latency + self.token_latency * ((len(content) - 1) // self.TOKEN_CHARS))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+    def _stream(self, content: str, usage: SimpleNamespace):
+        """
+        Yields the chunks of a streamed completion.
+
+        Args:
+            content (str): The completion text.
+            usage (SimpleNamespace): The completion usage.
+
+        Returns:
+            Iterator[SimpleNamespace]: The completion chunks.
+        """
+        time.sleep(self.latency)
+        for start in range(0, len(content), self.TOKEN_CHARS):
+            if start > 0:
+                time.sleep(self.token_latency)
+            delta = SimpleNamespace(content=content[start:start + self.TOKEN_CHARS])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None, x_groq=None)
+        yield SimpleNamespace(choices=[], usage=None, x_groq=SimpleNamespace(usage=usage))
+
+
+class FakePineconeIndex:
+    """
+    This class emulates a Pinecone index in memory with a configurable latency per request. It rejects the upserts
+    above the Pinecone request limits, and counts the requests and the peak of concurrent requests.
+    """
+
+    MAX_REQUEST_VECTORS = 1000
+    MAX_REQUEST_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, latency: float):
+        """
+        Initializes the fake index.
+
+        Args:
+            latency (float): The seconds each request takes.
+        """
+        self.latency = latency
+        self.records = {}
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _request(self):
+        """
+        Sleeps the request latency, tracking the number of concurrent requests.
+        """
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+
+    def upsert(self, vectors: list[tuple]):
+        """
+        Inserts or updates records.
+
+        Args:
+            vectors (list[tuple]): The records as (id, values, metadata) tuples.
+        """
+        size = len(json.dumps([[vector[0], [float(value) for value in vector[1]], vector[2]] for vector in vectors],
+                              separators=(',', ':')))
+        if len(vectors) > self.MAX_REQUEST_VECTORS or size > self.MAX_REQUEST_BYTES:
+            raise ValueError(f"Upsert of {len(vectors)} vectors and {size} bytes exceeds the request limits")
+        self._request()
+        for record_id, values, metadata in vectors:
+            self.records[record_id] = (np.asarray(values, dtype=np.float32), metadata)
+
+    def delete(self, ids: list[str]):
+        """
+        Deletes records.
+
+        Args:
+            ids (list[str]): The ids of the records to be deleted.
+        """
+        self._request()
+        for record_id in ids:
+            self.records.pop(record_id, None)
+
+    def query(self, vector: list[float], top_k: int, filter: dict = None,  # noqa: A002 (same name as in Pinecone)
+              include_values: bool = False, include_metadata: bool = False):
+        """
+        Returns the records with the highest dot product with a vector.
+
+        Args:
+            vector (list[float]): The query vector.
+            top_k (int): The number of records to return.
+            filter (dict): The metadata filter of the records, with '$in' conditions.
+            include_values (bool): Ignored, the values are never returned.
+            include_metadata (bool): Whether to include the record metadata.
+
+        Returns:
+            dict: The matches with their id, score and optionally their metadata.
+        """
+        self._request()
+        ids = [record_id for record_id in self.records
+               if filter is None or all(self.records[record_id][1].get(key) in condition['$in']
+                                        for key, condition in filter.items())]
+        if not ids:
+            return {'matches': []}
+        scores = np.stack([self.records[record_id][0] for record_id in ids]) @ np.asarray(vector, dtype=np.float32)
+        return {'matches': [{'id': ids[i], 'score': float(scores[i]),
+                             'metadata': self.records[ids[i]][1] if include_metadata else None}
+                            for i in np.argsort(-scores)[:top_k]]}
+
+
+class FakePinecone:
+    """
+    This class emulates the subset of the Pinecone client used by PineconeBackend. Building an index handle takes a
+    request, as resolving the index host does.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Initializes the fake client.
+
+        Args:
+            latency (float): The seconds each request takes.
+        """
+        self.latency = latency
+        self.indexes = {}
+        self.handles = 0
+
+    def list_indexes(self) -> list[SimpleNamespace]:
+        """
+        Lists the existing indexes.
+
+        Returns:
+            list[SimpleNamespace]: The indexes descriptions, with their name.
+        """
+        time.sleep(self.latency)
+        return [SimpleNamespace(name=name) for name in self.indexes]
+
+    def create_index(self, name: str, dimension: int, metric: str, spec: object):
+        """
+        Creates an empty index.
+
+        Args:
+            name (str): The index name.
+            dimension (int): The vectors dimension, ignored.
+            metric (str): The similarity metric, ignored.
+            spec (object): The deployment spec, ignored.
+        """
+        time.sleep(self.latency)
+        self.indexes[name] = FakePineconeIndex(self.latency)
+
+    def delete_index(self, name: str):
+        """
+        Deletes an index.
+
+        Args:
+            name (str): The index name.
+        """
+        time.sleep(self.latency)
+        del self.indexes[name]
+
+    def Index(self, name: str) -> FakePineconeIndex:  # noqa: N802 (same name as the Pinecone client method)
+        """
+        Returns a handle to an existing index.
+
+        Args:
+            name (str): The index name.
+
+        Returns:
+            FakePineconeIndex: The index.
+        """
+        self.handles += 1
+        time.sleep(self.latency)
+        return self.indexes[name]
+
+
+def synthetic_cv(sentences: int = 200) -> str:
+    """
+    Generates a deterministic CV-like text.
+
+    Args:
+        sentences (int): The number of sentences of the text.
+
+    Returns:
+        str: The generated text.
+    """
+    topics = ["Python", "Machine Learning", "Kubernetes", "SQL", "team leadership", "NLP", "computer vision"]
+    companies = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli"]
+    return " ".join(f"Worked {i % 9 + 1} years at {companies[i % len(companies)]} on {topics[i % len(topics)]} "
+                    f"projects, delivering {i * 7 % 50 + 3} production features." for i in range(sentences))
+
+
+def synthetic_cv_pdf(pages: int = 2) -> bytes:
+    """
+    Generates a deterministic CV-like PDF document with headings, bullets and paragraphs. The headings are in upper
+    case and larger than the text, and each section ends with a short unpunctuated line of plain text that is not a
+    heading.
+
+    Args:
+        pages (int): The number of pages of the document.
+
+    Returns:
+        bytes: The PDF document.
+    """
+    sentences = synthetic_cv(40).split(". ")
+    document = pymupdf.open()
+    for page_number in range(pages):
+        page = document.new_page()
+        y = 72
+        for section_number, section in enumerate(SECTIONS):
+            page.insert_text((72, y), section, fontsize=14)
+            y += 24
+            for bullet in range(3):
+                sentence = sentences[(page_number * 12 + section_number * 3 + bullet) % len(sentences)]
+                page.insert_text((72, y), f"• {sentence}.", fontsize=9)
+                y += 14
+            paragraph = ". ".join(sentences[page_number % 7:page_number % 7 + 4]) + "."
+            for line in textwrap.wrap(paragraph, 95):
+                page.insert_text((72, y), line, fontsize=9)
+                y += 12
+            y += 24
+            page.insert_text((72, y), "references available on request", fontsize=9)
+            y += 24
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+class FakeTransformer:
+    """
+    This class emulates the cost of the embedding transformer on CPU: it pads a batch to its longest text, about a
+    token per four characters, and runs dense layers over every padded token, so its time and its activation memory
+    grow with the number of texts times the length of the longest one, as the real model does.
+    """
+
+    def __init__(self, dimension: int = 256, layers: int = 2, max_length: int = 8192):
+        """
+        Initializes the fake model with random weights.
+
+        Args:
+            dimension (int): The hidden and embeddings dimension.
+            layers (int): The number of dense layers.
+            max_length (int): The maximum number of tokens of a text, the longer texts being truncated.
+        """
+        rng = np.random.default_rng(0)
+        self.weights = [rng.standard_normal((dimension, dimension), dtype=np.float32) / np.sqrt(dimension)
+                        for _ in range(layers)]
+        self.embeddings = rng.standard_normal((1000, dimension), dtype=np.float32)
+        self.max_length = max_length
+        self.calls = 0
+
+    def encode(self, text: list[str]) -> np.ndarray:
+        """
+        Embeds texts by mean pooling the last layer over their tokens.
+
+        Args:
+            text (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The embedding of each text.
+        """
+        self.calls += 1
+        lengths = [min(max(len(item) // 4, 1), self.max_length) for item in text]
+        tokens = np.zeros((len(text), max(lengths)), dtype=np.int64)
+        mask = np.zeros((len(text), max(lengths), 1), dtype=np.float32)
+        for row, (item, length) in enumerate(zip(text, lengths)):
+            tokens[row, :length] = [zlib.crc32(item[i * 4:i * 4 + 4].encode('utf-8')) % len(self.embeddings)
+                                    for i in range(length)]
+            mask[row, :length] = 1
+        hidden = self.embeddings[tokens]
+        for weight in self.weights:
+            hidden = np.tanh(hidden @ weight)
+        return (hidden * mask).sum(axis=1) / mask.sum(axis=1)
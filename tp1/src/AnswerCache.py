@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class AnswerCache:
+    """
+    This class caches the answers to the questions about the documents, keyed by the question embedding and the
+    version of the documents searched, so a question similar enough to one already answered is answered again without
+    the retrieval and the LLM completion. The entries are evicted when they expire, when the cache is full, least
+    recently used first, and when one of their documents is saved again.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024, ttl: float = 3600.0):
+        """
+        Initializes an empty cache.
+
+        Args:
+            threshold (float): The minimum cosine similarity between two questions for the answer of one to be
+                returned for the other.
+            max_entries (int): The maximum number of cached answers.
+            ttl (float): The seconds an answer is cached.
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _expire(self, now: float):
+        """
+        Removes the expired entries. The entries are ordered by use, not by creation, so all of them are checked.
+
+        Args:
+            now (float): The current time.
+        """
+        expired = [key for key, entry in self.entries.items() if now - entry['time'] > self.ttl]
+        for key in expired:
+            del self.entries[key]
+        self.evictions += len(expired)
+
+    def get(self, embedding: np.ndarray, version: str):
+        """
+        Returns the answer of the most similar cached question on the same version of the documents.
+
+        Args:
+            embedding (np.ndarray): The question embedding.
+            version (str): The version of the documents searched to answer the question.
+
+        Returns:
+            Optional[str]: The cached answer, or None if no cached question is similar enough.
+        """
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding = embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+        with self._lock:
+            self._expire(time.time())
+            keys = [key for key, entry in self.entries.items() if entry['version'] == version]
+            if keys:
+                scores = np.stack([self.entries[key]['embedding'] for key in keys]) @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.entries.move_to_end(keys[best])
+                    self.hits += 1
+                    return self.entries[keys[best]]['answer']
+            self.misses += 1
+            return None
+
+    def put(self, embedding: np.ndarray, version: str, answer: str, documents: list[str] = None):
+        """
+        Caches the answer to a question.
+
+        Args:
+            embedding (np.ndarray): The question embedding.
+            version (str): The version of the documents searched to answer the question.
+            answer (str): The answer.
+            documents (list[str]): The ids of the documents searched, whose saving invalidates the answer. Defaults
+                to all the documents.
+        """
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding = embedding / max(float(np.linalg.norm(embedding)), 1e-12)
+        with self._lock:
+            self.entries[self._next_key] = {'embedding': embedding, 'version': version, 'answer': answer,
+                                            'documents': None if documents is None else set(documents),
+                                            'time': time.time()}
+            self._next_key += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, document: str):
+        """
+        Removes the answers that depend on a document, i.e. the answers searched in it or in all the documents.
+
+        Args:
+            document (str): The document id.
+        """
+        with self._lock:
+            keys = [key for key, entry in self.entries.items()
+                    if entry['documents'] is None or document in entry['documents']]
+            for key in keys:
+                del self.entries[key]
+            self.invalidations += len(keys)
+
+    def metrics(self) -> dict:
+        """
+        Returns the cache metrics.
+
+        Returns:
+            dict: The number of hits and misses, the hit rate, the number of cached answers, and the number of answers
+            evicted and invalidated.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / max(self.hits + self.misses, 1),
+                'entries': len(self.entries),
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
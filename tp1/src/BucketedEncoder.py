@@ -0,0 +1,85 @@
+from typing import Callable
+
+import numpy as np
+
+from ContextPacker import ContextPacker
+
+try:
+    import torch
+except ImportError:
+    # Not needed when the model is served by an EmbeddingServer, in which case the threads are set by the server
+    torch = None
+
+
+class BucketedEncoder:
+    """
+    This class embeds a list of texts with a transformer model in micro-batches of texts of similar lengths. The model
+    pads each batch to its longest text, so the texts are sorted by token length first, and each micro-batch is capped
+    in texts and in padded tokens, which bounds the activation memory whatever the number and the lengths of the
+    texts. The embeddings are returned in the order of the texts.
+    """
+
+    def __init__(self, encode: Callable[[list[str]], np.ndarray], max_batch_size: int = 32,
+                 max_batch_tokens: int = 16384, threads: int = None, count_tokens: Callable[[str], int] = None):
+        """
+        Initializes the encoder.
+
+        Args:
+            encode (Callable[[list[str]], np.ndarray]): The model function embedding a list of texts.
+            max_batch_size (int): The maximum number of texts embedded together.
+            max_batch_tokens (int): The maximum number of padded tokens embedded together, i.e. the number of texts
+                times the length of the longest one. A longer text is embedded alone.
+            threads (int): The number of threads of the torch intra-op parallelism, set for the whole process.
+                Defaults to the torch default.
+            count_tokens (Callable[[str], int]): The function counting the tokens of a text, e.g. with the model
+                tokenizer. Defaults to a local estimate.
+        """
+        self._encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.count_tokens = count_tokens if count_tokens is not None else ContextPacker.estimate_tokens
+        self.threads = threads
+        if threads is not None and torch is not None:
+            torch.set_num_threads(threads)
+
+    def batches(self, text: list[str]) -> list[list[int]]:
+        """
+        Splits texts into micro-batches of texts of similar lengths.
+
+        Args:
+            text (list[str]): The texts.
+
+        Returns:
+            list[list[int]]: The indexes of the texts of each micro-batch, by increasing length.
+        """
+        lengths = [max(self.count_tokens(item), 1) for item in text]
+        batches = []
+        batch = []
+        for index in sorted(range(len(text)), key=lambda i: lengths[i]):
+            # The texts are sorted by length, so the current text is the longest one of its batch
+            if batch and (len(batch) >= self.max_batch_size
+                          or (len(batch) + 1) * lengths[index] > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(index)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def encode(self, text: list[str]) -> np.ndarray:
+        """
+        Embeds a list of texts, one micro-batch at a time.
+
+        Args:
+            text (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The embedding of each text.
+        """
+        embeddings = None
+        for batch in self.batches(text):
+            batch_embeddings = np.asarray(self._encode([text[index] for index in batch]))
+            if embeddings is None:
+                embeddings = np.empty((len(text),) + batch_embeddings.shape[1:], dtype=batch_embeddings.dtype)
+            embeddings[batch] = batch_embeddings
+        return embeddings if embeddings is not None else np.zeros((0, 0), dtype=np.float32)
@@ -2,31 +2,45 @@ import os
 
 from groq import Groq
 
+from CompletionStream import CompletionStream
+from ContextPacker import ContextPacker
+from DocumentStore import DocumentStore
+
 
 class Chat:
     """
     This class handles chat interactions with Groq API.
     """
 
-    def __init__(self):
+    def __init__(self, store: DocumentStore = None, packer: ContextPacker = None):
         """
         Initializes the Chat class by setting up the Groq client with the API key.
+
+        Args:
+            store (DocumentStore): The store the text of the context chunks is read from. Defaults to the store in the
+                default directory, as used by VectorDB.
+            packer (ContextPacker): The packer of the context chunks within a token budget. Defaults to the budget of
+                the model.
         """
         self.client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+        self.store = store if store is not None else DocumentStore()
+        self.packer = packer if packer is not None else ContextPacker("llama-3.3-70b-versatile")
 
-    def answer(self, question: str, context: {}):
+    def _messages(self, question: str, context: {}) -> list[dict[str, str]]:
         """
-        Generates an answer to a user's question based on the provided context.
+        Builds the chat messages asking a user's question with the provided context.
 
         Args:
             question (str): The user's question to be answered.
             context (dict): A dictionary containing context information, typically a list of matches with metadata.
 
         Returns:
-            str: The generated answer to the question.
+            list[dict[str, str]]: The system prompt with the context, and the question.
         """
-        # Assuming the context is a list of dictionaries with 'text' key
-        clean_context = '\n'.join(item['metadata']['text'] for item in context['matches'])
+        # The text of each match is sliced from the document store, with the offsets of its metadata, and the best
+        # distinct chunks are packed within the token budget
+        texts = [self.store.chunk_text(item['metadata']) for item in context['matches']]
+        clean_context = '\n'.join(self.packer.pack(texts, [item.get('score', 0.0) for item in context['matches']]))
         sys_prompt = f"""Instructions:
         - You are a helpful assistant that analyzes chunks of texts extracted from a candidate's CVs and answers questions about the candidate.
         - Be helpful and answer questions concisely. If you don't know the answer, say 'I don't know'
@@ -35,17 +49,47 @@ class Chat:
                 
         Context: 
         {clean_context}"""
+        return [
+            {
+                "role": "system",
+                "content": sys_prompt,
+            },
+            {
+                "role": "user",
+                "content": question,
+            }
+        ]
+
+    def answer(self, question: str, context: {}):
+        """
+        Generates an answer to a user's question based on the provided context.
+
+        Args:
+            question (str): The user's question to be answered.
+            context (dict): A dictionary containing context information, typically a list of matches with metadata.
+
+        Returns:
+            str: The generated answer to the question.
+        """
         chat_completion = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": sys_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": question,
-                }
-            ],
+            messages=self._messages(question, context),
             model="llama-3.3-70b-versatile",
         )
         return chat_completion.choices[0].message.content
+
+    def answer_stream(self, question: str, context: {}) -> CompletionStream:
+        """
+        Generates an answer to a user's question based on the provided context, streamed token by token.
+
+        Args:
+            question (str): The user's question to be answered.
+            context (dict): A dictionary containing context information, typically a list of matches with metadata.
+
+        Returns:
+            CompletionStream: The answer tokens as they arrive, with the full text and the usage once consumed.
+        """
+        return CompletionStream(self.client.chat.completions.create(
+            messages=self._messages(question, context),
+            model="llama-3.3-70b-versatile",
+            stream=True,
+        ))
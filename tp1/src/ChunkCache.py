@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the cache size is only kept consistent within a single process
+    fcntl = None
+
+
+class ChunkCache:
+    """
+    This class implements a persistent content-addressed cache on disk for the results of the ingestion pipeline
+    (extracted text and chunks), stored as JSON files, so that re-ingesting the same document is near-instant. The
+    embeddings are cached by EmbeddingCache instead. Entries are evicted in least recently used order when the cache
+    exceeds its maximum size. The size of the cache is kept in a file updated under a file lock by every writer, e.g.
+    the ingestion worker processes, so the entries are only listed when the cache has to be evicted.
+    """
+
+    DEFAULT_DIRECTORY = "resources/cache"
+    LOCK_FILE = "cache.lock"
+    SIZE_FILE = "cache.size"
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_size: int = 256 * 1024 * 1024):
+        """
+        Initializes the cache in the given directory, creating it if needed.
+
+        Args:
+            directory (str): The directory where the cache entries are stored.
+            max_size (int): The maximum size of the cache in bytes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """
+        Returns the hash identifying some content.
+
+        Args:
+            data (bytes): The content to be hashed.
+
+        Returns:
+            str: The SHA-256 hex digest of the content.
+        """
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def hash_file(file: str) -> str:
+        """
+        Returns the hash identifying the content of a file.
+
+        Args:
+            file (str): The path to the file.
+
+        Returns:
+            str: The SHA-256 hex digest of the file bytes.
+        """
+        digest = hashlib.sha256()
+        with open(file, 'rb') as input_file:
+            for block in iter(lambda: input_file.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Builds a cache key from a content hash and the parameters used to process the content.
+
+        Args:
+            *parts: JSON serializable values identifying the entry.
+
+        Returns:
+            str: The cache key.
+        """
+        return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """
+        Returns the path of the file that stores an entry.
+
+        Args:
+            key (str): The entry key.
+
+        Returns:
+            str: The entry file path.
+        """
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[object]:
+        """
+        Returns a cached entry and marks it as recently used.
+
+        Args:
+            key (str): The entry key.
+
+        Returns:
+            object: The cached JSON value, or None if the entry is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as input_file:
+                value = json.load(input_file)
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value: object):
+        """
+        Stores an entry in the cache. The entry is written to a temporary file and atomically moved to its final
+        location, so concurrent readers and writers never see a partial entry.
+
+        Args:
+            key (str): The entry key.
+            value (object): A JSON serializable value.
+        """
+        path = self._path(key)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as output_file:
+                output_file.write(json.dumps(value).encode('utf-8'))
+            with self._lock, open(os.path.join(self.directory, self.LOCK_FILE), 'a+b') as lock_file:
+                if fcntl is not None:
+                    # Released when the lock file is closed
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    previous_size = os.path.getsize(path)
+                except OSError:
+                    previous_size = 0
+                os.replace(temp_path, path)
+                self._update_size(os.path.getsize(path) - previous_size)
+        except (Exception,):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _update_size(self, delta: int):
+        """
+        Adds the size of an entry written to the size of the cache, evicting entries if it exceeds its maximum size.
+        The size is kept in a file shared by the processes, read from the entries again if it is missing. The caller
+        holds the cache lock.
+
+        Args:
+            delta (int): The size change in bytes.
+        """
+        size_path = os.path.join(self.directory, self.SIZE_FILE)
+        try:
+            with open(size_path, 'r', encoding='utf-8') as input_file:
+                size = int(input_file.read()) + delta
+        except (OSError, ValueError):
+            size = sum(entry_size for _, entry_size, _ in self._entries())
+        if size > self.max_size:
+            size = self._evict()
+        with open(size_path, 'w', encoding='utf-8') as output_file:
+            output_file.write(str(size))
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """
+        Lists the cache entries.
+
+        Returns:
+            list[tuple[float, int, str]]: The last use time, the size in bytes and the path of each entry.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                except OSError:
+                    # Removed by another writer
+                    continue
+        return entries
+
+    def _evict(self) -> int:
+        """
+        Removes the least recently used entries until the cache fits its maximum size. The caller holds the cache
+        lock.
+
+        Returns:
+            int: The size of the cache in bytes after the eviction.
+        """
+        entries = self._entries()
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= entry_size
+        return size
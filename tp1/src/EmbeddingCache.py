@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the cache is only safe within a single process
+    fcntl = None
+
+
+class EmbeddingCache:
+    """
+    This class implements a persistent cache of text embeddings keyed by the model name and the text hash, so that a
+    text is only embedded once across uploads, sessions and processes. The embeddings are stored as float16 rows of a
+    memory-mapped file, and the text hashes are appended to a log whose line number is the row of the embedding. When
+    the cache exceeds its maximum number of entries, it is compacted keeping the most recently used half. The uses are
+    only tracked in the memory of each process, so the entries kept are the ones recently used by the compacting
+    process and the most recently added ones: across processes, the eviction is first in, first out.
+    """
+
+    DEFAULT_DIRECTORY = "resources/embeddings"
+    HASH_LENGTH = 32
+
+    def __init__(self, model_name: str, directory: str = DEFAULT_DIRECTORY, max_entries: int = 500000):
+        """
+        Initializes the cache of a model, creating its directory if needed.
+
+        Args:
+            model_name (str): The name of the embedding model.
+            directory (str): The directory where the caches of all the models are stored.
+            max_entries (int): The maximum number of cached embeddings.
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path = os.path.join(directory, hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:16])
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "model.json"), 'w', encoding='utf-8') as output_file:
+            json.dump({'model_name': model_name}, output_file)
+        self._lock_file = open(os.path.join(self.path, "lock"), 'a+b')
+        self._reset()
+
+    def _reset(self):
+        """
+        Forgets the cache state in memory, so it is read again from disk.
+        """
+        self.rows = OrderedDict()
+        self.vectors = None
+        self.dimension = None
+        self._log_offset = 0
+        self._log_inode = None
+
+    def close(self):
+        """
+        Closes the lock file and unmaps the vectors. The cache cannot be used once closed.
+        """
+        with self._lock:
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            self.vectors = None
+
+    def __del__(self):
+        """
+        Closes the cache when it is garbage collected.
+        """
+        if hasattr(self, '_lock_file'):
+            self.close()
+
+    def _lock_files(self, exclusive: bool):
+        """
+        Locks the cache files against the other processes.
+
+        Args:
+            exclusive (bool): True to lock for writing, False to lock for reading.
+        """
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _unlock_files(self):
+        """
+        Unlocks the cache files.
+        """
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """
+        Returns the hash identifying a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            str: The truncated SHA-256 hex digest of the text.
+        """
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:EmbeddingCache.HASH_LENGTH]
+
+    def _refresh(self):
+        """
+        Reads the hashes appended to the log since the last read, possibly by other processes, and maps their rows.
+        The state is read again from scratch if the cache was compacted.
+        """
+        log = os.path.join(self.path, "hashes.log")
+        try:
+            stat = os.stat(log)
+        except FileNotFoundError:
+            self._reset()
+            return
+        if stat.st_ino != self._log_inode:
+            self._reset()
+            self._log_inode = stat.st_ino
+        if self.dimension is None:
+            with open(os.path.join(self.path, "meta.json"), 'r', encoding='utf-8') as input_file:
+                self.dimension = json.load(input_file)['dimension']
+        record_size = self.HASH_LENGTH + 1
+        if stat.st_size >= self._log_offset + record_size:
+            with open(log, 'rb') as input_file:
+                input_file.seek(self._log_offset)
+                data = input_file.read((stat.st_size - self._log_offset) // record_size * record_size)
+            row = len(self.rows)
+            for start in range(0, len(data), record_size):
+                self.rows[data[start:start + self.HASH_LENGTH].decode('ascii')] = row
+                row += 1
+            self._log_offset += len(data)
+        self._map(len(self.rows))
+
+    def _map(self, rows: int):
+        """
+        Memory-maps the vectors file, growing it geometrically if it cannot hold the given number of rows.
+
+        Args:
+            rows (int): The number of rows the matrix must hold.
+        """
+        file = os.path.join(self.path, "vectors.f16")
+        row_bytes = self.dimension * np.dtype(np.float16).itemsize
+        capacity = os.path.getsize(file) // row_bytes
+        if rows > capacity:
+            if self.vectors is not None:
+                self.vectors.flush()
+            self.vectors = None
+            capacity = max(1024, 2 * rows)
+            with open(file, 'r+b') as vectors_file:
+                vectors_file.truncate(capacity * row_bytes)
+        elif self.vectors is not None and len(self.vectors) == capacity:
+            return
+        self.vectors = np.memmap(file, dtype=np.float16, mode='r+', shape=(capacity, self.dimension)) \
+            if capacity > 0 else None
+
+    def get(self, hashes: list[str]) -> dict[str, np.ndarray]:
+        """
+        Returns the cached embeddings of some texts and marks them as recently used.
+
+        Args:
+            hashes (list[str]): The text hashes.
+
+        Returns:
+            dict[str, np.ndarray]: The float32 embedding of each cached text hash.
+        """
+        with self._lock:
+            self._lock_files(False)
+            try:
+                self._refresh()
+                found = [text_hash for text_hash in dict.fromkeys(hashes) if text_hash in self.rows]
+                for text_hash in found:
+                    self.rows.move_to_end(text_hash)
+                if not found:
+                    return {}
+                vectors = np.asarray(self.vectors[[self.rows[text_hash] for text_hash in found]], dtype=np.float32)
+                return dict(zip(found, vectors))
+            finally:
+                self._unlock_files()
+
+    def put(self, hashes: list[str], embeddings: np.ndarray):
+        """
+        Appends embeddings to the cache. The vectors are written before their hashes, so an interrupted process never
+        leaves a hash without its vector.
+
+        Args:
+            hashes (list[str]): The text hashes.
+            embeddings (np.ndarray): The embedding of each text.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float16).reshape(len(hashes), -1)
+        with self._lock:
+            self._lock_files(True)
+            try:
+                if not os.path.exists(os.path.join(self.path, "hashes.log")):
+                    with open(os.path.join(self.path, "meta.json"), 'w', encoding='utf-8') as output_file:
+                        json.dump({'dimension': embeddings.shape[1]}, output_file)
+                    open(os.path.join(self.path, "vectors.f16"), 'wb').close()
+                    open(os.path.join(self.path, "hashes.log"), 'wb').close()
+                self._refresh()
+                new = {text_hash: i for i, text_hash in enumerate(hashes) if text_hash not in self.rows}
+                if not new:
+                    return
+                start = len(self.rows)
+                self._map(start + len(new))
+                self.vectors[start:start + len(new)] = embeddings[list(new.values())]
+                self.vectors.flush()
+                with open(os.path.join(self.path, "hashes.log"), 'ab') as output_file:
+                    output_file.write("".join(f"{text_hash}\n" for text_hash in new).encode('ascii'))
+                self._refresh()
+                if len(self.rows) > self.max_entries:
+                    self._compact()
+            finally:
+                self._unlock_files()
+
+    def _compact(self):
+        """
+        Rewrites the cache with the most recently used half of its entries, as far as this process knows, the uses of
+        the other processes being unknown to it. The other processes read the cache again when they see the new log.
+        """
+        keep = list(self.rows.items())[-(self.max_entries // 2):]
+        vectors = np.asarray(self.vectors[[row for _, row in keep]])
+        with open(os.path.join(self.path, "vectors.f16.tmp"), 'wb') as output_file:
+            output_file.write(vectors.tobytes())
+        with open(os.path.join(self.path, "hashes.log.tmp"), 'wb') as output_file:
+            output_file.write("".join(f"{text_hash}\n" for text_hash, _ in keep).encode('ascii'))
+        self.vectors = None
+        # The log is emptied before replacing the vectors, so an interruption leaves an empty but consistent cache
+        open(os.path.join(self.path, "hashes.log.empty"), 'wb').close()
+        os.replace(os.path.join(self.path, "hashes.log.empty"), os.path.join(self.path, "hashes.log"))
+        os.replace(os.path.join(self.path, "vectors.f16.tmp"), os.path.join(self.path, "vectors.f16"))
+        os.replace(os.path.join(self.path, "hashes.log.tmp"), os.path.join(self.path, "hashes.log"))
+        self._refresh()
+
+    def embed(self, text: list[str], encode: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        """
+        Returns the embeddings of some texts, running the model in a single batch for the texts not cached yet. The
+        embeddings computed are rounded to float16 as they are cached, so a text has the same embedding on a miss and
+        on a later hit.
+
+        Args:
+            text (list[str]): The texts.
+            encode (Callable[[list[str]], np.ndarray]): The model function embedding a list of texts.
+
+        Returns:
+            np.ndarray: The float32 embedding of each text.
+        """
+        hashes = [self.hash_text(item) for item in text]
+        found = self.get(hashes)
+        missing = {text_hash: item for text_hash, item in zip(hashes, text) if text_hash not in found}
+        self.hits += len(text) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            embeddings = np.asarray(encode(list(missing.values())), dtype=np.float16).astype(np.float32)
+            self.put(list(missing), embeddings)
+            found.update(zip(missing, embeddings))
+        return np.stack([found[text_hash] for text_hash in hashes]) if hashes else np.zeros((0, 0), np.float32)
@@ -0,0 +1,271 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from NumpyBackend import NumpyBackend
+
+
+class IvfBackend(NumpyBackend):
+    """
+    This class extends the in-process backend with an approximate inverted file (IVF) index: the vectors are clustered
+    with spherical k-means, and a query only scores the vectors of the nprobe clusters with the closest centroids. The
+    vectors, ids and metadata are stored as in NumpyBackend, and the centroids and the cluster of each row are
+    persisted next to them. Until the index holds min_train_size vectors, the queries are exact.
+    """
+
+    def __init__(self, directory: str, index_name: str, nlist: int = None, nprobe: int = 8,
+                 min_train_size: int = 4096, retrain_growth: float = 4.0):
+        """
+        Initializes the backend, loading the index and its clusters if they already exist on disk.
+
+        Args:
+            directory (str): The directory where the indexes are stored.
+            index_name (str): The index name.
+            nlist (int): The number of clusters. Defaults to 4 * sqrt(number of vectors) at training time.
+            nprobe (int): The number of clusters scored per query, trading recall for latency.
+            min_train_size (int): The number of vectors from which the clusters are trained.
+            retrain_growth (float): The growth factor of the index since the last training from which the clusters
+                are trained again, so they keep following the data distribution.
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        super().__init__(directory, index_name)
+
+    def _load(self):
+        """
+        Loads the index from disk, together with the centroids and the cluster assignments if it was trained.
+        """
+        super()._load()
+        self.centroids = None
+        self.assignments = None
+        self.trained_size = 0
+        self._lists = None
+        if self.vectors is None or not os.path.exists(os.path.join(self.path, "ivf.json")):
+            return
+        with open(os.path.join(self.path, "ivf.json"), 'r', encoding='utf-8') as input_file:
+            self.trained_size = json.load(input_file)['trained_size']
+        self.centroids = np.load(os.path.join(self.path, "centroids.npy"))
+        self._map_assignments(len(self.ids))
+        # Rows written after the last saved assignment, e.g. by an interrupted upsert, are assigned now
+        unassigned = np.flatnonzero(self.assignments[:len(self.ids)] == 0)
+        if len(unassigned) > 0:
+            self._assign_rows(unassigned)
+
+    def _map_assignments(self, rows: int):
+        """
+        Memory-maps the assignments file, growing it geometrically if it cannot hold the given number of rows. Each
+        row stores its cluster plus one, so a zero marks a row without cluster.
+
+        Args:
+            rows (int): The number of rows the assignments must hold.
+        """
+        file = os.path.join(self.path, "assignments.i32")
+        if not os.path.exists(file):
+            open(file, 'wb').close()
+        capacity = os.path.getsize(file) // np.dtype(np.int32).itemsize
+        if rows > capacity:
+            if self.assignments is not None and len(self.assignments) > 0:
+                self.assignments.flush()
+            self.assignments = None
+            capacity = max(16, 2 * rows)
+            with open(file, 'r+b') as assignments_file:
+                assignments_file.truncate(capacity * np.dtype(np.int32).itemsize)
+        elif self.assignments is not None:
+            return
+        if capacity == 0:
+            self.assignments = np.zeros(0, dtype=np.int32)
+        else:
+            self.assignments = np.memmap(file, dtype=np.int32, mode='r+', shape=(capacity,))
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 8192) -> np.ndarray:
+        """
+        Finds the closest centroid of each vector, in batches to bound the memory of the score matrix.
+
+        Args:
+            vectors (np.ndarray): The normalised vectors.
+            centroids (np.ndarray): The normalised centroids.
+            batch_size (int): The number of vectors scored together.
+
+        Returns:
+            np.ndarray: The index of the closest centroid of each vector.
+        """
+        nearest = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), batch_size):
+            nearest[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+        return nearest
+
+    @staticmethod
+    def kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+        """
+        Clusters normalised vectors with spherical k-means, reseeding the empty clusters with random vectors.
+
+        Args:
+            vectors (np.ndarray): The normalised vectors.
+            nlist (int): The number of clusters.
+            iterations (int): The number of k-means iterations.
+            seed (int): The random seed, so the training is reproducible.
+
+        Returns:
+            np.ndarray: The normalised centroids.
+        """
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            nearest = IvfBackend._nearest(vectors, centroids)
+            order = np.argsort(nearest, kind='stable')
+            clusters, starts = np.unique(nearest[order], return_index=True)
+            sums = np.add.reduceat(vectors[order], starts, axis=0)
+            empty = np.setdiff1d(np.arange(nlist), clusters)
+            centroids[clusters] = sums
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        return centroids
+
+    def train(self, sample_size: int = 256):
+        """
+        Trains the clusters on a sample of the stored vectors and assigns every row to its closest centroid.
+
+        Args:
+            sample_size (int): The number of sampled vectors per cluster.
+        """
+        with self._lock:
+            count = len(self.ids)
+            nlist = min(self.nlist or max(1, int(4 * np.sqrt(count))), count)
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(count, min(count, sample_size * nlist), replace=False))
+            self.centroids = self.kmeans(np.asarray(self.vectors[sample]), nlist)
+            self.trained_size = count
+            with tempfile.NamedTemporaryFile(dir=self.path, suffix='.tmp', delete=False) as output_file:
+                np.save(output_file, self.centroids)
+            os.replace(output_file.name, os.path.join(self.path, "centroids.npy"))
+            self._map_assignments(count)
+            self._assign_rows(np.arange(count))
+            with open(os.path.join(self.path, "ivf.json"), 'w', encoding='utf-8') as output_file:
+                json.dump({'trained_size': self.trained_size}, output_file)
+
+    def _assign_rows(self, rows: np.ndarray):
+        """
+        Assigns rows to their closest centroid, invalidating the inverted lists.
+
+        Args:
+            rows (np.ndarray): The rows to be assigned.
+        """
+        self.assignments[rows] = self._nearest(np.asarray(self.vectors[rows]), self.centroids) + 1
+        self.assignments.flush()
+        self._lists = None
+
+    def _inverted_lists(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the inverted lists, rebuilding them from the assignments after they changed.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The rows sorted by cluster, and the start of each cluster in them, with a
+            final entry for the end of the last one.
+        """
+        if self._lists is None:
+            assignments = self.assignments[:len(self.ids)] - 1
+            order = np.argsort(assignments, kind='stable')
+            offsets = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, offsets)
+        return self._lists
+
+    def upsert(self, ids: list[str], embeddings: list, metadata: list[dict]):
+        """
+        Inserts or updates vectors, assigning them to their closest centroid. The clusters are trained once the index
+        reaches min_train_size vectors, and trained again once it grew retrain_growth times since the last training.
+
+        Args:
+            ids (list[str]): The vectors ids.
+            embeddings (list): The vectors.
+            metadata (list[dict]): The metadata of each vector.
+        """
+        with self._lock:
+            super().upsert(ids, embeddings, metadata)
+            count = len(self.ids)
+            if self.centroids is None:
+                if count >= self.min_train_size:
+                    self.train()
+            elif count >= self.retrain_growth * self.trained_size:
+                self.train()
+            elif len(ids) > 0:
+                self._map_assignments(count)
+                self._assign_rows(np.unique([self.rows[record_id] for record_id in ids]))
+
+    def _move_row(self, source: int, target: int):
+        """
+        Copies the vector and the cluster of a row over another row, to fill the gap left by a deleted row.
+
+        Args:
+            source (int): The row to be copied.
+            target (int): The row to be overwritten.
+        """
+        super()._move_row(source, target)
+        if self.centroids is not None:
+            self.assignments[target] = self.assignments[source]
+
+    def _permute_rows(self, order: np.ndarray):
+        """
+        Reorders the rows together with their clusters.
+
+        Args:
+            order (np.ndarray): The old row of each new row.
+        """
+        super()._permute_rows(order)
+        if self.centroids is not None:
+            self.assignments[:len(order)] = self.assignments[order]
+            self.assignments.flush()
+            self._lists = None
+
+    def delete_ids(self, ids: list[str]):
+        """
+        Deletes vectors, clearing the clusters of the rows freed at the end of the matrix.
+
+        Args:
+            ids (list[str]): The ids of the vectors to be deleted.
+        """
+        with self._lock:
+            count = len(self.ids)
+            super().delete_ids(ids)
+            if self.centroids is not None and len(self.ids) < count:
+                self.assignments[len(self.ids):count] = 0
+                self.assignments.flush()
+                self._lists = None
+
+    def query(self, embedding: list, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the most similar vectors among the vectors of the nprobe clusters with the closest centroids, or
+        among all the vectors if the clusters are not trained yet. A query restricted to some documents scans their
+        slices exactly, as they are small compared with the index.
+
+        Args:
+            embedding (list): The query vector.
+            top_k (int): The number of vectors to retrieve.
+            documents (list[str]): The ids of the documents to search in. Defaults to all the vectors.
+
+        Returns:
+            dict: The matches, each one with its 'id', 'score' and 'metadata', sorted by decreasing score.
+        """
+        with self._lock:
+            if self.centroids is None or documents is not None:
+                return super().query(embedding, top_k, documents)
+            query = np.asarray(embedding, dtype=np.float32).ravel()
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            if top_k <= 0:
+                return {'matches': []}
+            order, offsets = self._inverted_lists()
+            nprobe = min(self.nprobe, len(self.centroids))
+            probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            candidates = np.concatenate([order[offsets[probe]:offsets[probe + 1]] for probe in probes])
+            if len(candidates) == 0:
+                return {'matches': []}
+            scores = self.vectors[candidates] @ query
+            top_k = min(top_k, len(candidates))
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return {'matches': [{'id': self.ids[candidates[i]], 'score': float(scores[i]),
+                                 'metadata': self.metadata[candidates[i]]} for i in best]}
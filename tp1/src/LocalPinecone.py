@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class LocalIndex:
+    """
+    This class emulates a Pinecone index on the local disk. Every upsert or delete is appended as a new segment file,
+    so an interrupted process never leaves a partially written index.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initializes the index, loading the segments already stored in the directory.
+
+        Args:
+            directory (str): The directory of the index.
+        """
+        self.directory = directory
+        self.records = {}
+        self._segments = 0
+        for name in sorted(os.listdir(directory)):
+            if name.startswith('segment-') and name.endswith('.json'):
+                self._load_segment(os.path.join(directory, name))
+                self._segments += 1
+
+    def _load_segment(self, path: str):
+        """
+        Applies a segment file to the records in memory.
+
+        Args:
+            path (str): The segment file path.
+        """
+        with open(path, 'r', encoding='utf-8') as input_file:
+            segment = json.load(input_file)
+        if segment['values']:
+            values = np.load(path.replace('.json', '.npy'))
+        for i, record_id in enumerate(segment['ids']):
+            if segment['values']:
+                self.records[record_id] = (values[i], segment['metadata'][i])
+            else:
+                self.records.pop(record_id, None)
+
+    def _write_segment(self, ids: list[str], values: np.ndarray = None, metadata: list[dict] = None):
+        """
+        Appends a segment file with upserted records, or with deleted ids if no values are given.
+
+        Args:
+            ids (list[str]): The record ids.
+            values (np.ndarray): The record vectors.
+            metadata (list[dict]): The record metadata.
+        """
+        name = os.path.join(self.directory, f"segment-{self._segments:08d}")
+        self._segments += 1
+        if values is not None:
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as output_file:
+                np.save(output_file, values)
+            os.replace(output_file.name, f"{name}.npy")
+        with tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False,
+                                         encoding='utf-8') as output_file:
+            json.dump({'ids': ids, 'values': values is not None, 'metadata': metadata}, output_file)
+        # The json file is written last, so a segment is only loaded once complete
+        os.replace(output_file.name, f"{name}.json")
+
+    def upsert(self, vectors: list[tuple]):
+        """
+        Inserts or updates records.
+
+        Args:
+            vectors (list[tuple]): The records as (id, values, metadata) tuples.
+        """
+        if len(vectors) == 0:
+            return
+        ids = [vector[0] for vector in vectors]
+        values = np.asarray([vector[1] for vector in vectors], dtype=np.float32)
+        metadata = [vector[2] if len(vector) > 2 else {} for vector in vectors]
+        self._write_segment(ids, values, metadata)
+        for i, record_id in enumerate(ids):
+            self.records[record_id] = (values[i], metadata[i])
+
+    def delete(self, ids: list[str]):
+        """
+        Deletes records.
+
+        Args:
+            ids (list[str]): The ids of the records to be deleted.
+        """
+        self._write_segment(list(ids))
+        for record_id in ids:
+            self.records.pop(record_id, None)
+
+    @staticmethod
+    def _matches_filter(metadata: dict, metadata_filter: dict) -> bool:
+        """
+        Checks if metadata matches a Pinecone metadata filter, supporting the equality and '$in' conditions.
+
+        Args:
+            metadata (dict): The record metadata.
+            metadata_filter (dict): The filter, with a value or a {'$eq': value} or {'$in': values} condition per key.
+
+        Returns:
+            bool: True if every condition holds.
+        """
+        for key, condition in metadata_filter.items():
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            if '$eq' in condition and metadata.get(key) != condition['$eq']:
+                return False
+            if '$in' in condition and metadata.get(key) not in condition['$in']:
+                return False
+        return True
+
+    def query(self, vector: list[float], top_k: int, filter: dict = None,  # noqa: A002 (same name as in Pinecone)
+              include_values: bool = False, include_metadata: bool = False):
+        """
+        Returns the records most similar to a vector by cosine similarity.
+
+        Args:
+            vector (list[float]): The query vector.
+            top_k (int): The number of records to return.
+            filter (dict): The metadata filter of the records, as in Pinecone.
+            include_values (bool): Whether to include the record vectors.
+            include_metadata (bool): Whether to include the record metadata.
+
+        Returns:
+            dict: The matches with their id, score and optionally their values and metadata.
+        """
+        ids = [record_id for record_id in self.records
+               if filter is None or self._matches_filter(self.records[record_id][1], filter)]
+        if len(ids) == 0:
+            return {'matches': []}
+        values = np.stack([self.records[record_id][0] for record_id in ids])
+        query = np.asarray(vector, dtype=np.float32)
+        scores = values @ query / (np.linalg.norm(values, axis=1) * np.linalg.norm(query) + 1e-12)
+        matches = []
+        for i in np.argsort(-scores)[:top_k]:
+            match = {'id': ids[i], 'score': float(scores[i])}
+            if include_values:
+                match['values'] = self.records[ids[i]][0].tolist()
+            if include_metadata:
+                match['metadata'] = self.records[ids[i]][1]
+            matches.append(match)
+        return {'matches': matches}
+
+    def fetch(self, ids: list[str]):
+        """
+        Returns records by id, with the shape of a Pinecone fetch response, ignoring the ids that do not exist.
+
+        Args:
+            ids (list[str]): The record ids.
+
+        Returns:
+            SimpleNamespace: The records, each one with its id, values and metadata, by id in its 'vectors'.
+        """
+        vectors = {record_id: SimpleNamespace(id=record_id, values=self.records[record_id][0].tolist(),
+                                              metadata=self.records[record_id][1])
+                   for record_id in ids if record_id in self.records}
+        return SimpleNamespace(vectors=vectors)
+
+    def describe_index_stats(self) -> dict:
+        """
+        Returns the index statistics.
+
+        Returns:
+            dict: The number of records in the index.
+        """
+        return {'total_vector_count': len(self.records)}
+
+    def list(self, prefix: str = None):
+        """
+        Lists the record ids starting with a prefix, as a single page with the shape of a Pinecone list page. It is
+        defined last, since its name shadows the list builtin in the annotations of the class body.
+
+        Args:
+            prefix (str): The ids prefix.
+
+        Returns:
+            Iterator[SimpleNamespace]: The pages, each one with the ids in its 'vectors'.
+        """
+        ids = [record_id for record_id in self.records if record_id.startswith(prefix or "")]
+        if ids:
+            yield SimpleNamespace(vectors=[SimpleNamespace(id=record_id) for record_id in ids])
+
+
+class LocalPinecone:
+    """
+    This class emulates the subset of the Pinecone client used by VectorDB, storing the indexes on the local disk. It
+    allows running the ingestion and the retrieval offline.
+    """
+
+    def __init__(self, directory: str = "resources/local_pinecone"):
+        """
+        Initializes the client, creating the storage directory if needed.
+
+        Args:
+            directory (str): The directory where the indexes are stored.
+        """
+        self.directory = directory
+        self._indexes = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def list_indexes(self) -> list[SimpleNamespace]:
+        """
+        Lists the existing indexes.
+
+        Returns:
+            list[SimpleNamespace]: The indexes descriptions, with their name.
+        """
+        return [SimpleNamespace(name=name) for name in sorted(os.listdir(self.directory))
+                if os.path.isdir(os.path.join(self.directory, name))]
+
+    def create_index(self, name: str, dimension: int, metric: str = "cosine", spec: object = None):
+        """
+        Creates an empty index.
+
+        Args:
+            name (str): The index name.
+            dimension (int): The vectors dimension, not enforced.
+            metric (str): The similarity metric, only cosine is supported.
+            spec (object): The Pinecone deployment spec, ignored.
+        """
+        if metric != "cosine":
+            raise ValueError(f"Unsupported metric '{metric}'")
+        os.makedirs(os.path.join(self.directory, name))
+
+    def delete_index(self, name: str):
+        """
+        Deletes an index and its data.
+
+        Args:
+            name (str): The index name.
+        """
+        self._indexes.pop(name, None)
+        shutil.rmtree(os.path.join(self.directory, name))
+
+    def Index(self, name: str) -> LocalIndex:  # noqa: N802 (same name as the Pinecone client method)
+        """
+        Returns a handle to an existing index.
+
+        Args:
+            name (str): The index name.
+
+        Returns:
+            LocalIndex: The index.
+        """
+        if name not in self._indexes:
+            self._indexes[name] = LocalIndex(os.path.join(self.directory, name))
+        return self._indexes[name]
@@ -1,87 +1,416 @@
 import ast
 import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Union
 
 import pymupdf
 from groq import Groq
 
+from ChunkCache import ChunkCache
+
 
 class TextProvider:
     """
     This class provides texts from files.
     """
 
-    def __init__(self, file: str):
+    MODEL = "llama-3.3-70b-versatile"
+    CHUNKERS = ('llm', 'llm-concurrent', 'structural')
+    BULLET_PATTERN = re.compile(r"^([•·◦▪●■►➢✓*–-]|\d{1,2}[.)])")
+    HEADING_MAX_WORDS = 8
+    # A heading span is bold or larger than the most common font size of its page by this ratio
+    HEADING_SIZE_RATIO = 1.1
+
+    def __init__(self, file: Union[str, bytes, memoryview], cache: ChunkCache = None):
         """
         Initializes the TextProvider with the given file.
 
         Args:
-            file (str): The path to the file to be processed.
+            file (Union[str, bytes, memoryview]): The path to the PDF file to be processed, or its content in memory
+                (e.g. the buffer of an uploaded file), which is read without writing it to disk.
+            cache (ChunkCache): The cache for the extracted text and chunks. Defaults to a cache in the default
+                directory.
         """
         self.file = file
-        self.client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+        self.cache = cache if cache is not None else ChunkCache()
+        self._file_hash = None
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        Returns the Groq client, creating it on first use so that the local chunker does not require an API key.
+
+        Returns:
+            Groq: The Groq client.
+        """
+        if self._client is None:
+            self._client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        """
+        Sets the client used for the LLM chunkers.
+
+        Args:
+            client: A client with the Groq chat completions interface.
+        """
+        self._client = client
+
+    def _get_file_hash(self) -> str:
+        """
+        Returns the hash of the file content, computing it only once.
+
+        Returns:
+            str: The file content hash.
+        """
+        if self._file_hash is None:
+            if isinstance(self.file, str):
+                self._file_hash = ChunkCache.hash_file(self.file)
+            else:
+                self._file_hash = ChunkCache.hash_bytes(self.file)
+        return self._file_hash
+
+    def _open(self) -> pymupdf.Document:
+        """
+        Opens the file as a PDF document, directly from memory if the file content was given.
+
+        Returns:
+            pymupdf.Document: The opened document.
+        """
+        if isinstance(self.file, str):
+            return pymupdf.open(self.file)
+        return pymupdf.open(stream=self.file, filetype="pdf")
+
+    def iter_pages(self) -> Iterator[str]:
+        """
+        Extracts clean text from the file one page at a time, so the document text is never fully materialized.
+
+        Returns:
+            Iterator[str]: The cleaned text of each page with text.
+        """
+        with self._open() as document:
+            for page in document:
+                # Remove new lines and extra spaces
+                text = " ".join(page.get_text().split())
+                if text:
+                    yield text
 
     def get_text(self) -> str:
         """
-        Extracts clean text from the file.
+        Extracts clean text from the file, or returns it from the cache if the file was already processed.
 
         Returns:
             str: The cleaned text extracted from the file.
         """
-        text = ""
-        for page in pymupdf.open(self.file):
-            text += page.get_text()
-        text = text.replace("\n", " ")
-        # Remove extra spaces
-        text = " ".join(text.split())
+        key = ChunkCache.key(self._get_file_hash(), 'text')
+        text = self.cache.get(key)
+        if text is None:
+            text = self._extract_text()
+            self.cache.put(key, text)
         return text
 
-    def get_chunks(self, chunk_max_size: int) -> list[str]:
+    def _extract_text(self) -> str:
+        """
+        Extracts clean text from the file.
+
+        Returns:
+            str: The cleaned text extracted from the file.
+        """
+        return " ".join(self.iter_pages())
+
+    def _ask_chunk(self, chunk_candidate: str, topic: str) -> Optional[tuple[str, str]]:
+        """
+        Asks the LLM for a subset of the chunk candidate with full meaning and context.
+
+        Args:
+            chunk_candidate (str): The text window to be chunked.
+            topic (str): The topic of the previous chunk, or an empty string if unknown.
+
+        Returns:
+            tuple[str, str]: The topic and the content of the chunk, or None if the LLM answer could not be parsed.
+        """
+        sys_prompt = f"""Instructions:
+        - You are a helpful assistant that receives chunks from a candidate's CV (extracted using a fixed number of words) and returns a subset of the chunk with full meaning and context.
+        - Do not modify the words int the input chunk.
+        - Anonymize the data by changing only the person's name and surname to 'the candidate'.
+        - Use the topic of the previous chunk to determine the scope of the new chunk. - Previous topic: '{topic}'
+        - Use the following format to return the text: {{'chunk': 'the chunk', 'topic': 'a topic for the chunk different from the previous one'}}"""
+        chat_completion = self.client.chat.completions.create(
+            messages=[
+                {
+                    "role": "system",
+                    "content": sys_prompt,
+                },
+                {
+                    "role": "user",
+                    "content": chunk_candidate,
+                }
+            ],
+            model=self.MODEL,
+        )
+        try:
+            result = ast.literal_eval(chat_completion.choices[0].message.content)
+            if 'topic' in result and 'chunk' in result:
+                return result.get('topic'), result.get('chunk')
+            else:
+                raise ValueError("Invalid response format")
+        except (Exception,):
+            return None
+
+    def _chunk_sequentially(self, pages: Iterable[str], chunk_max_size: int, topic: str = '') -> list[str]:
         """
-        Splits the extracted text into smaller chunks of a specified maximum size using an LLM to provide sentences with
-        full meaning and context.
+        Splits the text into chunks by asking the LLM for one chunk at a time, starting each window where the
+        previous chunk ended. The text is read incrementally, keeping in memory only the pages needed for the next
+        window.
 
         Args:
+            pages (Iterable[str]): The parts of the text to be chunked, joined by spaces.
             chunk_max_size (int): The maximum size of each text chunk.
+            topic (str): The topic of the chunk preceding the text, if any.
 
         Returns:
             list[str]: A list of text chunks.
         """
-        text = self.get_text()
         chunks = []
-        topic = ''
-        while len(text) > 0:
+        pages = iter(pages)
+        text = next(pages, '')
+        while True:
+            # Read the following pages until the window is full
+            while len(text) < chunk_max_size:
+                page = next(pages, None)
+                if page is None:
+                    break
+                text = f"{text} {page}"
+            if len(text) == 0:
+                break
             chunk_candidate = text[:chunk_max_size]
-            sys_prompt = f"""Instructions:
-            - You are a helpful assistant that receives chunks from a candidate's CV (extracted using a fixed number of words) and returns a subset of the chunk with full meaning and context.
-            - Do not modify the words int the input chunk.
-            - Anonymize the data by changing only the person's name and surname to 'the candidate'.
-            - Use the topic of the previous chunk to determine the scope of the new chunk. - Previous topic: '{topic}'
-            - Use the following format to return the text: {{'chunk': 'the chunk', 'topic': 'a topic for the chunk different from the previous one'}}"""
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": sys_prompt,
-                    },
-                    {
-                        "role": "user",
-                        "content": chunk_candidate,
-                    }
-                ],
-                model="llama-3.3-70b-versatile",
-            )
-            try:
-                result = ast.literal_eval(chat_completion.choices[0].message.content)
-                if 'topic' in result and 'chunk' in result:
-                    topic = result.get('topic')
-                    content = result.get('chunk')
-                    chunks.append(f"{{'topic': '{topic}', 'content': '{content}}}")
-                    # Approximate char count with answer len
-                    text = text[len(content):]
-                else:
-                    raise ValueError("Invalid response format")
-            except (Exception,):
+            result = self._ask_chunk(chunk_candidate, topic)
+            # An empty chunk would not move the window forward, so it is handled as a failed answer
+            if result is not None and result[1]:
+                topic, content = result
+                chunks.append(f"{{'topic': '{topic}', 'content': '{content}}}")
+                # Approximate char count with answer len
+                text = text[len(content):]
+            else:
                 # If LLM failed, we use the chunk as is
                 chunks.append(f"{{'topic': 'unknown', 'chunk': {chunk_candidate}}}")
                 text = text[chunk_max_size:]
         return chunks
+
+    def get_chunks(self, chunk_max_size: int, chunker: str = 'llm') -> list[str]:
+        """
+        Splits the extracted text into smaller chunks of a specified maximum size. The 'llm' chunker uses an LLM to
+        provide sentences with full meaning and context, the 'llm-concurrent' chunker does the same with parallel LLM
+        calls, and the 'structural' chunker splits the text locally based on the document layout. The chunks are
+        cached by file content and chunking parameters.
+
+        Args:
+            chunk_max_size (int): The maximum size of each text chunk.
+            chunker (str): The chunking mode, one of CHUNKERS.
+
+        Returns:
+            list[str]: A list of text chunks.
+        """
+        if chunker not in self.CHUNKERS:
+            raise ValueError(f"Unknown chunker '{chunker}', expected one of {self.CHUNKERS}")
+        model = None if chunker == 'structural' else self.MODEL
+        key = ChunkCache.key(self._get_file_hash(), 'chunks', chunk_max_size, chunker, model)
+        chunks = self.cache.get(key)
+        if chunks is None:
+            if chunker == 'llm':
+                chunks = self._chunk_sequentially(self.iter_pages(), chunk_max_size)
+            elif chunker == 'llm-concurrent':
+                chunks = self.get_chunks_concurrent(chunk_max_size)
+            else:
+                chunks = [f"{{'topic': '{topic}', 'content': '{content}}}"
+                          for _, _, topic, content in self.iter_structural_chunks(chunk_max_size)]
+            self.cache.put(key, chunks)
+        return chunks
+
+    @staticmethod
+    def _split_span(span: str, chunk_max_size: int) -> list[str]:
+        """
+        Splits a span of text into consecutive parts of at most chunk_max_size characters, as the sequential chunker
+        cuts its windows.
+
+        Args:
+            span (str): The text to be split.
+            chunk_max_size (int): The maximum size of each part.
+
+        Returns:
+            list[str]: The parts, a single one if the span is not longer than chunk_max_size.
+        """
+        return [span[start:start + chunk_max_size] for start in range(0, len(span), chunk_max_size)]
+
+    def get_chunks_concurrent(self, chunk_max_size: int, max_workers: int = 8, overlap: int = 64) -> list[str]:
+        """
+        Splits the extracted text into chunks like get_chunks, but sends the LLM calls in parallel.
+
+        The text is pre-split into windows of chunk_max_size characters that overlap by the given amount. Each window
+        is chunked by the LLM independently, so no previous topic is available. The answers are stitched back in
+        window order: chunks already covered by a previous one are dropped, overlaps are trimmed and the uncovered
+        text between chunks is prepended to the next one, which is split if it exceeds chunk_max_size, so the result
+        does not depend on the completion order. The text left after the last window chunk is completed sequentially.
+
+        The chunks are not those of the sequential chunker: the windows start at fixed offsets instead of where the
+        previous chunk ended, and the LLM is not given the previous topic, so the boundaries and the topics may differ.
+        The chunks still cover the whole text in order; benchmark/bench_chunking.py measures the share of the
+        sequential chunks found unchanged.
+
+        Args:
+            chunk_max_size (int): The maximum size of each text window.
+            max_workers (int): The maximum number of concurrent LLM calls.
+            overlap (int): The number of characters shared by consecutive windows.
+
+        Returns:
+            list[str]: A list of text chunks.
+        """
+        text = self.get_text()
+        if len(text) == 0:
+            return []
+        stride = max(chunk_max_size - overlap, 1)
+        starts = [0]
+        while starts[-1] + chunk_max_size < len(text):
+            starts.append(starts[-1] + stride)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda start: self._ask_chunk(text[start:start + chunk_max_size], ''), starts))
+
+        chunks = []
+        cursor = 0
+        topic = ''
+        for start, result in zip(starts, results):
+            window = text[start:start + chunk_max_size]
+            if result is None:
+                # If LLM failed, we use the uncovered part of the window as is
+                if start + len(window) > cursor:
+                    chunks.extend(f"{{'topic': 'unknown', 'chunk': {chunk_candidate}}}"
+                                  for chunk_candidate in self._split_span(text[cursor:start + len(window)],
+                                                                          chunk_max_size))
+                    cursor = start + len(window)
+                continue
+            window_topic, content = result
+            offset = window.find(content)
+            if offset >= 0:
+                end = start + offset + len(content)
+                if end <= cursor:
+                    # Already covered by a previous window
+                    continue
+                content = text[cursor:end]
+            else:
+                # Modified content (e.g. anonymized), approximate char count with answer len
+                end = min(start + len(content), len(text))
+                if end <= cursor:
+                    continue
+                if start > cursor:
+                    content = f"{text[cursor:start]} {content}"
+            topic = window_topic
+            # The uncovered text prepended to the content may exceed the maximum size
+            chunks.extend(f"{{'topic': '{topic}', 'content': '{part}}}"
+                          for part in self._split_span(content, chunk_max_size))
+            cursor = end
+        # The text left after the last chunk is chunked as a sequential run would do it
+        chunks.extend(self._chunk_sequentially([text[cursor:]], chunk_max_size, topic))
+        return chunks
+
+    def _iter_blocks(self) -> Iterator[tuple[list[list[str]], bool]]:
+        """
+        Reads the text blocks of the file in reading order, with their typography.
+
+        Returns:
+            Iterator[tuple[list[list[str]], bool]]: The words of each non-empty line of each text block, and whether
+            all the block text is bold or larger than the most common font size of its page.
+        """
+        with self._open() as document:
+            for page in document:
+                spans = {block['number']: [span for line in block['lines'] for span in line['spans']
+                                           if span['text'].strip()]
+                         for block in page.get_text("dict")['blocks'] if block['type'] == 0}
+                sizes = Counter()
+                for block_spans in spans.values():
+                    for span in block_spans:
+                        sizes[span['size']] += len(span['text'])
+                body_size = sizes.most_common(1)[0][0] if sizes else 0.0
+                for block in page.get_text("blocks"):
+                    # Skip image blocks
+                    if block[6] == 0:
+                        lines = [line.split() for line in block[4].splitlines()]
+                        lines = [line for line in lines if line]
+                        if lines:
+                            block_spans = spans.get(block[5], [])
+                            emphasized = bool(block_spans) and all(
+                                span['flags'] & pymupdf.TEXT_FONT_BOLD
+                                or span['size'] >= body_size * self.HEADING_SIZE_RATIO for span in block_spans)
+                            yield lines, emphasized
+
+    def _iter_segments(self) -> Iterator[tuple[int, int, str, bool]]:
+        """
+        Splits the file into headings, bullets and sentences. Headings are single line blocks with a few words and no
+        final punctuation, that are also bold, larger than the text of their page, or in upper or title case. Bullets
+        are lines starting with a bullet symbol or a number.
+
+        Returns:
+            Iterator[tuple[int, int, str, bool]]: The start and end offsets of each segment in the text returned by
+            get_text, the segment text and whether the segment is a heading.
+        """
+        offset = -1
+        for lines, emphasized in self._iter_blocks():
+            is_heading = (len(lines) == 1 and len(lines[0]) <= self.HEADING_MAX_WORDS
+                          and not lines[0][-1].endswith(('.', ',', ';'))
+                          and (emphasized or " ".join(lines[0]).isupper() or " ".join(lines[0]).istitle()))
+            units = []
+            for words in lines:
+                if not units or self.BULLET_PATTERN.match(words[0]):
+                    units.append(list(words))
+                else:
+                    units[-1].extend(words)
+            for unit in units:
+                sentence = []
+                for i, word in enumerate(unit):
+                    sentence.append(word)
+                    if i == len(unit) - 1 or (not is_heading and word.endswith(('.', '!', '?'))):
+                        segment = " ".join(sentence)
+                        start = offset + 1
+                        offset = start + len(segment)
+                        yield start, offset, segment, is_heading
+                        sentence = []
+
+    def iter_structural_chunks(self, chunk_max_size: int) -> Iterator[tuple[int, int, str, str]]:
+        """
+        Splits the file into chunks locally, without an LLM. Consecutive sentences and bullets are packed into chunks
+        of up to chunk_max_size characters, a heading always starts a new chunk and becomes the topic of the chunks
+        that follow it, and segments longer than chunk_max_size are split at word boundaries. The chunks are yielded
+        while the file is read.
+
+        Args:
+            chunk_max_size (int): The maximum size of each text chunk.
+
+        Returns:
+            Iterator[tuple[int, int, str, str]]: The start and end offsets of each chunk in the text returned by
+            get_text, its topic and its content.
+        """
+        topic = 'unknown'
+        chunk_start, chunk_end, chunk_segments = 0, 0, []
+        for start, end, segment, is_heading in self._iter_segments():
+            if chunk_segments and (is_heading or end - chunk_start > chunk_max_size):
+                yield chunk_start, chunk_end, topic, " ".join(chunk_segments)
+                chunk_segments = []
+            if is_heading:
+                topic = segment
+            while len(segment) > chunk_max_size:
+                cut = segment.rfind(' ', 0, chunk_max_size + 1)
+                if cut <= 0:
+                    cut = chunk_max_size
+                yield start, start + cut, topic, segment[:cut]
+                skip = 1 if segment[cut] == ' ' else 0
+                segment = segment[cut + skip:]
+                start += cut + skip
+            if not chunk_segments:
+                chunk_start = start
+            chunk_end = end
+            chunk_segments.append(segment)
+        if chunk_segments:
+            yield chunk_start, chunk_end, topic, " ".join(chunk_segments)
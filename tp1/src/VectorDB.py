@@ -1,8 +1,25 @@
+import asyncio
+import hashlib
 import os
+import threading
 
-from pinecone import Pinecone, ServerlessSpec
+from pinecone import Pinecone
 from transformers import AutoModel
 
+from AnswerCache import AnswerCache
+from BucketedEncoder import BucketedEncoder
+from ChunkCache import ChunkCache
+from DocumentStore import DocumentStore
+from EmbeddingCache import EmbeddingCache
+from EmbeddingClient import EmbeddingClient
+from IvfBackend import IvfBackend
+from KeywordIndex import KeywordIndex
+from LocalPinecone import LocalPinecone
+from NumpyBackend import NumpyBackend
+from PineconeBackend import PineconeBackend
+from QuantizedBackend import QuantizedBackend
+from VectorBackend import VectorBackend
+
 
 class VectorDB:
     """
@@ -10,69 +27,348 @@ class VectorDB:
     """
 
     INDEX_NAME = "pnl2-tp1"
+    BACKENDS = ('pinecone', 'numpy', 'ivf', 'quantized', 'local-pinecone')
+    _answers = AnswerCache()
+    _models = {}
+    _models_lock = threading.Lock()
 
-    def __init__(self, model_name: str = 'jinaai/jina-embeddings-v2-small-en'):
+    def __init__(self, model_name: str = 'jinaai/jina-embeddings-v2-small-en', cache: EmbeddingCache = None,
+                 backend: VectorBackend = None, keywords: KeywordIndex = None, store: DocumentStore = None,
+                 answers: AnswerCache = None):
         """
-        Initializes the VectorDB with a specified transformer model and Pinecone client.
+        Initializes the VectorDB with a specified transformer model and vector backend.
 
         Args:
             model_name (str): The name of the transformer model to use for embeddings.
+            cache (EmbeddingCache): The cache of the text embeddings. Defaults to the model cache in the default
+                directory.
+            backend (VectorBackend): The vector storage. Defaults to the backend selected by the VECTOR_BACKEND
+                environment variable.
+            keywords (KeywordIndex): The keyword index of the text, for the hybrid retrieval. Defaults to the index
+                in the default directory.
+            store (DocumentStore): The store of the documents text, sliced by the offsets in the vectors metadata.
+                Defaults to the store in the default directory.
+            answers (AnswerCache): The cache of the answers to the questions about the documents, invalidated when
+                a document is saved again. Defaults to the in-memory cache shared by the instances of the process, so
+                saving a document through one instance invalidates the answers cached through the others.
+        """
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache(model_name)
+        self.model = self.load_model(model_name)
+        self.encoder = self.create_encoder(self.model)
+        self.backend = backend if backend is not None else self.create_backend(self.INDEX_NAME)
+        self.keywords = keywords if keywords is not None else KeywordIndex(self.INDEX_NAME)
+        self.store = store if store is not None else DocumentStore()
+        self.answers = answers if answers is not None else VectorDB._answers
+        self.versions = {}
+
+    @classmethod
+    def load_model(cls, model_name: str):
+        """
+        Returns the embedding model: a client of the embedding server shared by the application processes if the
+        EMBEDDING_SERVER_URL environment variable is set, or else the transformer model, loaded once per process and
+        shared by all the sessions.
+
+        Args:
+            model_name (str): The name of the transformer model.
+
+        Returns:
+            object: The model, with an encode method embedding a list of texts.
+        """
+        url = os.environ.get("EMBEDDING_SERVER_URL")
+        if url:
+            return EmbeddingClient(url)
+        with cls._models_lock:
+            if model_name not in cls._models:
+                cls._models[model_name] = AutoModel.from_pretrained(model_name, trust_remote_code=True)
+            return cls._models[model_name]
+
+    @staticmethod
+    def create_encoder(model) -> BucketedEncoder:
+        """
+        Creates the encoder embedding the texts with a model in micro-batches of similar lengths, of the maximum
+        number of texts and padded tokens from the EMBEDDING_MICRO_BATCH_SIZE and EMBEDDING_MAX_BATCH_TOKENS
+        environment variables, with the number of torch threads from the EMBEDDING_THREADS environment variable.
+
+        Args:
+            model (object): The model, with an encode method embedding a list of texts.
+
+        Returns:
+            BucketedEncoder: The encoder.
+        """
+        threads = os.environ.get("EMBEDDING_THREADS")
+        return BucketedEncoder(model.encode, max_batch_size=int(os.environ.get("EMBEDDING_MICRO_BATCH_SIZE", "32")),
+                               max_batch_tokens=int(os.environ.get("EMBEDDING_MAX_BATCH_TOKENS", "16384")),
+                               threads=int(threads) if threads else None)
+
+    @classmethod
+    def create_backend(cls, index_name: str) -> VectorBackend:
+        """
+        Creates the vector backend selected by the VECTOR_BACKEND environment variable: 'pinecone' (default) for
+        Pinecone with the API key from the PINECONE_API_KEY environment variable, 'numpy' for the in-process backend
+        stored in resources/vectors, 'ivf' for the same backend with an approximate IVF index probing the number of
+        clusters from the IVF_NPROBE environment variable, 'quantized' for the same backend searching int8 codes of
+        the dimension from the QUANTIZED_DIMENSION environment variable, rescoring the number of candidates per result
+        from the QUANTIZED_RESCORE environment variable, or 'local-pinecone' for the local Pinecone stand-in.
+
+        Args:
+            index_name (str): The index name.
+
+        Returns:
+            VectorBackend: The vector backend.
         """
-        self.model = AutoModel.from_pretrained(model_name, trust_remote_code=True)
-        self.pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+        backend = os.environ.get("VECTOR_BACKEND", "pinecone")
+        if backend == 'pinecone':
+            return PineconeBackend(Pinecone(api_key=os.environ.get("PINECONE_API_KEY")), index_name)
+        elif backend == 'numpy':
+            return NumpyBackend("resources/vectors", index_name)
+        elif backend == 'ivf':
+            return IvfBackend("resources/vectors", index_name, nprobe=int(os.environ.get("IVF_NPROBE", "8")))
+        elif backend == 'quantized':
+            return QuantizedBackend("resources/vectors", index_name,
+                                    dimension=int(os.environ.get("QUANTIZED_DIMENSION", "0")) or None,
+                                    rescore=int(os.environ.get("QUANTIZED_RESCORE", "10")))
+        elif backend == 'local-pinecone':
+            return PineconeBackend(LocalPinecone(), index_name)
+        else:
+            raise ValueError(f"Unknown vector backend '{backend}', expected one of {cls.BACKENDS}")
 
     def get_embeddings(self, text: list[str]):
         """
-        Generates embeddings for a list of text strings.
+        Generates embeddings for a list of text strings. The embeddings are taken from the cache, and the model only
+        runs for the text strings not cached yet, in micro-batches of similar lengths.
 
         Args:
             text (list[str]): A list of text strings to generate embeddings for.
 
         Returns:
-            list: A list of embeddings corresponding to the input text.
+            np.ndarray: The embeddings corresponding to the input text.
         """
-        return self.model.encode(text)
+        return self.cache.embed(text, self.encoder.encode)
 
-    def save_text(self, text: list[str]):
+    @staticmethod
+    def chunk_ids(document: str, text: list[str]) -> list[str]:
         """
-        Saves text data to the vector database by creating embeddings and storing them.
+        Builds stable ids for the text chunks of a document, from the document id and the chunks content, so the same
+        chunk always has the same id.
+
+        Args:
+            document (str): The document id.
+            text (list[str]): The document text chunks.
+
+        Returns:
+            list[str]: The id of each text chunk, prefixed by the document id.
+        """
+        return [f"{document}#{hashlib.sha256(item.encode('utf-8')).hexdigest()[:16]}" for item in text]
+
+    @staticmethod
+    def chunk_metadata(document: str, ids: list[str], offsets: list[tuple[int, int]], **fields) -> dict:
+        """
+        Builds the metadata of the vectors of text chunks: the document id and the offsets of each chunk in the
+        document store, instead of the chunk text.
+
+        Args:
+            document (str): The document id.
+            ids (list[str]): The chunks ids.
+            offsets (list[tuple[int, int]]): The start and end byte offsets of each chunk in the document store.
+            **fields: The additional metadata fields, the same for every chunk.
+
+        Returns:
+            dict: The metadata of each chunk, by chunk id.
+        """
+        return {chunk_id: {"document": document, "start": start, "end": end, **fields}
+                for chunk_id, (start, end) in zip(ids, offsets)}
+
+    def save_text(self, text: list[str], document: str = "cv") -> str:
+        """
+        Saves the text chunks of a document to the vector database, replacing its previous version. The chunks are
+        identified by their content, so only the new chunks are embedded and upserted, and only the removed ones are
+        deleted, while the other documents in the index are kept. The text of the new chunks is appended to the
+        document store, and the vectors only carry its offsets.
 
         Args:
             text (list[str]): A list of text strings to save in the vector database.
+            document (str): The document id. Saving text under the same id replaces the document.
+
+        Returns:
+            str: The document version, a hash of its chunks.
+        """
+        return self.save_documents({document: text})[document]
+
+    def save_documents(self, documents: dict[str, list[str]]) -> dict[str, str]:
+        """
+        Saves the text chunks of several documents to the vector database, replacing their previous versions as
+        save_text does, and embedding the new chunks of all the documents together.
+
+        Args:
+            documents (dict[str, list[str]]): The text chunks of each document, by document id.
+
+        Returns:
+            dict[str, str]: The version of each document, a hash of its chunks.
+        """
+        exists = self.backend.exists()
+        versions = {}
+        texts = {}
+        metadata = {}
+        new_ids = []
+        removed_ids = []
+        changed = []
+        for document, text in documents.items():
+            chunks = dict(zip(self.chunk_ids(document, text), text))
+            version = ChunkCache.key(sorted(chunks))[:16]
+            versions[document] = version
+            if exists and self.versions.get(document) == version:
+                continue
+            changed.append(document)
+            texts.update(chunks)
+            saved = set(self.backend.list_ids(f"{document}#")) if exists else set()
+            # The saved chunks are only kept if their text is in the store, e.g. not if they were saved before the store
+            kept = saved if self.store.exists(document) else set()
+            dead = self.store.size(document) - self.store.encoded_size([chunks[chunk_id] for chunk_id in kept
+                                                                         if chunk_id in chunks])
+            if kept and dead > self.store.encoded_size(list(chunks.values())):
+                # The text of the removed chunks outweighs the text of the document, which is compacted by writing it
+                # again, with all its chunks upserted with their new offsets and their cached embeddings
+                kept = set()
+            ids = [chunk_id for chunk_id in chunks if chunk_id not in kept]
+            if ids:
+                new_text = [chunks[chunk_id] for chunk_id in ids]
+                offsets = self.store.append(document, new_text) if kept else self.store.write(document, new_text)
+                metadata.update(self.chunk_metadata(document, ids, offsets, version=version))
+                new_ids.extend(ids)
+            # The keyword index is completed with any chunk it misses, e.g. if it was built after the vectors
+            missing_ids = [chunk_id for chunk_id in chunks
+                           if chunk_id not in metadata and chunk_id not in self.keywords.slots]
+            if missing_ids:
+                # Their text is already in the document store at the offsets of their vectors, and only the chunks
+                # stored without offsets are appended
+                stored = {chunk_id: fields for chunk_id, fields in self.backend.fetch(missing_ids).items()
+                          if 'start' in fields and 'end' in fields}
+                metadata.update(stored)
+                missing_ids = [chunk_id for chunk_id in missing_ids if chunk_id not in stored]
+            if missing_ids:
+                offsets = self.store.append(document, [chunks[chunk_id] for chunk_id in missing_ids])
+                metadata.update(self.chunk_metadata(document, missing_ids, offsets, version=version))
+            removed_ids.extend(chunk_id for chunk_id in saved if chunk_id not in chunks)
+        if new_ids:
+            embeddings = self.get_embeddings([texts[chunk_id] for chunk_id in new_ids])
+            if not exists:
+                self.backend.create(len(embeddings[0]))
+            self.backend.upsert(new_ids, embeddings, [metadata[chunk_id] for chunk_id in new_ids])
+        self.keywords.add(list(metadata), [texts[chunk_id] for chunk_id in metadata], list(metadata.values()))
+        if removed_ids:
+            self.backend.delete_ids(removed_ids)
+            self.keywords.delete(removed_ids)
+        for document in changed:
+            self.answers.invalidate(document)
+            self.versions[document] = versions[document]
+        return versions
+
+    def documents_version(self, documents: list[str] = None) -> str:
+        """
+        Returns the version of the documents searched by a query, from the versions of the documents saved.
+
+        Args:
+            documents (list[str]): The ids of the documents searched. Defaults to all the documents.
+
+        Returns:
+            str: A hash of the documents versions.
+        """
+        if documents is None:
+            return ChunkCache.key(None, sorted(self.versions.items()))[:16]
+        documents = sorted(documents)
+        return ChunkCache.key(documents, [self.versions.get(document) for document in documents])[:16]
+
+    def cached_answer(self, question: str, documents: list[str] = None):
+        """
+        Returns the cached answer to a question similar enough to the given one, asked about the same version of the
+        documents.
+
+        Args:
+            question (str): The question.
+            documents (list[str]): The ids of the documents searched to answer the question. Defaults to all the
+                documents.
+
+        Returns:
+            Optional[str]: The cached answer, or None if the question must be answered.
+        """
+        return self.answers.get(self.get_embeddings([question])[0], self.documents_version(documents))
+
+    def cache_answer(self, question: str, answer: str, documents: list[str] = None, version: str = None):
+        """
+        Caches the answer to a question. The question embedding is taken from the embedding cache, as it was embedded
+        to retrieve the context.
+
+        Args:
+            question (str): The question.
+            answer (str): The answer.
+            documents (list[str]): The ids of the documents searched to answer the question. Defaults to all the
+                documents.
+            version (str): The version of the documents when the question was asked. Defaults to their current
+                version.
+        """
+        version = version if version is not None else self.documents_version(documents)
+        self.answers.put(self.get_embeddings([question])[0], version, answer, documents)
+
+    def hybrid_results(self, text: str, dense: dict, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Fuses the dense results of a query with the keyword results, by reciprocal rank fusion.
+
+        Args:
+            text (str): The query text.
+            dense (dict): The dense results, with the matches sorted by decreasing similarity.
+            top_k (int): The number of top similar entries to retrieve.
+            documents (list[str]): The ids of the documents searched. Defaults to all the documents.
+
+        Returns:
+            dict: The fused results, or the dense results if no keyword of the query is indexed.
+        """
+        sparse = self.keywords.query(text, len(dense['matches']), documents)
+        if not sparse['matches']:
+            return {'matches': dense['matches'][:top_k]}
+        return KeywordIndex.fuse([dense, sparse], top_k)
+
+    def get_similar_text(self, text: str, top_k: int = 5, hybrid: bool = True,
+                         documents: list[str] = None):
         """
-        embeddings = self.get_embeddings(text)
-        if self.INDEX_NAME in [index.name for index in self.pc.list_indexes()]:
-            self.pc.delete_index(self.INDEX_NAME)
-        self.pc.create_index(
-            name=self.INDEX_NAME,
-            dimension=len(embeddings[0]),
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud="aws",
-                region="us-east-1"
-            )
-        )
-        index = self.pc.Index(self.INDEX_NAME)
-        data = [(f"id-{i}", embeddings[i], {"text": text[i]}) for i in range(len(embeddings))]
-        index.upsert(vectors=data)
-
-    def get_similar_text(self, text: str, top_k: int = 5):
-        """
-        Retrieves the most similar text entries from the vector database.
+        Retrieves the most similar text entries from the vector database. With hybrid retrieval, the dense results
+        are fused with the BM25 results of the keyword index, so exact tokens such as technologies or companies are
+        not missed.
 
         Args:
             text (str): The input text to find similar entries for.
             top_k (int): The number of top similar entries to retrieve.
+            hybrid (bool): Whether to fuse the dense results with the keyword results.
+            documents (list[str]): The ids of the documents to search in, e.g. a subset of the candidates. Defaults to
+                all the documents of the index.
 
         Returns:
             dict: A dictionary containing the results of the similarity query.
         """
         embedding = self.get_embeddings([text])
-        index = self.pc.Index(self.INDEX_NAME)
-        result = index.query(
-            vector=embedding[0].tolist(),
-            top_k=top_k,
-            include_values=False,
-            include_metadata=True
-        )
-        return result
+        if not hybrid:
+            return self.backend.query(embedding[0], top_k, documents)
+        dense = self.backend.query(embedding[0], max(2 * top_k, 10), documents)
+        return self.hybrid_results(text, dense, top_k, documents)
+
+    async def aget_similar_text(self, text: str, top_k: int = 5, hybrid: bool = True,
+                                documents: list[str] = None):
+        """
+        Retrieves the most similar text entries from the vector database without blocking the event loop, so many
+        sessions can query concurrently.
+
+        Args:
+            text (str): The input text to find similar entries for.
+            top_k (int): The number of top similar entries to retrieve.
+            hybrid (bool): Whether to fuse the dense results with the keyword results.
+            documents (list[str]): The ids of the documents to search in, e.g. a subset of the candidates. Defaults to
+                all the documents of the index.
+
+        Returns:
+            dict: A dictionary containing the results of the similarity query.
+        """
+        embedding = await asyncio.to_thread(self.get_embeddings, [text])
+        if not hybrid:
+            return await self.backend.aquery(embedding[0], top_k, documents)
+        dense = await self.backend.aquery(embedding[0], max(2 * top_k, 10), documents)
+        return self.hybrid_results(text, dense, top_k, documents)
@@ -0,0 +1,45 @@
+"""
+This script runs the embedding server shared by the application processes: it loads the embedding model once and
+serves the embeddings over HTTP on localhost, or on a Unix socket, batching the concurrent requests. The application
+uses it instead of loading its own model when the EMBEDDING_SERVER_URL environment variable is set to the printed URL.
+
+Usage: python src/embedding_server.py [--port 8765] [--socket /tmp/embeddings.sock] [--max-wait-ms 3]
+"""
+
+import argparse
+
+from transformers import AutoModel
+
+from EmbeddingServer import EmbeddingServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default='jinaai/jina-embeddings-v2-small-en')
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="path of a Unix socket to listen on, instead of the host and port")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch-tokens", type=int, default=16384,
+                        help="maximum number of padded tokens embedded together")
+    parser.add_argument("--threads", type=int, help="number of torch intra-op threads")
+    args = parser.parse_args()
+
+    model = AutoModel.from_pretrained(args.model, trust_remote_code=True)
+    server = EmbeddingServer(model, args.model, host=args.host, port=args.port, socket_path=args.socket,
+                             max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000,
+                             max_batch_tokens=args.max_batch_tokens, threads=args.threads)
+    server.warm_up()
+    print(f"Serving {args.model} embeddings of dimension {server.dimension} on {server.url}")
+    print(f"Set EMBEDDING_SERVER_URL={server.url} to use it from the application")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
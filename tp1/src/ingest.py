@@ -0,0 +1,200 @@
+"""
+This script ingests CVs in bulk into the vector database used by the CV Chat Bot application. PDF parsing and chunking
+are spread over a process pool, the chunks are embedded and saved in batches, and a checkpoint manifest records the
+ingested documents, so an interrupted run resumes where it stopped. With --local, the vectors are saved in the
+in-process NumPy backend, so the ingestion can run offline.
+
+Usage: python src/ingest.py CV_DIR [CV_DIR ...] [--local resources/vectors] [--chunker structural]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from ChunkCache import ChunkCache
+from NumpyBackend import NumpyBackend
+from TextProvider import TextProvider
+from VectorDB import VectorDB
+
+
+def chunk_document(file: str, chunk_max_size: int, chunker: str) -> tuple[str, str, list[str], str]:
+    """
+    Extracts and chunks a PDF file. It runs in the worker processes.
+
+    Args:
+        file (str): The path to the PDF file.
+        chunk_max_size (int): The maximum size of each text chunk.
+        chunker (str): The TextProvider chunking mode.
+
+    Returns:
+        tuple[str, str, list[str], str]: The file path, the file content hash, the chunks and the error message if the
+        file could not be processed.
+    """
+    try:
+        return file, ChunkCache.hash_file(file), TextProvider(file).get_chunks(chunk_max_size, chunker), None
+    except (Exception,) as error:
+        return file, None, [], str(error)
+
+
+def load_manifest(path: str) -> dict:
+    """
+    Loads the checkpoint manifest, or returns an empty one if it does not exist.
+
+    Args:
+        path (str): The manifest path.
+
+    Returns:
+        dict: The manifest, with the ingested documents by path.
+    """
+    if not os.path.exists(path):
+        return {'documents': {}}
+    with open(path, 'r', encoding='utf-8') as input_file:
+        return json.load(input_file)
+
+
+def save_manifest(path: str, manifest: dict):
+    """
+    Saves the checkpoint manifest atomically, so an interruption never leaves a corrupted manifest.
+
+    Args:
+        path (str): The manifest path.
+        manifest (dict): The manifest.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False,
+                                     encoding='utf-8') as output_file:
+        json.dump(manifest, output_file, indent=1)
+    os.replace(output_file.name, path)
+
+
+def is_ingested(manifest: dict, file: str) -> bool:
+    """
+    Checks if a file was already ingested and has not changed since.
+
+    Args:
+        manifest (dict): The manifest.
+        file (str): The path to the file.
+
+    Returns:
+        bool: True if the file can be skipped.
+    """
+    entry = manifest['documents'].get(file)
+    stat = os.stat(file)
+    return entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+
+
+class Ingestion:
+    """
+    This class accumulates the chunked documents and saves them in the vector database in batches, updating the
+    manifest once all the chunks of a document are saved. The chunks of a changed document that are no longer in it
+    are deleted.
+    """
+
+    def __init__(self, vector_db: VectorDB, manifest: dict, manifest_path: str, batch_size: int):
+        """
+        Initializes the ingestion.
+
+        Args:
+            vector_db (VectorDB): The vector database.
+            manifest (dict): The checkpoint manifest.
+            manifest_path (str): The path where the manifest is saved.
+            batch_size (int): The number of chunks embedded and saved together.
+        """
+        self.vector_db = vector_db
+        self.manifest = manifest
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self.documents = []
+        self.chunks = 0
+        self.total_documents = 0
+        self.total_chunks = 0
+        self.start = time.perf_counter()
+
+    def add(self, file: str, file_hash: str, chunks: list[str]):
+        """
+        Adds a chunked document, saving the pending batch once it is full. The document id is derived from the file
+        path, so a changed file replaces its previous version.
+
+        Args:
+            file (str): The path to the file.
+            file_hash (str): The file content hash.
+            chunks (list[str]): The document chunks.
+        """
+        document = ChunkCache.key(file)[:16]
+        self.documents.append((file, file_hash, document, chunks))
+        self.chunks += len(chunks)
+        if self.chunks >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Saves the pending documents, embedding only their new chunks and deleting the chunks removed from the changed
+        documents, and records the documents in the manifest.
+        """
+        if not self.documents:
+            return
+        versions = self.vector_db.save_documents({document: chunks for _, _, document, chunks in self.documents})
+        for file, file_hash, document, chunks in self.documents:
+            stat = os.stat(file)
+            self.manifest['documents'][file] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': file_hash,
+                                                'document': document, 'version': versions[document],
+                                                'chunks': len(chunks)}
+        save_manifest(self.manifest_path, self.manifest)
+        self.total_documents += len(self.documents)
+        self.total_chunks += self.chunks
+        self.documents, self.chunks = [], 0
+        print(self.report())
+
+    def report(self) -> str:
+        """
+        Returns the ingestion progress and throughput.
+
+        Returns:
+            str: The number of ingested documents and chunks, and the documents and chunks per second.
+        """
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return (f"{self.total_documents} docs, {self.total_chunks} chunks in {elapsed:.1f} s "
+                f"({self.total_documents / elapsed:.2f} docs/s, {self.total_chunks / elapsed:.1f} chunks/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directories", nargs="+", help="directories with the PDF files, searched recursively")
+    parser.add_argument("--local", help="directory of the NumPy vector backend to save the vectors offline, "
+                                        "instead of the backend selected by VECTOR_BACKEND")
+    parser.add_argument("--chunker", choices=TextProvider.CHUNKERS, default='structural')
+    parser.add_argument("--chunk-max-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=256, help="number of chunks embedded and saved together")
+    parser.add_argument("--manifest", default="resources/ingest_manifest.json")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.manifest)
+    files = sorted({str(path) for directory in args.directories for path in Path(directory).rglob("*.pdf")})
+    pending = [file for file in files if not is_ingested(manifest, file)]
+    print(f"{len(files)} PDF files found, {len(files) - len(pending)} already ingested, {len(pending)} pending")
+
+    vector_db = VectorDB(backend=NumpyBackend(args.local, VectorDB.INDEX_NAME) if args.local else None)
+    ingestion = Ingestion(vector_db, manifest, args.manifest, args.batch_size)
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for file, file_hash, chunks, error in executor.map(chunk_document, pending, repeat(args.chunk_max_size),
+                                                           repeat(args.chunker)):
+            if error is not None:
+                failed += 1
+                print(f"Skipping {file}: {error}", file=sys.stderr)
+            else:
+                ingestion.add(file, file_hash, chunks)
+    ingestion.flush()
+    print(f"Done: {ingestion.report()}, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
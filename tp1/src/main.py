@@ -4,8 +4,6 @@ them to extract chunks of text, store the chunks in a vector database, and inter
 the uploaded CVs.
 """
 
-import os
-
 import streamlit as st
 
 from Chat import Chat
@@ -34,14 +32,11 @@ if "uploader_key" not in st.session_state:
 # Upload new CV
 uploaded_cv = st.file_uploader("Upload CV", type=["pdf"], key=st.session_state["uploader_key"])
 if uploaded_cv:
-    temp_file = "resources/temp_cv.pdf"
-    with open(temp_file, 'wb') as output_temporary_file:
-        output_temporary_file.write(uploaded_cv.read())
-    text_provider = TextProvider(temp_file)
+    # Read the CV straight from the upload buffer, without writing it to disk
+    text_provider = TextProvider(uploaded_cv.getbuffer())
     text = text_provider.get_chunks(chunk_max_size=512)
     vector_db = st.session_state.vectorDB
     vector_db.save_text(text)
-    os.remove(temp_file)
     st.session_state["uploader_key"] += 1
     message = f"File {uploaded_cv.name} uploaded"
     st.session_state.messages.append({"role": "assistant", "content": message})
@@ -57,12 +52,19 @@ if question:
     with st.chat_message("user"):
         st.markdown(question)
 
-    # Search For context
+    # Answer a question similar to one already asked about the same CVs from the cache
     vector_db = st.session_state.vectorDB
-    context = vector_db.get_similar_text(question, top_k=2)
-    chatbot = st.session_state.chatbot
-    answer = chatbot.answer(question, context)
-
+    answer = vector_db.cached_answer(question)
+    if answer is not None:
+        with st.chat_message("assistant"):
+            st.markdown(answer)
+    else:
+        # Search For context
+        version = vector_db.documents_version()
+        context = vector_db.get_similar_text(question, top_k=2)
+        chatbot = st.session_state.chatbot
+        # Render the answer as its tokens arrive, and save its full text once complete
+        with st.chat_message("assistant"):
+            answer = st.write_stream(chatbot.answer_stream(question, context))
+        vector_db.cache_answer(question, answer, version=version)
     st.session_state.messages.append({"role": "assistant", "content": answer})
-    with st.chat_message("assistant"):
-        st.markdown(answer)
@@ -0,0 +1,193 @@
+"""
+This script checks the fan-out of the AgentEnvironment graph with fake agents: the coordinator selects the three CV
+agents, each one answers after its own latency, and the LLM agent answers at once. It reports the wall-clock time of
+the question against the slowest CV agent and the sum of all of them, and checks that the graph takes the time of the
+slowest agent, and that the contexts reach the LLM agent in the order of the selected agents whatever the order the
+agents finish in.
+
+It then registers a growing number of candidates and asks a question naming none of them, and checks that the number
+of CV agents asked stays within the shortlist of the registry and that the question time stays flat.
+
+Usage: python benchmark/bench_agent_fanout.py [--latencies 0.3 0.6 0.9] [--questions 3] [--candidates 3 30 300]
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from AgentEnvironment import AgentEnvironment  # noqa: E402
+from AgentRegistry import AgentRegistry  # noqa: E402
+from AgentRouter import AgentRouter  # noqa: E402
+
+
+class FakeCoordinator:
+    """
+    This class emulates the coordinator agent, selecting the same candidates for every question.
+    """
+
+    def __init__(self, agents: list[str], latency: float = 0.0):
+        """
+        Initializes the fake coordinator.
+
+        Args:
+            agents (list[str]): The names of the candidates mentioned in every question.
+            latency (float): The seconds each answer takes.
+        """
+        self.agents = agents
+        self.latency = latency
+
+    def greetings(self):
+        return "Hello, I am a fake coordinator."
+
+    def answer(self, question: str):
+        time.sleep(self.latency)
+        return list(self.agents), question
+
+    async def aanswer(self, question: str):
+        await asyncio.sleep(self.latency)
+        return list(self.agents), question
+
+
+class FakeCVAgent:
+    """
+    This class emulates a CV agent, answering after a latency.
+    """
+
+    def __init__(self, name: str, latency: float):
+        """
+        Initializes the fake CV agent.
+
+        Args:
+            name (str): The candidate name.
+            latency (float): The seconds each answer takes.
+        """
+        self.name = name
+        self.document = name
+        self.latency = latency
+        self.questions = 0
+
+    def greetings(self):
+        return f"Hello, I am the fake CV agent of {self.name}."
+
+    def answer(self, question: str):
+        self.questions += 1
+        time.sleep(self.latency)
+        return f"{self.name} answers {question}"
+
+    async def aanswer(self, question: str):
+        self.questions += 1
+        await asyncio.sleep(self.latency)
+        return f"{self.name} answers {question}"
+
+
+class FakeLLM:
+    """
+    This class emulates the LLM agent, answering with the candidates of its context in order after a latency.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Initializes the fake LLM agent.
+
+        Args:
+            latency (float): The seconds each answer takes.
+        """
+        self.latency = latency
+
+    def greetings(self):
+        return "Hello, I am a fake LLM agent."
+
+    def answer(self, question: str, context: list[dict[str, str]]):
+        time.sleep(self.latency)
+        return ', '.join(item['candidate'] for item in context)
+
+    async def aanswer(self, question: str, context: list[dict[str, str]]):
+        await asyncio.sleep(self.latency)
+        return ', '.join(item['candidate'] for item in context)
+
+
+class FakeVectorDB:
+    """
+    This class emulates the vector database shared by the CV agents, matching the candidates in a fixed random order.
+    """
+
+    def get_similar_text(self, text: str, top_k: int = 5, documents: list[str] = None):
+        ranked = sorted(documents, key=lambda document: zlib.crc32(f"{text}{document}".encode()))
+        return {'matches': [{'metadata': {'document': document}} for document in ranked[:top_k]]}
+
+
+def fake_environment(latencies: list[float], selected: list[str], max_agents: int = 5,
+                     llm_latency: float = 0.0) -> AgentEnvironment:
+    """
+    Builds an AgentEnvironment with a registry of fake agents, without CV files.
+
+    Args:
+        latencies (list[float]): The latency of each CV agent.
+        selected (list[str]): The names of the candidates mentioned in the questions, in order.
+        max_agents (int): The maximum number of CV agents asked about a question that names no candidate.
+        llm_latency (float): The latency of the coordinator and of the LLM agent.
+
+    Returns:
+        AgentEnvironment: The environment.
+    """
+    environment = AgentEnvironment.__new__(AgentEnvironment)
+    environment.registry = AgentRegistry(FakeVectorDB(), max_agents=max_agents)
+    for index, latency in enumerate(latencies):
+        environment.registry.agents[f"candidate{index + 1}"] = FakeCVAgent(f"candidate{index + 1}", latency)
+    environment.coordinator = FakeCoordinator(selected, llm_latency)
+    # The fake agents have no profile embedding, so the router always asks the fake coordinator
+    environment.router = AgentRouter(environment.registry, environment.coordinator, shadow_rate=0.0,
+                                     log_file=os.devnull)
+    environment.llm = FakeLLM(llm_latency)
+    environment.stream = False
+    environment.graph = environment._build_graph()
+    return environment
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencies", type=float, nargs=3, default=[0.3, 0.6, 0.9])
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[3, 30, 300])
+    parser.add_argument("--max-agents", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="seconds allowed above the slowest agent")
+    args = parser.parse_args()
+
+    print(f"CV agents latencies {args.latencies} s: slowest {max(args.latencies):.2f} s, "
+          f"sum {sum(args.latencies):.2f} s")
+    print(f"{'selected agents':<36}{'wall clock (s)':>16}{'LLM context order':>40}")
+    names = [f"candidate{index + 1}" for index in range(len(args.latencies))]
+    for selected in itertools.islice(itertools.permutations(names), args.questions):
+        environment = fake_environment(args.latencies, list(selected))
+        begin = time.perf_counter()
+        result = environment.graph.invoke({"question": "Who knows Python?"})
+        elapsed = time.perf_counter() - begin
+        print(f"{', '.join(selected):<36}{elapsed:>16.2f}{result['answer']:>40}")
+        if elapsed > max(args.latencies) + args.tolerance:
+            raise AssertionError(f"The question took {elapsed:.2f} s, more than the slowest agent")
+        if result['answer'] != ', '.join(selected):
+            raise AssertionError(f"The contexts are not in the order of the selected agents: {result['answer']}")
+
+    print(f"\nQuestion naming no candidate, at most {args.max_agents} CV agents of {max(args.latencies):.2f} s each")
+    print(f"{'candidates':<12}{'agents asked':>14}{'wall clock (s)':>16}")
+    for candidates in args.candidates:
+        environment = fake_environment([max(args.latencies)] * candidates, [], args.max_agents)
+        begin = time.perf_counter()
+        result = environment.graph.invoke({"question": "Who knows Python?"})
+        elapsed = time.perf_counter() - begin
+        asked = sum(environment.registry.get(name).questions for name in environment.registry.names())
+        print(f"{candidates:<12}{asked:>14}{elapsed:>16.2f}")
+        if asked != min(candidates, args.max_agents) or len(result['agents']) != asked:
+            raise AssertionError(f"{asked} CV agents were asked, instead of the shortlist of the registry")
+        if elapsed > max(args.latencies) + args.tolerance:
+            raise AssertionError(f"The question took {elapsed:.2f} s with {candidates} candidates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+This script measures the AgentRouter against the LLM coordinator with fake candidates, embeddings and coordinator. The
+candidates have CVs of a few skills, and the questions either name candidates, ask for a skill, or ask something
+vague. Each question is routed once by calling the fake coordinator, as the
+agents graph did before, and once by the router, which logs its decisions next to the decisions of the coordinator for
+every question. It reports the fraction of the questions routed without the LLM, the mean routing time, the agreement
+with the coordinator by source, and checks that the named candidates are always found without the LLM. The agreement
+of the 'llm' source is the one of the shortlists the router rejected as not confident. A skill held by more candidates
+than the router shortlists is not confident, so the share routed without the LLM drops as the candidates outnumber the
+skills. The router thresholds can be swept with --min-similarity and --margin.
+
+Usage: python benchmark/bench_agent_routing.py [--candidates 20 200] [--questions 90] [--llm-latency 0.05]
+       [--min-similarity 0.35] [--margin 0.05]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from AgentRegistry import AgentRegistry  # noqa: E402
+from AgentRouter import AgentRouter  # noqa: E402
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elena", "Facundo", "Gabriela", "Hugo", "Ines", "Julian", "Karina",
+               "Lucas", "Maria", "Nicolas", "Olivia", "Pablo", "Romina", "Santiago", "Tomas", "Valeria"]
+LAST_NAMES = ["Acosta", "Benitez", "Castro", "Dominguez", "Espinoza", "Fernandez", "Gomez", "Herrera", "Ibarra",
+              "Juarez", "Lopez", "Medina", "Navarro", "Ortiz", "Peralta", "Quiroga", "Rios", "Sosa", "Torres", "Vega"]
+SKILLS = ["kubernetes", "terraform", "pytorch", "tensorflow", "react", "angular", "django", "flask", "spark", "kafka",
+          "airflow", "snowflake", "tableau", "golang", "rust", "scala", "kotlin", "swift", "unity", "blender",
+          "solidity", "haskell", "elixir", "erlang", "fortran", "matlab", "verilog", "ansible", "jenkins", "graphql"]
+STOPWORDS = {"who", "has", "have", "with", "what", "did", "and", "the", "a", "worked", "study", "built", "systems",
+             "production", "would", "be", "best", "for", "which", "should", "we", "seems", "most"}
+VAGUE = ["Who would be the best fit for a leadership role?", "Which candidate should we hire first?",
+         "Who seems the most motivated?"]
+
+
+def fake_embedding(text: str, dimension: int = 4096) -> np.ndarray:
+    """
+    Embeds a text as a normalized hashed bag of its words, without the stop words.
+
+    Args:
+        text (str): The text.
+        dimension (int): The embedding dimension.
+
+    Returns:
+        np.ndarray: The embedding.
+    """
+    embedding = np.zeros(dimension, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        if word in STOPWORDS:
+            continue
+        embedding[zlib.crc32(word.encode()) % dimension] += 1.0
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm > 0 else embedding
+
+
+class FakeVectorDB:
+    """
+    This class emulates the vector database shared by the CV agents, with hashed bag of words embeddings.
+    """
+
+    def get_embeddings(self, text: list[str]):
+        return np.vstack([fake_embedding(item) for item in text])
+
+    def get_similar_text(self, text: str, top_k: int = 5, documents: list[str] = None):
+        return {'matches': [{'metadata': {'document': document}} for document in documents[:top_k]]}
+
+
+class FakeCVAgent:
+    """
+    This class emulates a CV agent, with the profile embedding of a CV made of its skills.
+    """
+
+    def __init__(self, name: str, skills: list[str], vector_db: FakeVectorDB):
+        """
+        Initializes the fake CV agent.
+
+        Args:
+            name (str): The candidate name.
+            skills (list[str]): The candidate skills.
+            vector_db (FakeVectorDB): The fake vector database.
+        """
+        self.name = name
+        self.document = name.lower()
+        self.skills = skills
+        chunks = [f"Built production systems with {skill}." for skill in skills]
+        profile = vector_db.get_embeddings(chunks).mean(axis=0)
+        self.profile = profile / np.linalg.norm(profile)
+
+
+class FakeCoordinator:
+    """
+    This class emulates the LLM coordinator: after a latency, it returns the candidates named in the question, or else
+    the candidates with the skill of the question.
+    """
+
+    def __init__(self, agents: list[FakeCVAgent], latency: float):
+        """
+        Initializes the fake coordinator.
+
+        Args:
+            agents (list[FakeCVAgent]): The fake CV agents.
+            latency (float): The seconds each answer takes.
+        """
+        self.agents = agents
+        self.latency = latency
+        self.calls = 0
+
+    def greetings(self):
+        return "Hello, I am a fake coordinator."
+
+    def answer(self, question: str):
+        self.calls += 1
+        time.sleep(self.latency)
+        named = [agent.name for agent in self.agents if agent.name.lower().replace('_', ' ') in question.lower()]
+        if named:
+            return named, question
+        words = set(re.findall(r"\w+", question.lower()))
+        return [agent.name for agent in self.agents if words & set(agent.skills)], question
+
+
+def questions(agents: list[FakeCVAgent], count: int, seed: int = 0) -> list[tuple[str, str, list[str]]]:
+    """
+    Generates questions naming candidates, asking for a skill, or vague.
+
+    Args:
+        agents (list[FakeCVAgent]): The fake CV agents.
+        count (int): The number of questions.
+        seed (int): The random seed.
+
+    Returns:
+        list[tuple[str, str, list[str]]]: The kind of each question, the question, and the candidates it names.
+    """
+    rng = random.Random(seed)
+    generated = []
+    for index in range(count):
+        kind = ('named', 'skill', 'vague')[index % 3]
+        if kind == 'named':
+            named = rng.sample(agents, rng.choice([1, 2]))
+            names = [agent.name.replace('_', ' ') for agent in named]
+            generated.append((kind, f"What did {' and '.join(names)} study?", [agent.name for agent in named]))
+        elif kind == 'skill':
+            generated.append((kind, f"Who has worked with {rng.choice(rng.choice(agents).skills)}?", []))
+        else:
+            generated.append((kind, rng.choice(VAGUE), []))
+    return generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[20, 200])
+    parser.add_argument("--questions", type=int, default=90)
+    parser.add_argument("--skills", type=int, default=3, help="skills per candidate")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds of each fake coordinator call")
+    parser.add_argument("--max-agents", type=int, default=5)
+    parser.add_argument("--min-similarity", type=float, default=None, help="defaults to the router default")
+    parser.add_argument("--margin", type=float, default=None, help="defaults to the router default")
+    args = parser.parse_args()
+
+    print(f"{'candidates':<12}{'routed w/o LLM':>16}{'LLM calls':>11}{'LLM (ms)':>10}{'router (ms)':>13}"
+          f"{'agree names':>13}{'agree similarity':>18}{'agree llm':>11}")
+    rng = random.Random(0)
+    for candidates in args.candidates:
+        vector_db = FakeVectorDB()
+        registry = AgentRegistry(vector_db, max_agents=args.max_agents)
+        pairs = [(first, last) for first in FIRST_NAMES for last in LAST_NAMES]
+        for first, last in rng.sample(pairs, candidates):
+            name = f"{first}_{last}"
+            registry.agents[name] = FakeCVAgent(name, rng.sample(SKILLS, args.skills), vector_db)
+        coordinator = FakeCoordinator([registry.get(name) for name in registry.names()], args.llm_latency)
+        generated = questions([registry.get(name) for name in registry.names()], args.questions)
+
+        begin = time.perf_counter()
+        for _, question, _ in generated:
+            coordinator.answer(question)
+        llm_ms = (time.perf_counter() - begin) * 1000 / len(generated)
+
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, "decisions.jsonl")
+            router = AgentRouter(registry, coordinator, min_similarity=args.min_similarity, margin=args.margin,
+                                 shadow_rate=1.0, log_file=log_file)
+            coordinator.calls = 0
+            routed = 0
+            elapsed = 0.0
+            for kind, question, named in generated:
+                begin = time.perf_counter()
+                agents, _, source = router.route(question)
+                elapsed += time.perf_counter() - begin
+                routed += source != 'llm'
+                if kind == 'named' and (source != 'names' or agents != named):
+                    raise AssertionError(f"The candidates of '{question}' were not matched: {agents} from {source}")
+            router._shadow.shutdown(wait=True)
+            agreement = AgentRouter.agreement(log_file)
+        if coordinator.calls != len(generated) or agreement['compared'] != len(generated):
+            raise AssertionError(f"{agreement['compared']} decisions were logged next to the LLM decisions")
+        agree = {source: f"{rate:.0%}" for source, rate in agreement['by_source'].items()}
+        print(f"{candidates:<12}{routed / len(generated):>16.0%}{len(generated) - routed:>11}{llm_ms:>10.1f}"
+              f"{elapsed * 1000 / len(generated):>13.2f}{agree.get('names', '-'):>13}"
+              f"{agree.get('similarity', '-'):>18}{agree.get('llm', '-'):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+This script measures the throughput of the AgentEnvironment graph with fake agents whose LLM calls only wait, as the
+remote LLM does. Each question calls the coordinator, three CV agents concurrently and the LLM agent. It compares the
+questions answered one at a time with invoke, as the Streamlit script thread did before, with the questions awaited
+with ainvoke on a single event loop, for a growing number of questions in flight, reporting the throughput and the
+threads used. It checks that the throughput grows with the questions in flight on the single loop.
+
+Usage: python benchmark/bench_async_agents.py [--questions 64] [--in-flight 1 4 16 64] [--llm-latency 0.1]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from bench_agent_fanout import fake_environment  # noqa: E402
+
+NAMES = ["candidate1", "candidate2", "candidate3"]
+
+
+async def answer_all(environment, questions: int, in_flight: int) -> list[dict]:
+    """
+    Answers the questions on the running event loop, with at most a number of them in flight.
+
+    Args:
+        environment (AgentEnvironment): The environment with fake agents.
+        questions (int): The number of questions.
+        in_flight (int): The maximum number of questions awaited at the same time.
+
+    Returns:
+        list[dict]: The final state of each question.
+    """
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def answer(index: int):
+        async with semaphore:
+            return await environment.graph.ainvoke({"question": f"Who knows Python? ({index})"})
+
+    return await asyncio.gather(*(answer(index) for index in range(questions)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=64)
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="seconds of each fake LLM call")
+    args = parser.parse_args()
+
+    latencies = [args.llm_latency] * len(NAMES)
+    print(f"{args.questions} questions, 3 sequential LLM calls of {args.llm_latency:.2f} s per question "
+          f"(coordinator, CV agents in parallel, LLM agent)")
+    print(f"{'mode':<10}{'in flight':>11}{'questions/s':>13}{'speedup':>9}{'peak threads':>14}")
+    environment = fake_environment(latencies, NAMES, llm_latency=args.llm_latency)
+    sync_questions = max(args.questions // 8, 1)
+    begin = time.perf_counter()
+    for index in range(sync_questions):
+        result = environment.graph.invoke({"question": f"Who knows Python? ({index})"})
+        if result['answer'] != ', '.join(NAMES):
+            raise AssertionError(f"Unexpected answer: {result['answer']}")
+    baseline = sync_questions / (time.perf_counter() - begin)
+    print(f"{'invoke':<10}{1:>11}{baseline:>13.1f}{1.0:>9.1f}{'-':>14}")
+
+    previous = 0.0
+    for in_flight in args.in_flight:
+        environment = fake_environment(latencies, NAMES, llm_latency=args.llm_latency)
+        peak_threads = threading.active_count()
+        sampling = True
+
+        def sample_threads():
+            nonlocal peak_threads
+            while sampling:
+                peak_threads = max(peak_threads, threading.active_count())
+                time.sleep(0.005)
+
+        sampler = threading.Thread(target=sample_threads, daemon=True)
+        sampler.start()
+        begin = time.perf_counter()
+        results = asyncio.run(answer_all(environment, args.questions, in_flight))
+        throughput = args.questions / (time.perf_counter() - begin)
+        sampling = False
+        sampler.join()
+        # The sampler thread is not counted
+        print(f"{'ainvoke':<10}{in_flight:>11}{throughput:>13.1f}{throughput / baseline:>9.1f}{peak_threads - 1:>14}")
+        if any(result['answer'] != ', '.join(NAMES) for result in results):
+            raise AssertionError("An answer does not hold the contexts in the order of the selected agents")
+        if in_flight > 1 and throughput < previous * 1.5:
+            raise AssertionError(f"The throughput did not grow with {in_flight} questions in flight")
+        previous = throughput
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+This script runs a synthetic concurrent load of query embeddings against a fake embedding model, whose forward passes
+are serialised and cost a fixed overhead plus a time per text, as the shared transformer model does. It compares the
+sessions calling the model directly with batch size 1, as VectorDB did before, with the EmbeddingBatcher for several
+maximum wait times, reporting the throughput and the p50 and p99 latencies.
+
+Usage: python benchmark/bench_embedding_batcher.py [--sessions 32] [--requests 50] [--wait-ms 0 2 5]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from EmbeddingBatcher import EmbeddingBatcher  # noqa: E402
+
+
+class FakeModel:
+    """
+    This class emulates the embedding model: a forward pass holds the model and takes a fixed overhead plus a time
+    per text.
+    """
+
+    def __init__(self, overhead: float, per_text: float, dimension: int = 512):
+        """
+        Initializes the fake model.
+
+        Args:
+            overhead (float): The seconds of a forward pass, whatever its batch size.
+            per_text (float): The additional seconds per text of the batch.
+            dimension (int): The embeddings dimension.
+        """
+        self.overhead = overhead
+        self.per_text = per_text
+        self.dimension = dimension
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def encode(self, text: list[str]) -> np.ndarray:
+        """
+        Embeds texts into deterministic vectors after sleeping the forward pass time.
+
+        Args:
+            text (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The embedding of each text.
+        """
+        with self._lock:
+            self.calls += 1
+            time.sleep(self.overhead + self.per_text * len(text))
+        return np.asarray([np.full(self.dimension, len(item), dtype=np.float32) for item in text])
+
+
+def run_load(encode, sessions: int, requests: int) -> tuple[float, np.ndarray]:
+    """
+    Runs concurrent sessions, each one embedding its questions one after the other, and checks the results.
+
+    Args:
+        encode: The function embedding a list of texts.
+        sessions (int): The number of concurrent sessions.
+        requests (int): The number of requests per session.
+
+    Returns:
+        tuple[float, np.ndarray]: The requests per second and the latency of each request in milliseconds.
+    """
+    latencies = [[] for _ in range(sessions)]
+
+    def session(number: int):
+        for request in range(requests):
+            question = f"Question {request} of session {number}?" + "!" * number
+            begin = time.perf_counter()
+            embedding = encode([question])
+            latencies[number].append(time.perf_counter() - begin)
+            assert embedding.shape[0] == 1 and embedding[0][0] == len(question)
+
+    threads = [threading.Thread(target=session, args=(number,)) for number in range(sessions)]
+    begin = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - begin
+    return sessions * requests / elapsed, np.asarray([item for items in latencies for item in items]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--overhead-ms", type=float, default=8.0)
+    parser.add_argument("--per-text-ms", type=float, default=0.5)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[0, 2, 5])
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.requests} requests, forward pass {args.overhead_ms} ms + "
+          f"{args.per_text_ms} ms per text")
+    print(f"{'method':<24}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'forward passes':>16}{'mean batch':>12}")
+    model = FakeModel(args.overhead_ms / 1000, args.per_text_ms / 1000)
+    throughput, latencies = run_load(model.encode, args.sessions, args.requests)
+    print(f"{'direct, batch size 1':<24}{throughput:>10.0f}{np.percentile(latencies, 50):>10.1f}"
+          f"{np.percentile(latencies, 99):>10.1f}{model.calls:>16}{1.0:>12.1f}")
+    for wait_ms in args.wait_ms:
+        model = FakeModel(args.overhead_ms / 1000, args.per_text_ms / 1000)
+        batcher = EmbeddingBatcher(model.encode, max_batch_size=args.max_batch_size, max_wait=wait_ms / 1000)
+        throughput, latencies = run_load(batcher.encode, args.sessions, args.requests)
+        metrics = batcher.metrics()
+        print(f"{f'batcher, wait {wait_ms:g} ms':<24}{throughput:>10.0f}{np.percentile(latencies, 50):>10.1f}"
+              f"{np.percentile(latencies, 99):>10.1f}{model.calls:>16}{metrics['mean_batch_size']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+This script measures the shared embedding server under a synthetic concurrent load of query embeddings, with the fake
+embedding model of bench_embedding_batcher.py. It compares the sessions calling an in-process model, as each
+application worker does without the server, with the sessions calling the server over localhost and over a Unix
+socket, reporting the throughput, the p50 and p99 latencies and the number of forward passes.
+
+Usage: python benchmark/bench_embedding_server.py [--sessions 32] [--requests 50] [--wait-ms 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from bench_embedding_batcher import FakeModel, run_load  # noqa: E402
+from EmbeddingClient import EmbeddingClient  # noqa: E402
+from EmbeddingServer import EmbeddingServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--overhead-ms", type=float, default=8.0)
+    parser.add_argument("--per-text-ms", type=float, default=0.5)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.requests} requests, forward pass {args.overhead_ms} ms + "
+          f"{args.per_text_ms} ms per text")
+    print(f"{'method':<24}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'forward passes':>16}")
+    model = FakeModel(args.overhead_ms / 1000, args.per_text_ms / 1000)
+    throughput, latencies = run_load(model.encode, args.sessions, args.requests)
+    print(f"{'in-process model':<24}{throughput:>10.0f}{np.percentile(latencies, 50):>10.1f}"
+          f"{np.percentile(latencies, 99):>10.1f}{model.calls:>16}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, options in [("server, localhost", {'port': 0}),
+                              ("server, unix socket", {'socket_path': os.path.join(temp_dir, "embeddings.sock")})]:
+            model = FakeModel(args.overhead_ms / 1000, args.per_text_ms / 1000)
+            server = EmbeddingServer(model, "fake", max_batch_size=args.max_batch_size, max_wait=args.wait_ms / 1000,
+                                     **options)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            client = EmbeddingClient(server.url)
+            client.health()
+            throughput, latencies = run_load(client.encode, args.sessions, args.requests)
+            print(f"{name:<24}{throughput:>10.0f}{np.percentile(latencies, 50):>10.1f}"
+                  f"{np.percentile(latencies, 99):>10.1f}{model.calls:>16}")
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
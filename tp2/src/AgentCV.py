@@ -1,3 +1,8 @@
+import asyncio
+from typing import Union
+
+from CompletionStream import CompletionStream
+from ContextPacker import ContextPacker
 from SingletonGroq import SingletonGroq
 from TextProvider import TextProvider
 from VectorDB import VectorDB
@@ -5,37 +10,49 @@ from VectorDB import VectorDB
 
 class AgentCV:
     """
-    This class handles a single agent that answers questions based on a single CV.
+    This class handles a single agent that answers questions based on a single CV. The CVs of all the agents are
+    stored in one shared index, each one as a separate document searched on its own.
     """
+    INDEX_NAME = "cv-agents"
     AGENT_CV_PROMPT = """Instructions:
     - You are a helpful agent assistant in an agent system that analyzes chunks of texts extracted from a single candidate's CVs and returns questions' answers about the candidate to a principal agent.
     - Be helpful and answer questions concisely. If you don't know the answer, say 'I don't know'
     - Utilize the context provided for accurate and specific information.
     - Incorporate your preexisting knowledge to enhance the depth and relevance of your response."""
 
-    def __init__(self, agent_name: str, cv_file: str):
+    def __init__(self, agent_name: str, cv_file: Union[str, bytes, memoryview], chunker: str = 'llm',
+                 vector_db: VectorDB = None, packer: ContextPacker = None):
         """
         Initializes the AgentCV class by setting up the Groq client and saving the CV file to the vector database.
 
         Args:
             agent_name (str): the candidate's name.
-            cv_file (str): the path to the candidate's CV file.
+            cv_file (Union[str, bytes, memoryview]): the path to the candidate's CV file, or its content.
+            chunker (str): the TextProvider chunking mode used to split the CV.
+            vector_db (VectorDB): the vector database shared by the agents. Defaults to a new one for the shared index.
+            packer (ContextPacker): the packer of the context chunks within a token budget. Defaults to the budget of
+                the model.
         """
         self.agent_name = agent_name
-        self.vector_db = VectorDB(index_name=agent_name.lower().replace(' ', '-'))
+        self.chunker = chunker
+        self.document = agent_name.lower().replace(' ', '-')
+        self.vector_db = vector_db if vector_db is not None else VectorDB(index_name=self.INDEX_NAME)
         self.client = SingletonGroq().groq
+        self.async_client = SingletonGroq().async_groq
+        self.packer = packer if packer is not None else ContextPacker("llama-3.3-70b-versatile")
         self._save_cv(cv_file)
 
-    def _save_cv(self, cv_file: str):
+    def _save_cv(self, cv_file: Union[str, bytes, memoryview]):
         """
-        Saves the CV file to the vector database.
+        Saves the CV file to the vector database, and computes the profile embedding of the candidate from its chunks.
 
         Args:
-            cv_file (str): The path to the CV file to be saved.
+            cv_file (Union[str, bytes, memoryview]): The path to the CV file to be saved, or its content.
         """
         text_provider = TextProvider(cv_file)
-        text = text_provider.get_chunks(chunk_max_size=512)
-        self.vector_db.save_text(text)
+        text = text_provider.get_chunks(chunk_max_size=512, chunker=self.chunker)
+        self.vector_db.save_text(text, document=self.document)
+        self.profile = self.vector_db.profile_embedding(text)
 
     def greetings(self):
         """
@@ -46,33 +63,114 @@ class AgentCV:
         """
         return f"Hello, I am a CV agent. I can answer questions about the {self.agent_name}'s CV."
 
-    def answer(self, question: str):
+    def _messages(self, question: str, context: dict = None) -> list[dict[str, str]]:
         """
-        Generates an answer to a question based on the provided CV context.
+        Builds the chat messages asking a question with the context retrieved from the CV.
 
         Args:
             question (str): The question to be answered.
+            context (dict): The results of the similarity query of the question. Defaults to a new query.
 
         Returns:
-            str: The generated answer to the question.
+            list[dict[str, str]]: The system prompt with the CV context, and the question.
         """
-        context = self.vector_db.get_similar_text(question, top_k=3)
-        clean_context = '\n'.join(item['metadata']['text'] for item in context['matches'])
+        if context is None:
+            context = self.vector_db.get_similar_text(question, top_k=3, documents=[self.document])
+        # The best distinct chunks are packed within the token budget
+        texts = [self.vector_db.store.chunk_text(item['metadata']) for item in context['matches']]
+        clean_context = '\n'.join(self.packer.pack(texts, [item.get('score', 0.0) for item in context['matches']]))
         sys_prompt = f"""{self.AGENT_CV_PROMPT}
                 
         Context: 
         {clean_context}"""
+        return [
+            {
+                "role": "system",
+                "content": sys_prompt,
+            },
+            {
+                "role": "user",
+                "content": question,
+            }
+        ]
+
+    def answer(self, question: str):
+        """
+        Generates an answer to a question based on the provided CV context. The answers are cached, so a question
+        similar to one already asked about the same version of the CV is answered without the retrieval and the LLM.
+
+        Args:
+            question (str): The question to be answered.
+
+        Returns:
+            str: The generated answer to the question.
+        """
+        version = self.vector_db.documents_version([self.document])
+        answer = self.vector_db.cached_answer(question, [self.document])
+        if answer is not None:
+            return answer
         chat_completion = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": sys_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": question,
-                }
-            ],
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile",
+        )
+        answer = chat_completion.choices[0].message.content
+        self.vector_db.cache_answer(question, answer, [self.document], version)
+        return answer
+
+    def answer_stream(self, question: str) -> CompletionStream:
+        """
+        Generates an answer to a question based on the provided CV context, streamed token by token. A cached answer
+        is yielded at once.
+
+        Args:
+            question (str): The question to be answered.
+
+        Returns:
+            CompletionStream: The answer tokens as they arrive, with the full text and the usage once consumed.
+        """
+        version = self.vector_db.documents_version([self.document])
+        answer = self.vector_db.cached_answer(question, [self.document])
+        if answer is not None:
+            return CompletionStream.from_text(answer)
+        return CompletionStream(self.client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile",
+            stream=True,
+        ), lambda text: self.vector_db.cache_answer(question, text, [self.document], version))
+
+    async def _amessages(self, question: str) -> list[dict[str, str]]:
+        """
+        Builds the chat messages asking a question with the context retrieved from the CV, without blocking the event
+        loop.
+
+        Args:
+            question (str): The question to be answered.
+
+        Returns:
+            list[dict[str, str]]: The system prompt with the CV context, and the question.
+        """
+        context = await self.vector_db.aget_similar_text(question, top_k=3, documents=[self.document])
+        return self._messages(question, context)
+
+    async def aanswer(self, question: str):
+        """
+        Generates an answer to a question based on the provided CV context, with the async client. The answers are
+        cached as by answer, and the cache is read and written in a worker thread, as it embeds the question.
+
+        Args:
+            question (str): The question to be answered.
+
+        Returns:
+            str: The generated answer to the question.
+        """
+        version = self.vector_db.documents_version([self.document])
+        answer = await asyncio.to_thread(self.vector_db.cached_answer, question, [self.document])
+        if answer is not None:
+            return answer
+        chat_completion = await self.async_client.chat.completions.create(
+            messages=await self._amessages(question),
             model="llama-3.3-70b-versatile",
         )
-        return chat_completion.choices[0].message.content
+        answer = chat_completion.choices[0].message.content
+        await asyncio.to_thread(self.vector_db.cache_answer, question, answer, [self.document], version)
+        return answer
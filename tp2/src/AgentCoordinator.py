@@ -13,7 +13,7 @@ class AgentCoordinator:
     - When asking to the CV candidate's agents, tell them they should answer about the candidate they have the CV of.
     - Be concise, do not add any unnecessary text.
     - Use the following format to return the text: {{'agents': ['candidate1', 'candidate2', ...], 'agents_prompt': 'the question to be asked to the candidates' agents'}}
-    - If the question does not include the candidates names, return the name of the first candidate agent. 
+    - Return the names of the candidates mentioned in the question, as they are written. If the question does not include the candidates names, return an empty list of agents, and the candidates will be searched by their CVs.
     """
 
     def __init__(self):
@@ -21,6 +21,7 @@ class AgentCoordinator:
         Initialize the class required services.
         """
         self.client = SingletonGroq().groq
+        self.async_client = SingletonGroq().async_groq
 
     def greetings(self):
         """
@@ -32,31 +33,42 @@ class AgentCoordinator:
         return ("Hello, I am a Coordinator agent."
                 " I decide which CVs should information be retrieved from to answer the user question.")
 
-    def answer(self, question: str, agents: [str]):
+    def _messages(self, question: str) -> list[dict[str, str]]:
         """
-        Decides which agents are involved in the user question and the question to be asked to the agents.
+        Builds the chat messages asking which agents are involved in a question. The candidates names are not sent, so
+        the prompt size does not depend on the number of candidates, and the names mentioned are matched with the
+        registered candidates afterward.
 
         Args:
             question (str): The user's question.
-            agents (list): The agents name list.
+
         Returns:
-            str: The output with the agents involved and the question to be asked to the agents.
+            list[dict[str, str]]: The system prompt and the question.
+        """
+        return [
+            {
+                "role": "system",
+                "content": self.AGENT_COORDINATOR_PROMPT,
+            },
+            {
+                "role": "user",
+                "content": question,
+            }
+        ]
+
+    @staticmethod
+    def _parse(chat_completion, question: str):
+        """
+        Parses the agents involved in the question and the question to be asked to them from the chat completion.
+
+        Args:
+            chat_completion (object): The chat completion.
+            question (str): The user's question, asked to the agents if the completion is not valid.
+
+        Returns:
+            tuple[list[str], str]: The candidates names mentioned in the question, and the question to be asked to the
+            agents.
         """
-        sys_prompt = f"""{self.AGENT_COORDINATOR_PROMPT}
-        - Candidates names: {agents}"""
-        chat_completion = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": sys_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": question,
-                }
-            ],
-            model="llama-3.3-70b-versatile",
-        )
         try:
             result = ast.literal_eval(chat_completion.choices[0].message.content)
             if 'agents' in result and 'agents_prompt' in result:
@@ -66,4 +78,37 @@ class AgentCoordinator:
             else:
                 raise ValueError("Invalid response format")
         except (Exception,):
-            return [agents[0]], question
+            return [], question
+
+    def answer(self, question: str):
+        """
+        Decides which agents are involved in the user question and the question to be asked to the agents.
+
+        Args:
+            question (str): The user's question.
+        Returns:
+            tuple[list[str], str]: The candidates names mentioned in the question, and the question to be asked to the
+            agents.
+        """
+        chat_completion = self.client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile",
+        )
+        return self._parse(chat_completion, question)
+
+    async def aanswer(self, question: str):
+        """
+        Decides which agents are involved in the user question and the question to be asked to the agents, with the
+        async client, so the event loop serves other questions while the LLM answers.
+
+        Args:
+            question (str): The user's question.
+        Returns:
+            tuple[list[str], str]: The candidates names mentioned in the question, and the question to be asked to the
+            agents.
+        """
+        chat_completion = await self.async_client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile",
+        )
+        return self._parse(chat_completion, question)
@@ -1,71 +1,134 @@
-from pathlib import Path
-from typing import TypedDict
+import operator
+from typing import Annotated, TypedDict, Union
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 
 from AgentCV import AgentCV
 from AgentCoordinator import AgentCoordinator
 from AgentLLM import AgentLLM
+from AgentRegistry import AgentRegistry
+from AgentRouter import AgentRouter
+from CompletionStream import CompletionStream
+from VectorDB import VectorDB
 
 
 class AgentState(TypedDict):
     question: str
     agents: list[str]
     agents_prompt: str
-    next_agent: str
-    context: list[dict[str, str]]
+    # The CV agents run concurrently, so their contexts are merged by concatenation
+    context: Annotated[list[dict[str, str]], operator.add]
     answer: str
+    # Iterated with for when the graph is invoked, and with async for when it is awaited with ainvoke or astream
+    answer_stream: CompletionStream
     chat_history: list[dict[str, str]]
 
 
 class AgentEnvironment:
     """
     This class manages the environment for coordinating multiple agents to answer user questions based on CV data.
-    It initializes the agents, sets up a state graph, and orchestrates the flow of information between agents.
+    It initializes the agents, sets up a state graph, and orchestrates the flow of information between agents. The
+    CV agents of any number of candidates are kept in a registry, and the graph sends the question to the selected
+    ones concurrently, as a map step over a single CV agent node, so a question about several candidates takes the
+    time of the slowest CV agent instead of the sum of all of them, and candidates are added or removed without
+    rebuilding the graph or the other agents. The graph runs with invoke, or on an event loop with ainvoke and
+    astream, in which case the agents call the LLM with the async client, so one loop serves many questions at once.
     """
+    _vector_db = None
 
-    def __init__(self, cv_agent1_file, cv_agent2_file, cv_agent3_file):
+    def __init__(self, cv_files: list[Union[str, tuple[str, bytes]]] = (), chunker: str = 'llm',
+                 stream: bool = False, max_agents: int = 5):
         """
         Initializes the AgentEnvironment with the provided CV files, sets up agents, and compiles the state graph.
+        Each CV file is either a file path or a tuple with the file name and the file content in memory.
 
         Args:
-            cv_agent1_file (str): The file path for the first CV.
-            cv_agent2_file (str): The file path for the second CV.
-            cv_agent3_file (str): The file path for the third CV.
+            cv_files (list[Union[str, tuple[str, bytes]]]): The CVs of the candidates. More can be added later.
+            chunker (str): The TextProvider chunking mode used by the CV agents.
+            stream (bool): If True, the graph returns the final answer as an 'answer_stream' to be rendered as its
+                tokens arrive, instead of waiting for the full 'answer'.
+            max_agents (int): The maximum number of CV agents asked about a question that names no candidate.
         """
-        # Input data
-        self.cv_agents_details = []
-        self.cv_agents_details.append({'name': Path(cv_agent1_file).stem, 'file': cv_agent1_file})
-        self.cv_agents_details.append({'name': Path(cv_agent2_file).stem, 'file': cv_agent2_file})
-        self.cv_agents_details.append({'name': Path(cv_agent3_file).stem, 'file': cv_agent3_file})
+        self.stream = stream
 
-        # Initialize the agents
+        # Initialize the agents, sharing a single vector database so the index is created once for all the sessions
+        if AgentEnvironment._vector_db is None:
+            AgentEnvironment._vector_db = VectorDB(index_name=AgentCV.INDEX_NAME)
+        self.vector_db = AgentEnvironment._vector_db
+        self.registry = AgentRegistry(self.vector_db, chunker, max_agents)
+        for cv_file in cv_files:
+            self.registry.add(cv_file)
         self.coordinator = AgentCoordinator()
-        self.cv_agent1 = AgentCV(self.cv_agents_details[0]['name'], self.cv_agents_details[0]['file'])
-        self.cv_agent2 = AgentCV(self.cv_agents_details[1]['name'], self.cv_agents_details[1]['file'])
-        self.cv_agent3 = AgentCV(self.cv_agents_details[2]['name'], self.cv_agents_details[2]['file'])
+        self.router = AgentRouter(self.registry, self.coordinator)
         self.llm = AgentLLM()
 
         # Initialize the state graph
+        self.graph = self._build_graph()
+
+    def _build_graph(self):
+        """
+        Builds the state graph: the coordinator selects the CV agents, which are asked concurrently by the map step
+        of the selector, and the LLM agent answers from their merged contexts. The graph does not depend on the
+        candidates, which are looked up in the registry when a question is asked. The nodes calling the LLM have a
+        sync and an async variant, run by invoke and by ainvoke respectively.
+
+        Returns:
+            CompiledStateGraph: The compiled state graph.
+        """
         graph = StateGraph(AgentState)
-        graph.add_node("coordinator", self._init_and_get_required_agents)
-        graph.add_node("selector", self._get_next_agent)
-        graph.add_node(self.cv_agents_details[0]['name'], self._get_context_cv_agent1)
-        graph.add_node(self.cv_agents_details[1]['name'], self._get_context_cv_agent2)
-        graph.add_node(self.cv_agents_details[2]['name'], self._get_context_cv_agent3)
-        graph.add_node("llm", self._answer_question)
+        graph.add_node("coordinator", RunnableLambda(self._init_and_get_required_agents,
+                                                     afunc=self._ainit_and_get_required_agents))
+        graph.add_node("selector", self._get_next_agents)
+        graph.add_node("cv_agent", RunnableLambda(self._get_context_cv_agent, afunc=self._aget_context_cv_agent))
+        graph.add_node("llm", RunnableLambda(self._answer_question, afunc=self._aanswer_question))
         graph.add_edge("coordinator", "selector")
-        graph.add_conditional_edges("selector", self._select_agent)
-        graph.add_edge(self.cv_agents_details[0]['name'], "selector")
-        graph.add_edge(self.cv_agents_details[1]['name'], "selector")
-        graph.add_edge(self.cv_agents_details[2]['name'], "selector")
+        graph.add_conditional_edges("selector", self._select_agents, ["cv_agent", "llm"])
+        graph.add_edge("cv_agent", "llm")
         graph.add_edge("llm", END)
         graph.set_entry_point("coordinator")
-        self.graph = graph.compile()
+        return graph.compile()
+
+    def add_candidate(self, cv_file: Union[str, tuple[str, bytes]]) -> str:
+        """
+        Adds a candidate, or replaces the CV of a candidate already registered, without rebuilding the other agents.
+
+        Args:
+            cv_file (Union[str, tuple[str, bytes]]): The CV file path, or the CV file name and content.
+
+        Returns:
+            str: The candidate name, taken from the file name.
+        """
+        return self.registry.add(cv_file)
+
+    def remove_candidate(self, name: str):
+        """
+        Removes a candidate, so it is not asked about the next questions.
+
+        Args:
+            name (str): The candidate name.
+        """
+        self.registry.remove(name)
 
     def _init_and_get_required_agents(self, state: AgentState):
         """
-        Determines which agents are required to answer the user's question and generates the prompt for them.
+        Determines which agents are required to answer the user's question and generates the prompt for them. The
+        router matches the candidates named in the question, or else the candidates whose CVs best match the question,
+        and only calls the LLM coordinator when neither is confident.
+
+        Args:
+            state (AgentState): The current state of the environment.
+
+        Returns:
+            dict: Updated state with the required agents, their prompt, and chat history.
+        """
+        return self._required_agents_update(*self.router.route(state['question']))
+
+    async def _ainit_and_get_required_agents(self, state: AgentState):
+        """
+        Determines which agents are required to answer the user's question and generates the prompt for them, without
+        blocking the event loop.
 
         Args:
             state (AgentState): The current state of the environment.
@@ -73,121 +136,175 @@ class AgentEnvironment:
         Returns:
             dict: Updated state with the required agents, their prompt, and chat history.
         """
-        agents, prompt = self.coordinator.answer(state['question'],
-                                                 [cv_agent['name'] for cv_agent in self.cv_agents_details])
+        return self._required_agents_update(*await self.router.aroute(state['question']))
+
+    def _required_agents_update(self, agents: list[str], prompt: str, source: str):
+        """
+        Announces the agents required to answer the user's question.
+
+        Args:
+            agents (list[str]): The candidates names.
+            prompt (str): The question to be asked to their agents.
+            source (str): The source of the decision of the router.
+
+        Returns:
+            dict: Updated state with the required agents, their prompt, and chat history.
+        """
+        greetings = self.coordinator.greetings() if source == 'llm' else self.router.greetings()
         agent_answer = {"role": "coordinator",
-                        "content": f"{self.coordinator.greetings()}"
+                        "content": f"{greetings}"
                                    f" We need to ask the agents: {agents} about the question: {prompt}"}
         print(agent_answer)
         chat_history = [agent_answer]
         return {'agents': agents, 'agents_prompt': prompt, 'context': [], 'chat_history': chat_history}
 
-    def _get_next_agent(self, state: AgentState):
+    def _get_next_agents(self, state: AgentState):
         """
-        Selects the next agent to process the user's question.
+        Announces the CV agents asked about the user's question.
 
         Args:
             state (AgentState): The current state of the environment.
 
         Returns:
-            dict: Updated state with the next agent and chat history.
+            dict: Updated state with chat history.
         """
-        agents = state['agents']
-        if len(agents) > 0:
-            next_agent = agents.pop(0)
-        else:
-            next_agent = "llm"
+        next_agents = ', '.join(state['agents']) if state['agents'] else "llm"
         agent_answer = {"role": "selector",
-                        "content": "Hello I am the selector agent. I decide which CV agent should be asked next."
-                                   f" Next agent is {next_agent}"}
+                        "content": "Hello I am the selector agent. I decide which CV agents should be asked, all of"
+                                   f" them at the same time. Next agents are {next_agents}"}
         print(agent_answer)
         chat_history = state['chat_history']
         chat_history.append(agent_answer)
-        return {"agents": agents, "next_agent": next_agent, 'chat_history': chat_history}
+        return {'chat_history': chat_history}
 
-    def _select_agent(self, state: AgentState):
+    def _select_agents(self, state: AgentState):
         """
-        Return the next agent.
+        Return the next agents: a branch of the CV agent node per selected candidate, run concurrently.
 
         Args:
             state (AgentState): The current state of the environment.
 
         Returns:
-            str: The name of the next agent.
+            Union[list[Send], str]: The CV agent branches, or the LLM agent if no candidate is selected.
         """
-        return state['next_agent']
+        if not state['agents']:
+            return "llm"
+        return [Send("cv_agent", {'candidate': name, 'position': position, 'agents_prompt': state['agents_prompt']})
+                for position, name in enumerate(state['agents'])]
 
-    def _get_context_cv_agent1(self, state: AgentState):
+    def _get_context_cv_agent(self, state: dict):
         """
-        Retrieves context from the first CV agent based on the provided prompt.
+        Retrieves context from the CV agent of a candidate based on the provided prompt. The agents run concurrently,
+        so the context only holds their own answer, merged with the others by the state graph, and the chat history is
+        completed by the LLM agent.
 
         Args:
-            state (AgentState): The current state of the environment.
+            state (dict): The branch state: the 'candidate' name, its 'position' in the selected agents and the
+                'agents_prompt'.
 
         Returns:
-            dict: Updated state with the context from the first CV agent and chat history.
+            dict: Updated state with the context from the CV agent.
         """
-        answer = self.cv_agent1.answer(state['agents_prompt'])
-        context = state['context']
-        context.append({'candidate': self.cv_agents_details[0]['name'], 'context': answer})
-        agent_answer = {"role": "agent1", "content": f"{self.cv_agent1.greetings()} {answer}"}
-        print(agent_answer)
-        chat_history = state['chat_history']
-        chat_history.append(agent_answer)
-        return {"context": context, "chat_history": chat_history}
+        cv_agent = self.registry.get(state['candidate'])
+        return self._context_update(state, cv_agent, cv_agent.answer(state['agents_prompt']))
 
-    def _get_context_cv_agent2(self, state: AgentState):
+    async def _aget_context_cv_agent(self, state: dict):
         """
-        Retrieves context from the second CV agent based on the provided prompt.
+        Retrieves context from the CV agent of a candidate based on the provided prompt, without blocking the event
+        loop, so the selected agents wait for the LLM together on the same loop.
 
         Args:
-            state (AgentState): The current state of the environment.
+            state (dict): The branch state: the 'candidate' name, its 'position' in the selected agents and the
+                'agents_prompt'.
+
+        Returns:
+            dict: Updated state with the context from the CV agent.
+        """
+        cv_agent = self.registry.get(state['candidate'])
+        return self._context_update(state, cv_agent, await cv_agent.aanswer(state['agents_prompt']))
+
+    @staticmethod
+    def _context_update(state: dict, cv_agent: AgentCV, answer: str):
+        """
+        Builds the context of a CV agent answer.
+
+        Args:
+            state (dict): The branch state.
+            cv_agent (AgentCV): The CV agent.
+            answer (str): The answer of the CV agent.
 
         Returns:
-            dict: Updated state with the context from the second CV agent and chat history.
+            dict: Updated state with the context from the CV agent.
         """
-        answer = self.cv_agent2.answer(state['agents_prompt'])
-        context = state['context']
-        context.append({'candidate': self.cv_agents_details[1]['name'], 'context': answer})
-        agent_answer = {"role": "agent2", "content": f"{self.cv_agent2.greetings()} {answer}"}
+        agent_answer = {"role": f"agent{state['position'] + 1}", "content": f"{cv_agent.greetings()} {answer}"}
         print(agent_answer)
-        chat_history = state['chat_history']
-        chat_history.append(agent_answer)
-        return {"context": context, "chat_history": chat_history}
+        return {"context": [{'candidate': state['candidate'], 'context': answer, 'message': agent_answer}]}
 
-    def _get_context_cv_agent3(self, state: AgentState):
+    @staticmethod
+    def _merge_context(state: AgentState):
         """
-        Retrieves context from the third CV agent based on the provided prompt.
+        Merges the contexts of the CV agents in the order of the agents, and adds their answers to the chat history.
 
         Args:
             state (AgentState): The current state of the environment.
 
         Returns:
-            dict: Updated state with the context from the third CV agent and chat history.
+            tuple[list[dict[str, str]], list[dict[str, str]]]: The chat history, and the context of each candidate.
         """
-        answer = self.cv_agent3.answer(state['agents_prompt'])
-        context = state['context']
-        context.append({'candidate': self.cv_agents_details[2]['name'], 'context': answer})
-        agent_answer = {"role": "agent3", "content": f"{self.cv_agent3.greetings()} {answer}"}
-        print(agent_answer)
+        # The contexts arrive in the order the CV agents finished, so they are sorted in the order of the agents
+        order = {name: position for position, name in enumerate(state['agents'])}
+        answers = sorted(state['context'], key=lambda item: order.get(item['candidate'], len(order)))
         chat_history = state['chat_history']
-        chat_history.append(agent_answer)
-        return {"context": context, "chat_history": chat_history}
+        chat_history.extend(item['message'] for item in answers)
+        context = [{'candidate': item['candidate'], 'context': item['context']} for item in answers]
+        return chat_history, context
 
-    def _answer_question(self, state: AgentState):
+    def _answer_update(self, chat_history: list[dict[str, str]], answer: str):
         """
-        Generates the final answer to the user's question using the principal LLM agent.
+        Adds the final answer to the chat history.
 
         Args:
-            state (AgentState): The current state of the environment.
+            chat_history (list[dict[str, str]]): The chat history.
+            answer (str): The final answer.
 
         Returns:
             dict: Updated state with the final answer and chat history.
         """
-        context = state['context']
-        answer = self.llm.answer(state['question'], context)
         agent_answer = {"role": "llm", "content": f"{self.llm.greetings()} {answer}"}
         print(agent_answer)
-        chat_history = state['chat_history']
         chat_history.append(agent_answer)
         return {"answer": answer, "chat_history": chat_history}
+
+    def _answer_question(self, state: AgentState):
+        """
+        Generates the final answer to the user's question using the principal LLM agent.
+
+        Args:
+            state (AgentState): The current state of the environment.
+
+        Returns:
+            dict: Updated state with the final answer, or its stream, and chat history.
+        """
+        chat_history, context = self._merge_context(state)
+        if self.stream:
+            # The caller renders the answer as it arrives, and adds it to the chat history once complete
+            return {"answer_stream": self.llm.answer_stream(state['question'], context),
+                    "chat_history": chat_history}
+        return self._answer_update(chat_history, self.llm.answer(state['question'], context))
+
+    async def _aanswer_question(self, state: AgentState):
+        """
+        Generates the final answer to the user's question using the principal LLM agent, without blocking the event
+        loop. In stream mode, the answer stream is iterated with async for.
+
+        Args:
+            state (AgentState): The current state of the environment.
+
+        Returns:
+            dict: Updated state with the final answer, or its stream, and chat history.
+        """
+        chat_history, context = self._merge_context(state)
+        if self.stream:
+            return {"answer_stream": await self.llm.aanswer_stream(state['question'], context),
+                    "chat_history": chat_history}
+        return self._answer_update(chat_history, await self.llm.aanswer(state['question'], context))
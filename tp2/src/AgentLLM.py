@@ -1,3 +1,5 @@
+from CompletionStream import CompletionStream
+from ContextPacker import ContextPacker
 from SingletonGroq import SingletonGroq
 
 
@@ -11,11 +13,17 @@ class AgentLLM:
     - Utilize the other CVs' agents context provided for accurate and specific information.
     - Incorporate your preexisting knowledge to enhance the depth and relevance of your response."""
 
-    def __init__(self):
+    def __init__(self, packer: ContextPacker = None):
         """
         Initialize the class required services.
+
+        Args:
+            packer (ContextPacker): The packer of the CV agents answers within a token budget. Defaults to the budget
+                of the model.
         """
         self.client = SingletonGroq().groq
+        self.async_client = SingletonGroq().async_groq
+        self.packer = packer if packer is not None else ContextPacker("llama-3.3-70b-versatile")
 
     def greetings(self):
         """
@@ -27,32 +35,130 @@ class AgentLLM:
         return ("Hello, I am a principal LLM agent. I can answer questions about multiple candidates CVs,"
                 " based on the answers retrieved from different CV agents.")
 
-    def answer(self, question: str, context: {}):
+    def _pack_context(self, context: list[dict[str, str]], separator: str = '\n\n') -> str:
         """
-        Generates an answer to a user's question based on the provided context.
+        Writes the answers of the CV agents as text within the token budget. Each candidate gets a share of the budget,
+        the budget left by the shorter answers going to the longer ones, and an answer longer than its share is
+        truncated. The answers are never deduplicated against each other, so every selected candidate is in the
+        context, even with the same answer as another one.
+
+        Args:
+            context (list[dict[str, str]]): The answer of each CV agent, with its 'candidate' and its 'context'.
+            separator (str): The text joining the answers, counted in the budget.
+
+        Returns:
+            str: The answers, each one after the name of its candidate, in the order of the CV agents.
+        """
+        headers = [f"{item['candidate']}:\n" for item in context]
+        answers = [str(item['context']).strip() for item in context]
+        tokens = [self.packer.count_tokens(header + answer) for header, answer in zip(headers, answers)]
+        budget = self.packer.max_tokens - self.packer.count_tokens(separator) * max(len(context) - 1, 0)
+        texts = [''] * len(context)
+        for packed, index in enumerate(sorted(range(len(context)), key=lambda i: tokens[i])):
+            share = max(budget // (len(context) - packed), 0)
+            if tokens[index] <= share:
+                texts[index] = headers[index] + answers[index]
+            else:
+                # The name of the candidate is always kept, only its answer is truncated
+                answer_share = share - self.packer.count_tokens(headers[index])
+                texts[index] = headers[index] + (self.packer.truncate(answers[index], answer_share)
+                                                 if answer_share > 0 else '')
+            budget -= min(tokens[index], share)
+        return separator.join(texts)
+
+    def _messages(self, question: str, context: {}) -> list[dict[str, str]]:
+        """
+        Builds the chat messages asking a user's question with the provided context.
 
         Args:
             question (str): The user's question to be answered.
-            context (dict): A dictionary containing context information.
+            context (list[dict[str, str]]): The answer of each CV agent, with its 'candidate' and its 'context'.
 
         Returns:
-            str: The generated answer to the question.
+            list[dict[str, str]]: The system prompt with the context, and the question.
         """
+        clean_context = self._pack_context(context)
         sys_prompt = f"""{self.AGENT_LLM_PROMPT}
                 
         Context: 
-        {context}"""
+        {clean_context}"""
+        return [
+            {
+                "role": "system",
+                "content": sys_prompt,
+            },
+            {
+                "role": "user",
+                "content": question,
+            }
+        ]
+
+    def answer(self, question: str, context: {}):
+        """
+        Generates an answer to a user's question based on the provided context.
+
+        Args:
+            question (str): The user's question to be answered.
+            context (list[dict[str, str]]): The answer of each CV agent, with its 'candidate' and its 'context'.
+
+        Returns:
+            str: The generated answer to the question.
+        """
         chat_completion = self.client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": sys_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": question,
-                }
-            ],
+            messages=self._messages(question, context),
             model="llama-3.3-70b-versatile",
         )
         return chat_completion.choices[0].message.content
+
+    def answer_stream(self, question: str, context: {}) -> CompletionStream:
+        """
+        Generates an answer to a user's question based on the provided context, streamed token by token.
+
+        Args:
+            question (str): The user's question to be answered.
+            context (list[dict[str, str]]): The answer of each CV agent, with its 'candidate' and its 'context'.
+
+        Returns:
+            CompletionStream: The answer tokens as they arrive, with the full text and the usage once consumed.
+        """
+        return CompletionStream(self.client.chat.completions.create(
+            messages=self._messages(question, context),
+            model="llama-3.3-70b-versatile",
+            stream=True,
+        ))
+
+    async def aanswer(self, question: str, context: {}):
+        """
+        Generates an answer to a user's question based on the provided context, with the async client.
+
+        Args:
+            question (str): The user's question to be answered.
+            context (list[dict[str, str]]): The answer of each CV agent, with its 'candidate' and its 'context'.
+
+        Returns:
+            str: The generated answer to the question.
+        """
+        chat_completion = await self.async_client.chat.completions.create(
+            messages=self._messages(question, context),
+            model="llama-3.3-70b-versatile",
+        )
+        return chat_completion.choices[0].message.content
+
+    async def aanswer_stream(self, question: str, context: {}) -> CompletionStream:
+        """
+        Generates an answer to a user's question based on the provided context, streamed token by token by the async
+        client.
+
+        Args:
+            question (str): The user's question to be answered.
+            context (list[dict[str, str]]): The answer of each CV agent, with its 'candidate' and its 'context'.
+
+        Returns:
+            CompletionStream: The answer tokens as they arrive, iterated with async for, with the full text and the
+            usage once consumed.
+        """
+        return CompletionStream(await self.async_client.chat.completions.create(
+            messages=self._messages(question, context),
+            model="llama-3.3-70b-versatile",
+            stream=True,
+        ))
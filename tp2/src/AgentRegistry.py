@@ -0,0 +1,182 @@
+import difflib
+import re
+from pathlib import Path
+from typing import Union
+
+from AgentCV import AgentCV
+from VectorDB import VectorDB
+
+
+class AgentRegistry:
+    """
+    This class keeps the CV agents of any number of candidates, by candidate name. Candidates are added and removed
+    at runtime without touching the agents of the others, and all the agents share one vector database. For a question
+    that names no candidate, the registry shortlists the candidates whose CVs are the most similar to it, so the number
+    of CV agents asked per question stays bounded whatever the number of candidates.
+    """
+
+    def __init__(self, vector_db: VectorDB = None, chunker: str = 'llm', max_agents: int = 5):
+        """
+        Initializes an empty registry.
+
+        Args:
+            vector_db (VectorDB): The vector database shared by the agents. Defaults to a new one for the shared index.
+            chunker (str): The TextProvider chunking mode used by the CV agents.
+            max_agents (int): The maximum number of CV agents asked about a question that names no candidate.
+        """
+        self.vector_db = vector_db if vector_db is not None else VectorDB(index_name=AgentCV.INDEX_NAME)
+        self.chunker = chunker
+        self.max_agents = max_agents
+        self.agents = {}
+
+    @staticmethod
+    def get_cv_details(cv_file: Union[str, tuple[str, bytes]]) -> dict:
+        """
+        Returns the candidate name and the file to be read for a CV.
+
+        Args:
+            cv_file (Union[str, tuple[str, bytes]]): The CV file path, or the CV file name and content.
+
+        Returns:
+            dict: The candidate name, taken from the file name, and the file path or content.
+        """
+        if isinstance(cv_file, str):
+            return {'name': Path(cv_file).stem, 'file': cv_file}
+        file_name, content = cv_file
+        return {'name': Path(file_name).stem, 'file': content}
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """
+        Normalizes a candidate name for comparisons, ignoring the case and the separators.
+
+        Args:
+            name (str): The candidate name.
+
+        Returns:
+            str: The normalized name.
+        """
+        return ' '.join(re.findall(r"\w+", name.lower().replace('_', ' ')))
+
+    def add(self, cv_file: Union[str, tuple[str, bytes]]) -> str:
+        """
+        Adds a candidate, saving its CV to the vector database. A candidate already registered is replaced, and only
+        the changed chunks of its CV are saved again.
+
+        Args:
+            cv_file (Union[str, tuple[str, bytes]]): The CV file path, or the CV file name and content.
+
+        Returns:
+            str: The candidate name.
+        """
+        details = self.get_cv_details(cv_file)
+        self.agents[details['name']] = AgentCV(details['name'], details['file'], self.chunker, self.vector_db)
+        return details['name']
+
+    def remove(self, name: str, delete_cv: bool = False):
+        """
+        Removes a candidate, ignoring a candidate that is not registered.
+
+        Args:
+            name (str): The candidate name.
+            delete_cv (bool): Whether to delete the CV from the vector database too, which is shared by the sessions.
+        """
+        agent = self.agents.pop(name, None)
+        if agent is not None and delete_cv:
+            self.vector_db.delete_document(agent.document)
+
+    def get(self, name: str) -> AgentCV:
+        """
+        Returns the CV agent of a candidate.
+
+        Args:
+            name (str): The candidate name.
+
+        Returns:
+            AgentCV: The CV agent.
+        """
+        return self.agents[name]
+
+    def names(self) -> list[str]:
+        """
+        Returns the names of the candidates, in the order they were added.
+
+        Returns:
+            list[str]: The candidates names.
+        """
+        return list(self.agents)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of candidates.
+
+        Returns:
+            int: The number of candidates.
+        """
+        return len(self.agents)
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Checks if a candidate is registered.
+
+        Args:
+            name (str): The candidate name.
+
+        Returns:
+            bool: True if the candidate is registered.
+        """
+        return name in self.agents
+
+    def resolve(self, names: list[str]) -> list[str]:
+        """
+        Maps the candidate names mentioned in a question to the registered candidates: by their normalized name, by
+        the only candidate whose name contains all the words of a partial name, e.g. a first name, or by the closest
+        name, e.g. with a typo.
+
+        Args:
+            names (list[str]): The candidate names, as written in the question.
+
+        Returns:
+            list[str]: The registered names, without duplicates, in the order of the given names.
+        """
+        keys = {self.normalize_name(name): name for name in self.agents}
+        resolved = []
+        for name in names:
+            key = self.normalize_name(name)
+            candidate = keys.get(key)
+            if candidate is None and key:
+                words = set(key.split())
+                partial = [keys[other] for other in keys if words <= set(other.split())]
+                if len(partial) == 1:
+                    candidate = partial[0]
+                else:
+                    close = difflib.get_close_matches(key, list(keys), n=1, cutoff=0.8)
+                    candidate = keys[close[0]] if close else None
+            if candidate is not None and candidate not in resolved:
+                resolved.append(candidate)
+        return resolved
+
+    def shortlist(self, question: str) -> list[str]:
+        """
+        Selects the candidates whose CVs best match a question, with a single query of the shared index restricted to
+        the registered candidates.
+
+        Args:
+            question (str): The question.
+
+        Returns:
+            list[str]: At most max_agents candidates names, by decreasing relevance, or all of them if there are no
+            more than max_agents.
+        """
+        if len(self.agents) <= self.max_agents:
+            return self.names()
+        documents = {agent.document: name for name, agent in self.agents.items()}
+        results = self.vector_db.get_similar_text(question, top_k=self.max_agents * 3, documents=list(documents))
+        selected = []
+        for match in results['matches']:
+            name = documents.get(match['metadata'].get('document'))
+            if name is not None and name not in selected:
+                selected.append(name)
+                if len(selected) == self.max_agents:
+                    break
+        return selected if selected else self.names()[:self.max_agents]
@@ -0,0 +1,342 @@
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from AgentCoordinator import AgentCoordinator
+from AgentRegistry import AgentRegistry
+
+
+class AgentRouter:
+    """
+    This class decides which CV agents are asked about a question, without an LLM round trip when the question names
+    candidates or clearly matches their CVs. The candidates named in the question are found by a single pass of a
+    multi-pattern matcher over the registered names, else the candidates are shortlisted by the cosine similarity of
+    the question embedding with their profile embeddings, and the LLM coordinator is only called when neither is
+    confident. Each decision is logged, and the LLM coordinator can also be called in the background for a sample of
+    the routed questions, so the agreement of the router with the LLM can be measured.
+    """
+    # The words of a name are matched with any separator of the file names
+    SEPARATOR = r"[\s_\-.]+"
+
+    def __init__(self, registry: AgentRegistry, coordinator: AgentCoordinator = None, min_similarity: float = None,
+                 margin: float = None, shadow_rate: float = None, log_file: str = None):
+        """
+        Initializes the router.
+
+        Args:
+            registry (AgentRegistry): The registry of the CV agents.
+            coordinator (AgentCoordinator): The LLM coordinator called when the router is not confident.
+            min_similarity (float): The minimum cosine similarity of the best candidate for the shortlist to be
+                confident. Defaults to the ROUTER_MIN_SIMILARITY environment variable, or 0.35.
+            margin (float): The maximum similarity gap between the best candidate and the other shortlisted ones.
+                When more candidates are registered than shortlisted, the best candidate must also be ahead of the
+                first candidate left out by this margin. Defaults to the ROUTER_MARGIN environment variable, or 0.05.
+            shadow_rate (float): The fraction of the routed questions also sent to the LLM coordinator in the
+                background, to log its decision. Defaults to the ROUTER_SHADOW_RATE environment variable, or 0, as
+                each sampled question costs an extra LLM call.
+            log_file (str): The JSON lines file of the decisions. Defaults to the ROUTER_LOG_FILE environment variable,
+                or 'resources/router/decisions.jsonl'.
+        """
+        self.registry = registry
+        self.coordinator = coordinator if coordinator is not None else AgentCoordinator()
+        self.min_similarity = min_similarity if min_similarity is not None \
+            else float(os.environ.get("ROUTER_MIN_SIMILARITY", "0.35"))
+        self.margin = margin if margin is not None else float(os.environ.get("ROUTER_MARGIN", "0.05"))
+        self.shadow_rate = shadow_rate if shadow_rate is not None \
+            else float(os.environ.get("ROUTER_SHADOW_RATE", "0"))
+        self.log_file = log_file if log_file is not None \
+            else os.environ.get("ROUTER_LOG_FILE", "resources/router/decisions.jsonl")
+        self._matcher = (None, None, {})
+        self._profiles = (None, [], None)
+        self._lock = threading.Lock()
+        self._shadow = ThreadPoolExecutor(max_workers=1, thread_name_prefix="router-shadow")
+
+    def greetings(self):
+        """
+        Returns a greeting message from the agent.
+
+        Returns:
+            str: A greeting message from the agent.
+        """
+        return ("Hello, I am a Router agent."
+                " I decide which CVs should information be retrieved from by the candidates names and their CVs.")
+
+    def matcher(self) -> tuple[re.Pattern, dict[str, str]]:
+        """
+        Returns the multi-pattern matcher of the registered names, built again only when the candidates change. Each
+        name is matched in full, and by each of its words of at least 3 letters that no other candidate has, e.g. a
+        first name. The patterns are tried longest first, so a full name wins over its words.
+
+        Returns:
+            tuple[re.Pattern, dict[str, str]]: The matcher, or None if there are no candidates, and the candidate name
+            of each normalized pattern.
+        """
+        names = tuple(self.registry.names())
+        if self._matcher[0] == names:
+            return self._matcher[1], self._matcher[2]
+        patterns = {}
+        words = {}
+        for name in names:
+            key = AgentRegistry.normalize_name(name)
+            if key:
+                patterns[key] = name
+                for word in set(key.split()):
+                    words.setdefault(word, set()).add(name)
+        for word, owners in words.items():
+            if len(word) >= 3 and len(owners) == 1 and word not in patterns:
+                patterns[word] = next(iter(owners))
+        alternatives = [self.SEPARATOR.join(re.escape(word) for word in key.split())
+                        for key in sorted(patterns, key=len, reverse=True)]
+        matcher = re.compile(rf"(?<!\w)(?:{'|'.join(alternatives)})(?!\w)", re.IGNORECASE) if alternatives else None
+        self._matcher = (names, matcher, patterns)
+        return matcher, patterns
+
+    def match_names(self, question: str) -> list[str]:
+        """
+        Finds the candidates named in a question.
+
+        Args:
+            question (str): The question.
+
+        Returns:
+            list[str]: The candidates names, without duplicates, in the order they appear in the question.
+        """
+        matcher, patterns = self.matcher()
+        if matcher is None:
+            return []
+        matched = []
+        for match in matcher.finditer(question):
+            name = patterns.get(AgentRegistry.normalize_name(match.group(0)))
+            if name is not None and name not in matched:
+                matched.append(name)
+        return matched
+
+    def profiles(self) -> tuple[list[str], np.ndarray]:
+        """
+        Returns the profile embeddings of the candidates, stacked again only when the candidates change.
+
+        Returns:
+            tuple[list[str], np.ndarray]: The names of the candidates with a profile, and their profile embeddings.
+        """
+        agents = tuple((name, id(self.registry.get(name))) for name in self.registry.names())
+        if self._profiles[0] != agents:
+            profiled = [(name, getattr(self.registry.get(name), 'profile', None)) for name, _ in agents]
+            profiled = [(name, profile) for name, profile in profiled if profile is not None]
+            matrix = np.vstack([profile for _, profile in profiled]).astype(np.float32) if profiled else None
+            self._profiles = (agents, [name for name, _ in profiled], matrix)
+        return self._profiles[1], self._profiles[2]
+
+    def rank(self, question: str) -> list[tuple[str, float]]:
+        """
+        Ranks the candidates by the cosine similarity of the question embedding with their profile embeddings.
+
+        Args:
+            question (str): The question.
+
+        Returns:
+            list[tuple[str, float]]: The candidates names and similarities, by decreasing similarity.
+        """
+        names, matrix = self.profiles()
+        if matrix is None:
+            return []
+        embedding = np.asarray(self.registry.vector_db.get_embeddings([question])[0], dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        scores = matrix @ (embedding / norm if norm > 0 else embedding)
+        order = np.argsort(-scores, kind="stable")
+        return [(names[index], float(scores[index])) for index in order]
+
+    def shortlist(self, ranked: list[tuple[str, float]]) -> list[str]:
+        """
+        Shortlists the candidates close enough to the best one, if the ranking is confident.
+
+        Args:
+            ranked (list[tuple[str, float]]): The candidates names and similarities, by decreasing similarity.
+
+        Returns:
+            list[str]: At most max_agents of the registry candidates names, or an empty list if the ranking is not
+            confident.
+        """
+        if not ranked or ranked[0][1] < self.min_similarity:
+            return []
+        best = ranked[0][1]
+        selected = [name for name, score in ranked[:self.registry.max_agents] if score >= best - self.margin]
+        if len(ranked) > len(selected) and best - ranked[len(selected)][1] < self.margin:
+            # The first candidate left out is as close to the best one as the shortlisted ones
+            return []
+        return selected
+
+    def _route_locally(self, question: str) -> tuple[list[str], dict]:
+        """
+        Decides which agents are asked about a question by their names or their profiles, logging the decision if it
+        is confident.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple[list[str], dict]: The registered candidates names, or an empty list if the router is not confident,
+            and the record of the decision.
+        """
+        begin = time.perf_counter()
+        agents = self.match_names(question)
+        ranked = []
+        source = 'names'
+        if not agents:
+            ranked = self.rank(question)
+            agents = self.shortlist(ranked)
+            source = 'similarity'
+        record = {'question': question, 'router': agents, 'source': source,
+                  'scores': {name: round(score, 4) for name, score in ranked[:self.registry.max_agents * 2]}}
+        record['router_ms'] = round((time.perf_counter() - begin) * 1000, 3)
+        if agents:
+            if random.random() < self.shadow_rate:
+                self._shadow.submit(self._shadow_decision, record)
+            else:
+                self.log(record)
+        else:
+            # Neither the names nor the similarities are confident, the LLM coordinator decides
+            record['router'] = [name for name, _ in ranked[:self.registry.max_agents]]
+            record['source'] = 'llm'
+        return agents, record
+
+    def route(self, question: str) -> tuple[list[str], str, str]:
+        """
+        Decides which agents are asked about a question, and the question to be asked to them.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple[list[str], str, str]: The registered candidates names, the question to be asked to their agents, and
+            the source of the decision: 'names', 'similarity' or 'llm'.
+        """
+        begin = time.perf_counter()
+        agents, record = self._route_locally(question)
+        if agents:
+            return agents, question, record['source']
+        agents, prompt = self.ask_coordinator(question)
+        record['llm'] = agents
+        record['router_ms'] = round((time.perf_counter() - begin) * 1000, 3)
+        self.log(record)
+        return agents, prompt, 'llm'
+
+    async def aroute(self, question: str) -> tuple[list[str], str, str]:
+        """
+        Decides which agents are asked about a question, and the question to be asked to them, without blocking the
+        event loop: the question is embedded in a worker thread, and the LLM coordinator is called with the async
+        client.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple[list[str], str, str]: The registered candidates names, the question to be asked to their agents, and
+            the source of the decision: 'names', 'similarity' or 'llm'.
+        """
+        begin = time.perf_counter()
+        agents, record = await asyncio.to_thread(self._route_locally, question)
+        if agents:
+            return agents, question, record['source']
+        agents, prompt = await self.aask_coordinator(question)
+        record['llm'] = agents
+        record['router_ms'] = round((time.perf_counter() - begin) * 1000, 3)
+        self.log(record)
+        return agents, prompt, 'llm'
+
+    def ask_coordinator(self, question: str) -> tuple[list[str], str]:
+        """
+        Asks the LLM coordinator which agents are asked about a question, matching the names it returns with the
+        registered candidates.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple[list[str], str]: The registered candidates names, and the question to be asked to their agents.
+        """
+        names, prompt = self.coordinator.answer(question)
+        agents = self.registry.resolve(names)
+        if not agents:
+            agents = self.registry.shortlist(question)
+        return agents, prompt
+
+    async def aask_coordinator(self, question: str) -> tuple[list[str], str]:
+        """
+        Asks the LLM coordinator which agents are asked about a question with the async client, matching the names it
+        returns with the registered candidates.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple[list[str], str]: The registered candidates names, and the question to be asked to their agents.
+        """
+        names, prompt = await self.coordinator.aanswer(question)
+        agents = self.registry.resolve(names)
+        if not agents:
+            agents = await asyncio.to_thread(self.registry.shortlist, question)
+        return agents, prompt
+
+    def _shadow_decision(self, record: dict):
+        """
+        Completes the record of a routed question with the decision of the LLM coordinator, and logs it.
+
+        Args:
+            record (dict): The record of the router decision.
+        """
+        try:
+            record['llm'] = self.ask_coordinator(record['question'])[0]
+        except (Exception,):
+            record['llm'] = None
+        self.log(record)
+
+    def log(self, record: dict):
+        """
+        Appends a decision to the log file.
+
+        Args:
+            record (dict): The decision.
+        """
+        record = {'time': round(time.time(), 3), **record}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+            with open(self.log_file, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record) + "\n")
+
+    @staticmethod
+    def agreement(log_file: str) -> dict:
+        """
+        Measures the agreement of the router with the LLM coordinator, over the logged decisions with both.
+
+        Args:
+            log_file (str): The JSON lines file of the decisions.
+
+        Returns:
+            dict: The number of decisions, the fraction routed without the LLM, the number compared, and the fraction
+            of them selecting the same candidates, overall and by source.
+        """
+        decisions = 0
+        routed = 0
+        compared = {}
+        agreed = {}
+        with open(log_file, encoding="utf-8") as file:
+            for line in file:
+                record = json.loads(line)
+                decisions += 1
+                routed += record['source'] != 'llm'
+                if record.get('llm') is None:
+                    continue
+                source = record['source']
+                compared[source] = compared.get(source, 0) + 1
+                agreed[source] = agreed.get(source, 0) + (set(record['router']) == set(record['llm']))
+        total = sum(compared.values())
+        return {'decisions': decisions, 'routed_rate': routed / decisions if decisions else 0.0, 'compared': total,
+                'agreement': sum(agreed.values()) / total if total else 0.0,
+                'by_source': {source: agreed[source] / compared[source] for source in compared}}
@@ -0,0 +1,131 @@
+from typing import Callable
+
+
+class CompletionStream:
+    """
+    This class wraps a streamed Groq chat completion. Iterating over it yields the text of each token as it arrives, so
+    it can be rendered with st.write_stream, and once the stream is consumed, it holds the full text and the token
+    usage of the completion, as the blocking calls return them. The chunks of an async client are iterated with
+    async for instead.
+    """
+
+    def __init__(self, chunks, on_complete: Callable[[str], None] = None):
+        """
+        Initializes the stream.
+
+        Args:
+            chunks (Union[Iterable, AsyncIterable]): The chunks of a chat completion created with stream=True, by the
+                client or by the async client.
+            on_complete (Callable[[str], None]): A function called with the full text once the stream is consumed,
+                e.g. to cache it.
+        """
+        self.chunks = chunks
+        self.on_complete = on_complete
+        self.text = None
+        self.usage = None
+        # The chunks are read through a single iterator and their text kept, so a stream partially iterated is
+        # resumed where it stopped and its full text still includes the tokens already yielded
+        self._iterator = None
+        self._parts = []
+
+    @classmethod
+    def from_text(cls, text: str) -> 'CompletionStream':
+        """
+        Builds a stream already consumed, e.g. for an answer taken from a cache, which yields its text at once.
+
+        Args:
+            text (str): The full text.
+
+        Returns:
+            CompletionStream: The stream.
+        """
+        stream = cls([])
+        stream.text = text
+        return stream
+
+    @staticmethod
+    def chunk_usage(chunk):
+        """
+        Returns the token usage carried by a chunk. Groq sends it in the x_groq field of the last chunk, while the
+        OpenAI compatible clients send it in its usage field.
+
+        Args:
+            chunk (object): A chat completion chunk.
+
+        Returns:
+            object: The usage, with the prompt_tokens and completion_tokens fields, or None.
+        """
+        usage = getattr(chunk, 'usage', None)
+        if usage is None:
+            usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+        return usage
+
+    def __iter__(self):
+        """
+        Yields the text of each token of the completion, then records the full text and the usage. A stream already
+        consumed yields its full text at once.
+
+        Returns:
+            Iterator[str]: The text of each token.
+        """
+        if self.text is not None:
+            yield self.text
+            return
+        if self._iterator is None:
+            self._iterator = iter(self.chunks)
+        for chunk in self._iterator:
+            if chunk.choices and chunk.choices[0].delta.content:
+                self._parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            usage = self.chunk_usage(chunk)
+            if usage is not None:
+                self.usage = usage
+        self.text = ''.join(self._parts)
+        if self.on_complete is not None:
+            self.on_complete(self.text)
+
+    async def __aiter__(self):
+        """
+        Yields the text of each token of a completion of the async client, then records the full text and the usage.
+        A stream already consumed yields its full text at once.
+
+        Returns:
+            AsyncIterator[str]: The text of each token.
+        """
+        if self.text is not None:
+            yield self.text
+            return
+        if self._iterator is None:
+            self._iterator = self.chunks.__aiter__()
+        async for chunk in self._iterator:
+            if chunk.choices and chunk.choices[0].delta.content:
+                self._parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            usage = self.chunk_usage(chunk)
+            if usage is not None:
+                self.usage = usage
+        self.text = ''.join(self._parts)
+        if self.on_complete is not None:
+            self.on_complete(self.text)
+
+    def read(self) -> str:
+        """
+        Consumes the rest of the stream, after any token already iterated.
+
+        Returns:
+            str: The full text of the completion, including the tokens already iterated.
+        """
+        for _ in self:
+            pass
+        return self.text
+
+    async def aread(self) -> str:
+        """
+        Consumes the rest of a stream of the async client, after any token already iterated.
+
+        Returns:
+            str: The full text of the completion, including the tokens already iterated.
+        """
+        async for _ in self:
+            pass
+        return self.text
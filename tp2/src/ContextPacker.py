@@ -0,0 +1,127 @@
+import math
+import re
+from typing import Callable
+
+
+class ContextPacker:
+    """
+    This class packs the retrieved chunks into the context of a prompt within a token budget, so the prompt size, and
+    so the latency and the cost of the completion, stays bounded whatever the number of chunks retrieved. The chunks
+    are taken by decreasing score, the chunks overlapping or nearly duplicating a chunk already taken are dropped, and
+    the chunks that do not fit in the remaining budget are skipped. The tokens are counted locally, by default with an
+    estimate of the LLM tokenizer.
+    """
+
+    PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+    SHINGLE_SIZE = 3
+    CHARS_PER_TOKEN = 4
+    MODEL_BUDGETS = {"llama-3.3-70b-versatile": 2000}
+    DEFAULT_BUDGET = 1000
+
+    def __init__(self, model: str = "llama-3.3-70b-versatile", max_tokens: int = None, overlap: float = 0.8,
+                 count_tokens: Callable[[str], int] = None):
+        """
+        Initializes the packer.
+
+        Args:
+            model (str): The LLM the prompt is sent to, which sets the default budget.
+            max_tokens (int): The maximum number of context tokens. Defaults to the budget of the model.
+            overlap (float): The share of the word shingles of a chunk found in a chunk already taken above which it
+                is dropped as a duplicate.
+            count_tokens (Callable[[str], int]): The function counting the tokens of a text, e.g. with the model
+                tokenizer. Defaults to the local estimate.
+        """
+        self.max_tokens = max_tokens if max_tokens is not None else self.MODEL_BUDGETS.get(model, self.DEFAULT_BUDGET)
+        self.overlap = overlap
+        self.count_tokens = count_tokens if count_tokens is not None else self.estimate_tokens
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        """
+        Estimates the number of tokens of a text for a BPE tokenizer: a token per punctuation sign, and a token per
+        few characters of each word.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            int: The estimated number of tokens.
+        """
+        return sum(math.ceil(len(piece) / cls.CHARS_PER_TOKEN) for piece in cls.PIECE_PATTERN.findall(text))
+
+    @classmethod
+    def shingles(cls, text: str) -> set:
+        """
+        Returns the sequences of consecutive words of a text, ignoring the case and the punctuation.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            set: The word shingles, or the words if the text is shorter than a shingle.
+        """
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < cls.SHINGLE_SIZE:
+            return {tuple(words)}
+        return {tuple(words[i:i + cls.SHINGLE_SIZE]) for i in range(len(words) - cls.SHINGLE_SIZE + 1)}
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Truncates a text to a number of tokens, at a word boundary. The longest prefix within the tokens is searched
+        by bisection, so the tokens are only counted a few times.
+
+        Args:
+            text (str): The text.
+            max_tokens (int): The maximum number of tokens.
+
+        Returns:
+            str: The beginning of the text within the tokens.
+        """
+        ends = [match.end() for match in self.PIECE_PATTERN.finditer(text)]
+        low, high = 0, len(ends)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(text[:ends[middle - 1]]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:ends[low - 1]] if low > 0 else ""
+
+    def pack(self, texts: list[str], scores: list[float] = None, separator: str = "\n") -> list[str]:
+        """
+        Selects the chunks to put in the context, within the token budget.
+
+        Args:
+            texts (list[str]): The retrieved chunks.
+            scores (list[float]): The score of each chunk. Defaults to the order of the chunks.
+            separator (str): The text joining the chunks in the context, counted in the budget.
+
+        Returns:
+            list[str]: The chunks kept, by decreasing score. The best chunk is truncated if it exceeds the budget
+            alone.
+        """
+        if scores is None:
+            scores = [-index for index in range(len(texts))]
+        order = sorted(range(len(texts)), key=lambda index: scores[index], reverse=True)
+        separator_tokens = self.count_tokens(separator)
+        packed = []
+        packed_shingles = []
+        used = 0
+        for index in order:
+            text = texts[index].strip()
+            if not text:
+                continue
+            shingles = self.shingles(text)
+            if any(len(shingles & other) >= self.overlap * min(len(shingles), len(other)) for other in packed_shingles):
+                continue
+            tokens = self.count_tokens(text) + (separator_tokens if packed else 0)
+            if used + tokens > self.max_tokens:
+                if not packed:
+                    packed.append(self.truncate(text, self.max_tokens))
+                    packed_shingles.append(shingles)
+                    used = self.max_tokens
+                continue
+            packed.append(text)
+            packed_shingles.append(shingles)
+            used += tokens
+        return packed
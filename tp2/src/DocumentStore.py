@@ -0,0 +1,203 @@
+import mmap
+import os
+import tempfile
+import threading
+from urllib.parse import quote
+
+
+class DocumentStore:
+    """
+    This class stores the text of the documents saved in the vector database, so the vectors only carry the byte
+    offsets of their chunk in it instead of the chunk text. Each document is a UTF-8 file with its chunks one after
+    the other, memory-mapped on read, so a chunk is sliced lazily when the prompt context is built. New chunks are
+    appended to the file, so the offsets of the chunks already saved stay valid, and the text of the removed chunks
+    stays in it until the document is written again, e.g. once it outweighs the text of the saved chunks.
+    """
+
+    DEFAULT_DIRECTORY = "resources/documents"
+    SEPARATOR = b"\n"
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY):
+        """
+        Initializes the store, creating its directory if needed.
+
+        Args:
+            directory (str): The directory where the documents are stored.
+        """
+        self.directory = directory
+        self._maps = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, document: str) -> str:
+        """
+        Returns the file of a document, with the document id escaped so any id is a valid file name.
+
+        Args:
+            document (str): The document id.
+
+        Returns:
+            str: The document file path.
+        """
+        return os.path.join(self.directory, f"{quote(document, safe='')}.txt")
+
+    def exists(self, document: str) -> bool:
+        """
+        Checks if a document is stored.
+
+        Args:
+            document (str): The document id.
+
+        Returns:
+            bool: True if the document file exists.
+        """
+        return os.path.exists(self.path(document))
+
+    def size(self, document: str) -> int:
+        """
+        Returns the size of the text of a document, including the text of the chunks no longer saved.
+
+        Args:
+            document (str): The document id.
+
+        Returns:
+            int: The document file size in bytes, or 0 if the document is not stored.
+        """
+        try:
+            return os.path.getsize(self.path(document))
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def encoded_size(cls, text: list[str]) -> int:
+        """
+        Returns the size that chunks take in a document file.
+
+        Args:
+            text (list[str]): The chunks.
+
+        Returns:
+            int: The size of the encoded chunks and their separators in bytes.
+        """
+        return sum(len(item.encode('utf-8')) + len(cls.SEPARATOR) for item in text)
+
+    @classmethod
+    def _encode(cls, text: list[str], start: int) -> tuple[bytes, list[tuple[int, int]]]:
+        """
+        Encodes chunks to be written from an offset of a document file.
+
+        Args:
+            text (list[str]): The chunks.
+            start (int): The offset of the first chunk in the file.
+
+        Returns:
+            tuple[bytes, list[tuple[int, int]]]: The encoded chunks, and the start and end offsets of each one.
+        """
+        encoded = [item.encode('utf-8') for item in text]
+        offsets = []
+        for item in encoded:
+            offsets.append((start, start + len(item)))
+            start += len(item) + len(cls.SEPARATOR)
+        return b"".join(item + cls.SEPARATOR for item in encoded), offsets
+
+    def write(self, document: str, text: list[str]) -> list[tuple[int, int]]:
+        """
+        Replaces the text of a document, atomically.
+
+        Args:
+            document (str): The document id.
+            text (list[str]): The document chunks.
+
+        Returns:
+            list[tuple[int, int]]: The start and end byte offsets of each chunk.
+        """
+        content, offsets = self._encode(text, 0)
+        with self._lock:
+            self._close(document)
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False) as output_file:
+                output_file.write(content)
+            os.replace(output_file.name, self.path(document))
+        return offsets
+
+    def append(self, document: str, text: list[str]) -> list[tuple[int, int]]:
+        """
+        Appends chunks to the text of a document, creating it if needed.
+
+        Args:
+            document (str): The document id.
+            text (list[str]): The chunks.
+
+        Returns:
+            list[tuple[int, int]]: The start and end byte offsets of each chunk.
+        """
+        with self._lock:
+            with open(self.path(document), 'ab') as output_file:
+                content, offsets = self._encode(text, output_file.seek(0, os.SEEK_END))
+                output_file.write(content)
+        return offsets
+
+    def delete(self, document: str):
+        """
+        Deletes the text of a document, ignoring a document that does not exist.
+
+        Args:
+            document (str): The document id.
+        """
+        with self._lock:
+            self._close(document)
+            if self.exists(document):
+                os.remove(self.path(document))
+
+    def _close(self, document: str):
+        """
+        Closes the memory map of a document, if it is mapped.
+
+        Args:
+            document (str): The document id.
+        """
+        mapped = self._maps.pop(document, None)
+        if mapped is not None:
+            mapped[1].close()
+
+    def slice(self, document: str, start: int, end: int) -> str:
+        """
+        Returns a part of the text of a document. The document is mapped again if its file changed since it was
+        mapped, e.g. after another process appended to it.
+
+        Args:
+            document (str): The document id.
+            start (int): The start byte offset.
+            end (int): The end byte offset.
+
+        Returns:
+            str: The text, or an empty string if the document is not stored.
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.path(document))
+            except FileNotFoundError:
+                return ""
+            mapped = self._maps.get(document)
+            if mapped is None or mapped[0] != (stat.st_ino, stat.st_size):
+                self._close(document)
+                if stat.st_size == 0:
+                    return ""
+                with open(self.path(document), 'rb') as input_file:
+                    mapped = ((stat.st_ino, stat.st_size), mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ))
+                self._maps[document] = mapped
+            return mapped[1][start:end].decode('utf-8', errors='replace')
+
+    def chunk_text(self, metadata: dict) -> str:
+        """
+        Returns the text of a chunk from the metadata of its vector: the 'document', 'start' and 'end' offsets in the
+        store, or the 'text' of the vectors saved before the store.
+
+        Args:
+            metadata (dict): The vector metadata.
+
+        Returns:
+            str: The chunk text.
+        """
+        if 'text' in metadata:
+            return metadata['text']
+        return self.slice(metadata['document'], int(metadata['start']), int(metadata['end']))
@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """
+    This class coalesces the concurrent embedding requests of the application sessions into batches for the shared
+    embedding model. A worker thread waits up to max_wait seconds after the first pending request to gather more, runs
+    the model once for all of them, and scatters the embeddings back to the callers.
+    """
+
+    def __init__(self, encode: Callable[[list[str]], np.ndarray], max_batch_size: int = 32, max_wait: float = 0.003):
+        """
+        Initializes the batcher.
+
+        Args:
+            encode (Callable[[list[str]], np.ndarray]): The model function embedding a list of texts.
+            max_batch_size (int): The maximum number of texts embedded together. A larger request is embedded alone.
+            max_wait (float): The maximum seconds the first pending request waits for others to join its batch.
+        """
+        self._encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """
+        Resets the throughput and latency metrics.
+        """
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.latencies = deque(maxlen=10000)
+        self.start = time.perf_counter()
+
+    def encode(self, text: list[str]) -> np.ndarray:
+        """
+        Embeds a list of texts in the next batch, blocking until the embeddings are ready.
+
+        Args:
+            text (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The embedding of each text.
+        """
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+        future = Future()
+        self._queue.put((list(text), future, time.perf_counter()))
+        return future.result()
+
+    def _run(self):
+        """
+        Gathers the pending requests into batches and embeds them, until the process exits.
+        """
+        pending = None
+        while True:
+            batch = [pending if pending is not None else self._queue.get()]
+            pending = None
+            size = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if size + len(request[0]) > self.max_batch_size:
+                    # The request does not fit, so it opens the next batch
+                    pending = request
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self._embed(batch)
+
+    def _embed(self, batch: list[tuple]):
+        """
+        Embeds the texts of a batch of requests in a single model call, and resolves each request future with its
+        embeddings.
+
+        Args:
+            batch (list[tuple]): The requests as (texts, future, submission time) tuples.
+        """
+        try:
+            embeddings = np.asarray(self._encode([item for text, _, _ in batch for item in text]))
+        except (Exception,) as error:
+            for _, future, _ in batch:
+                future.set_exception(error)
+            return
+        end = time.perf_counter()
+        offset = 0
+        for text, future, submitted in batch:
+            future.set_result(embeddings[offset:offset + len(text)])
+            offset += len(text)
+            self.latencies.append(end - submitted)
+        self.requests += len(batch)
+        self.batches += 1
+        self.texts += offset
+
+    def metrics(self) -> dict:
+        """
+        Returns the throughput and latency metrics since the last reset.
+
+        Returns:
+            dict: The number of requests and batches, the mean batch size in texts, the requests per second, and the
+            p50 and p99 request latencies in milliseconds.
+        """
+        latencies = np.asarray(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.texts / max(self.batches, 1),
+            'throughput': self.requests / max(time.perf_counter() - self.start, 1e-9),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99))
+        }
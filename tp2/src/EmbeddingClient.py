@@ -0,0 +1,131 @@
+import http.client
+import json
+import socket
+import threading
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    This class sends HTTP requests over a Unix socket.
+    """
+
+    def __init__(self, socket_path: str, timeout: float):
+        """
+        Initializes the connection.
+
+        Args:
+            socket_path (str): The path of the Unix socket.
+            timeout (float): The timeout of the socket operations in seconds.
+        """
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        """
+        Connects to the Unix socket.
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class EmbeddingClient:
+    """
+    This class embeds text through an EmbeddingServer, as a drop-in replacement of the embedding model: its encode
+    method has the same interface. Each thread keeps its own persistent connection to the server.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        """
+        Initializes the client. No connection is opened until the first request.
+
+        Args:
+            url (str): The server URL, http://host:port or unix:///path/to/socket.
+            timeout (float): The timeout of the requests in seconds.
+        """
+        self.url = url
+        self.timeout = timeout
+        self._address = urlparse(url)
+        if self._address.scheme not in ('http', 'unix'):
+            raise ValueError(f"Unsupported embedding server URL '{url}', expected http:// or unix://")
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        """
+        Returns the connection of the current thread, opening it on first use.
+
+        Returns:
+            http.client.HTTPConnection: The connection.
+        """
+        if getattr(self._local, 'connection', None) is None:
+            if self._address.scheme == 'unix':
+                self._local.connection = UnixHTTPConnection(self._address.path, self.timeout)
+            else:
+                self._local.connection = http.client.HTTPConnection(self._address.hostname, self._address.port,
+                                                                    timeout=self.timeout)
+        return self._local.connection
+
+    def _request(self, method: str, path: str, body: bytes = None) -> tuple[http.client.HTTPResponse, bytes]:
+        """
+        Sends a request, reconnecting once if the server closed the persistent connection.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path.
+            body (bytes): The request body.
+
+        Returns:
+            tuple[http.client.HTTPResponse, bytes]: The response and its body.
+        """
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                self._local.connection = None
+                if attempt == 1:
+                    raise
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"Embedding server error {response.status}: {content.decode('utf-8', 'replace')}")
+            return response, content
+
+    def encode(self, text: list[str]) -> np.ndarray:
+        """
+        Embeds a list of texts on the server.
+
+        Args:
+            text (list[str]): The texts.
+
+        Returns:
+            np.ndarray: The embedding of each text.
+        """
+        response, content = self._request("POST", "/embed", json.dumps({'text': list(text)}).encode('utf-8'))
+        rows, dimension = (int(value) for value in response.getheader("X-Embedding-Shape").split(","))
+        return np.frombuffer(content, dtype=np.float32).reshape(rows, dimension)
+
+    def health(self) -> dict:
+        """
+        Checks that the server is up.
+
+        Returns:
+            dict: The server status, model name and embeddings dimension.
+        """
+        return json.loads(self._request("GET", "/health")[1])
+
+    def metrics(self) -> dict:
+        """
+        Returns the batching metrics of the server.
+
+        Returns:
+            dict: The number of requests and batches, the mean batch size, the requests per second, the p50 and p99
+            latencies in milliseconds, the model name and the server uptime.
+        """
+        return json.loads(self._request("GET", "/metrics")[1])
@@ -0,0 +1,184 @@
+import json
+import os
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from BucketedEncoder import BucketedEncoder
+from EmbeddingBatcher import EmbeddingBatcher
+
+
+class EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    """
+    This class handles the HTTP requests of the embedding server: POST /embed embeds a JSON list of texts and returns
+    the embeddings as raw float32 rows, GET /health reports the model and GET /metrics the batching metrics.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are written separately, so with Nagle's algorithm the body would wait for the client
+    # to acknowledge the headers, which a delayed ACK postpones by about 40 ms on each request
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        """
+        Sends a response with a body, keeping the connection open for the next request.
+
+        Args:
+            status (int): The HTTP status.
+            body (bytes): The response body.
+            content_type (str): The body content type.
+            headers (dict): The additional headers.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, content: dict):
+        """
+        Sends a JSON response.
+
+        Args:
+            status (int): The HTTP status.
+            content (dict): The response content.
+        """
+        self._send(status, json.dumps(content).encode('utf-8'), "application/json")
+
+    def do_GET(self):  # noqa: N802 (name required by BaseHTTPRequestHandler)
+        """
+        Answers the health and metrics requests.
+        """
+        server = self.server.embedding_server
+        if self.path == "/health":
+            self._send_json(200, {'status': 'ok', 'model': server.model_name, 'dimension': server.dimension})
+        elif self.path == "/metrics":
+            self._send_json(200, server.metrics())
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):  # noqa: N802 (name required by BaseHTTPRequestHandler)
+        """
+        Answers the embedding requests.
+        """
+        if self.path != "/embed":
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            text = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))['text']
+            embeddings = np.ascontiguousarray(self.server.embedding_server.batcher.encode(text), dtype=np.float32)
+        except (Exception,) as error:
+            self._send_json(500, {'error': str(error)})
+            return
+        self._send(200, embeddings.tobytes(), "application/octet-stream",
+                   {"X-Embedding-Shape": f"{embeddings.shape[0]},{embeddings.shape[1] if embeddings.ndim > 1 else 0}"})
+
+    def log_message(self, format: str, *args):  # noqa: A002 (signature of BaseHTTPRequestHandler)
+        """
+        Disables the logging of every request.
+        """
+
+
+class UnixEmbeddingRequestHandler(EmbeddingRequestHandler):
+    """
+    This class handles the HTTP requests of the embedding server over a Unix socket, which has no Nagle's algorithm to
+    disable.
+    """
+
+    disable_nagle_algorithm = False
+
+
+class ThreadingTCPHTTPServer(ThreadingHTTPServer):
+    """
+    This class serves HTTP over TCP, with a thread per connection and a connection backlog sized for many clients.
+    """
+
+    request_queue_size = 128
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    This class serves HTTP over a Unix socket, with a thread per connection and a connection backlog sized for many
+    clients, since a full backlog makes the Unix socket connections fail instead of waiting.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class EmbeddingServer:
+    """
+    This class serves an embedding model to the application processes over HTTP, on localhost or on a Unix socket, so
+    all the workers of a deployment share a single copy of the model in memory. The concurrent requests of all the
+    clients are coalesced into batches by an EmbeddingBatcher, embedded in micro-batches of similar lengths.
+    """
+
+    def __init__(self, model, model_name: str, host: str = "127.0.0.1", port: int = 8765, socket_path: str = None,
+                 max_batch_size: int = 32, max_wait: float = 0.003, max_batch_tokens: int = 16384,
+                 threads: int = None):
+        """
+        Initializes the server and binds its socket.
+
+        Args:
+            model (object): The embedding model, with an encode method embedding a list of texts.
+            model_name (str): The model name, reported by the health endpoint.
+            host (str): The host to listen on, when no Unix socket is given.
+            port (int): The port to listen on, when no Unix socket is given. 0 picks a free port.
+            socket_path (str): The path of the Unix socket to listen on, instead of the host and port.
+            max_batch_size (int): The maximum number of texts embedded together.
+            max_wait (float): The maximum seconds a request waits for others to join its batch.
+            max_batch_tokens (int): The maximum number of padded tokens embedded together, by micro-batches of texts
+                of similar lengths.
+            threads (int): The number of threads of the model. Defaults to the torch default.
+        """
+        self.model_name = model_name
+        encoder = BucketedEncoder(model.encode, max_batch_size=max_batch_size, max_batch_tokens=max_batch_tokens,
+                                  threads=threads)
+        self.batcher = EmbeddingBatcher(encoder.encode, max_batch_size=max_batch_size, max_wait=max_wait)
+        self.dimension = None
+        self.start = time.time()
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                # A socket left by a previous server would make the bind fail
+                os.remove(socket_path)
+            self.httpd = ThreadingUnixHTTPServer(socket_path, UnixEmbeddingRequestHandler)
+            self.url = f"unix://{os.path.abspath(socket_path)}"
+        else:
+            self.httpd = ThreadingTCPHTTPServer((host, port), EmbeddingRequestHandler)
+            self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.httpd.embedding_server = self
+
+    def warm_up(self):
+        """
+        Embeds a first text, so the model is loaded in memory and its dimension known before the first request.
+        """
+        self.dimension = int(np.asarray(self.batcher.encode(["warm up"])).shape[1])
+        self.batcher.reset_metrics()
+
+    def metrics(self) -> dict:
+        """
+        Returns the batching metrics of the server.
+
+        Returns:
+            dict: The EmbeddingBatcher metrics, with the model name and the server uptime in seconds.
+        """
+        return {'model': self.model_name, 'uptime': time.time() - self.start, **self.batcher.metrics()}
+
+    def serve_forever(self):
+        """
+        Serves the requests until shutdown is called.
+        """
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """
+        Stops serving and closes the socket.
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.url.startswith("unix://") and os.path.exists(self.url[len("unix://"):]):
+            os.remove(self.url[len("unix://"):])
@@ -0,0 +1,242 @@
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+
+import numpy as np
+
+
+class KeywordIndex:
+    """
+    This class implements an inverted index with BM25 scoring, built alongside the vectors so that exact tokens such
+    as technologies, companies or degrees are retrieved even when the dense similarity misses them. The postings of
+    each term are kept as compact arrays of document slots and term frequencies, and the documents are persisted in an
+    append-only log next to the vectors.
+    """
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+    DEFAULT_DIRECTORY = "resources/keywords"
+
+    def __init__(self, index_name: str, directory: str = DEFAULT_DIRECTORY, k1: float = 1.2, b: float = 0.75):
+        """
+        Initializes the index, loading its documents if it already exists on disk.
+
+        Args:
+            index_name (str): The name of the vector index the keywords belong to.
+            directory (str): The directory where the keyword indexes are stored.
+            k1 (float): The BM25 term frequency saturation.
+            b (float): The BM25 document length normalisation.
+        """
+        self.path = os.path.join(directory, f"{index_name}.jsonl")
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def tokenize(cls, text: str) -> list[str]:
+        """
+        Splits a text into lowercase tokens, keeping the symbols of technology names such as c++, c#, node.js or
+        ci-cd.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            list[str]: The tokens.
+        """
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+    def _load(self):
+        """
+        Loads the documents from the log, compacting it if most of its records are outdated.
+        """
+        self.ids = []
+        self.slots = {}
+        self.metadata = []
+        self.lengths = []
+        self.frequencies = []
+        self._postings = {}
+        self._arrays = {}
+        self._lengths = None
+        self._log_lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as input_file:
+                for line in input_file:
+                    self._apply(json.loads(line))
+                    self._log_lines += 1
+            if self._log_lines > 2 * len(self.slots) + 1024:
+                self._compact()
+
+    def _apply(self, record: list):
+        """
+        Applies a log record: [id, metadata, term frequencies] adds or replaces a document, and [id] deletes it.
+
+        Args:
+            record (list): The log record.
+        """
+        slot = self.slots.pop(record[0], None)
+        if slot is not None:
+            for term in self.frequencies[slot]:
+                self._arrays.pop(term, None)
+            self.ids[slot] = None
+            self.metadata[slot] = None
+            self.lengths[slot] = 0
+            self.frequencies[slot] = None
+            self._lengths = None
+        if len(record) == 1:
+            return
+        record_id, metadata, frequencies = record
+        slot = len(self.ids)
+        self.slots[record_id] = slot
+        self.ids.append(record_id)
+        self.metadata.append(metadata)
+        self.lengths.append(sum(frequencies.values()))
+        self.frequencies.append(frequencies)
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, []).append((slot, frequency))
+            self._arrays.pop(term, None)
+        self._lengths = None
+
+    def _log(self, records: list[list]):
+        """
+        Applies records and appends them to the log, compacting the log when it grows much larger than the index.
+
+        Args:
+            records (list[list]): The log records.
+        """
+        for record in records:
+            self._apply(record)
+        with open(self.path, 'a', encoding='utf-8') as output_file:
+            output_file.writelines(json.dumps(record) + "\n" for record in records)
+        self._log_lines += len(records)
+        if self._log_lines > 2 * len(self.slots) + 1024:
+            self._compact()
+
+    def _compact(self):
+        """
+        Rewrites the log with the live documents only, renumbering their slots.
+        """
+        records = [[self.ids[slot], self.metadata[slot], self.frequencies[slot]]
+                   for slot in sorted(self.slots.values())]
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(self.path), suffix='.tmp', delete=False,
+                                         encoding='utf-8') as output_file:
+            output_file.writelines(json.dumps(record) + "\n" for record in records)
+        os.replace(output_file.name, self.path)
+        self._load()
+
+    def add(self, ids: list[str], text: list[str], metadata: list[dict]):
+        """
+        Adds or replaces documents.
+
+        Args:
+            ids (list[str]): The documents ids.
+            text (list[str]): The documents text.
+            metadata (list[dict]): The metadata returned with each document.
+        """
+        with self._lock:
+            self._log([[ids[i], metadata[i], dict(Counter(self.tokenize(text[i])))] for i in range(len(ids))])
+
+    def delete(self, ids: list[str]):
+        """
+        Deletes documents, ignoring the ids that do not exist.
+
+        Args:
+            ids (list[str]): The ids of the documents to be deleted.
+        """
+        with self._lock:
+            self._log([[record_id] for record_id in ids if record_id in self.slots])
+
+    def _posting_arrays(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the postings of a term as arrays, converting them after they changed and dropping deleted documents.
+
+        Args:
+            term (str): The term.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The slots of the documents with the term, and the term frequencies.
+        """
+        if term not in self._arrays:
+            postings = [(slot, frequency) for slot, frequency in self._postings[term] if self.ids[slot] is not None]
+            self._postings[term] = postings
+            self._arrays[term] = (np.fromiter((slot for slot, _ in postings), dtype=np.int32, count=len(postings)),
+                                  np.fromiter((frequency for _, frequency in postings), dtype=np.float32,
+                                              count=len(postings)))
+        return self._arrays[term]
+
+    def query(self, text: str, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the documents with the highest BM25 score for a text. The corpus statistics are computed over all
+        the documents, whichever documents are searched.
+
+        Args:
+            text (str): The query text.
+            top_k (int): The number of documents to retrieve.
+            documents (list[str]): The ids of the source documents to search in, from the 'document' of the metadata.
+                Defaults to all the documents.
+
+        Returns:
+            dict: The matches, each one with its 'id', 'score' and 'metadata', sorted by decreasing score.
+        """
+        with self._lock:
+            count = len(self.slots)
+            terms = [term for term in dict.fromkeys(self.tokenize(text)) if term in self._postings]
+            if count == 0 or top_k <= 0 or not terms:
+                return {'matches': []}
+            if self._lengths is None:
+                self._lengths = np.asarray(self.lengths, dtype=np.float32)
+                self._average_length = max(float(self._lengths.sum()) / count, 1.0)
+            slots, weights = [], []
+            for term in terms:
+                term_slots, frequencies = self._posting_arrays(term)
+                if len(term_slots) == 0:
+                    continue
+                idf = math.log(1 + (count - len(term_slots) + 0.5) / (len(term_slots) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[term_slots] / self._average_length)
+                slots.append(term_slots)
+                weights.append(idf * frequencies * (self.k1 + 1) / (frequencies + norm))
+            if not slots:
+                return {'matches': []}
+            candidates, inverse = np.unique(np.concatenate(slots), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(weights))
+            if documents is not None:
+                documents = set(documents)
+                kept = np.fromiter((self.metadata[slot].get('document') in documents for slot in candidates),
+                                   dtype=bool, count=len(candidates))
+                candidates, scores = candidates[kept], scores[kept]
+                if len(candidates) == 0:
+                    return {'matches': []}
+            top_k = min(top_k, len(candidates))
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return {'matches': [{'id': self.ids[candidates[i]], 'score': float(scores[i]),
+                                 'metadata': self.metadata[candidates[i]]} for i in best]}
+
+    @staticmethod
+    def fuse(results: list[dict], top_k: int, k: int = 60) -> dict:
+        """
+        Fuses ranked results with reciprocal rank fusion: each match scores the sum of 1 / (k + rank) over the
+        results where it appears.
+
+        Args:
+            results (list[dict]): The results of each retriever, with their matches sorted by decreasing score.
+            top_k (int): The number of fused matches to return.
+            k (int): The rank smoothing constant.
+
+        Returns:
+            dict: The fused matches, each one with its 'id', fused 'score' and 'metadata', sorted by decreasing score.
+        """
+        scores = {}
+        metadata = {}
+        for result in results:
+            for rank, match in enumerate(result['matches']):
+                scores[match['id']] = scores.get(match['id'], 0.0) + 1 / (k + rank + 1)
+                metadata.setdefault(match['id'], match['metadata'])
+        best = sorted(scores, key=lambda match_id: -scores[match_id])[:top_k]
+        return {'matches': [{'id': match_id, 'score': scores[match_id], 'metadata': metadata[match_id]}
+                            for match_id in best]}
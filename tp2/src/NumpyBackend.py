@@ -0,0 +1,339 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from VectorBackend import VectorBackend
+
+
+class NumpyBackend(VectorBackend):
+    """
+    This class stores the vectors in process, as normalised float32 rows of a contiguous matrix memory-mapped from a
+    file, and retrieves them by exact cosine similarity. The ids and metadata of the rows are persisted in an
+    append-only log next to the matrix. The rows of each document are grouped into a contiguous slice of the matrix
+    before a query restricted to some documents, so it only scans their slices.
+    """
+
+    PARTITION_KEY = 'document'
+
+    def __init__(self, directory: str, index_name: str):
+        """
+        Initializes the backend, loading the index if it already exists on disk.
+
+        Args:
+            directory (str): The directory where the indexes are stored.
+            index_name (str): The index name.
+        """
+        self.path = os.path.join(directory, index_name)
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        """
+        Loads the index from disk, replaying the records log.
+        """
+        self.ids = []
+        self.rows = {}
+        self.metadata = []
+        self.dimension = None
+        self.vectors = None
+        self._partitions = None
+        self._log_lines = 0
+        if not self.exists():
+            return
+        with open(os.path.join(self.path, "index.json"), 'r', encoding='utf-8') as input_file:
+            self.dimension = json.load(input_file)['dimension']
+        with open(os.path.join(self.path, "records.jsonl"), 'r', encoding='utf-8') as input_file:
+            for line in input_file:
+                self._apply(json.loads(line))
+                self._log_lines += 1
+        self._map(len(self.ids))
+
+    def _apply(self, record: list):
+        """
+        Applies a log record: [id, row, metadata] sets a row, and [None, count] truncates the rows to count.
+
+        Args:
+            record (list): The log record.
+        """
+        self._partitions = None
+        if record[0] is None:
+            for row in range(record[1], len(self.ids)):
+                if self.rows.get(self.ids[row]) == row:
+                    del self.rows[self.ids[row]]
+            del self.ids[record[1]:]
+            del self.metadata[record[1]:]
+            return
+        record_id, row, metadata = record
+        if row == len(self.ids):
+            self.ids.append(record_id)
+            self.metadata.append(metadata)
+        else:
+            if self.rows.get(self.ids[row]) == row:
+                del self.rows[self.ids[row]]
+            self.ids[row] = record_id
+            self.metadata[row] = metadata
+        self.rows[record_id] = row
+
+    def _log(self, records: list[list]):
+        """
+        Applies records and appends them to the log.
+
+        Args:
+            records (list[list]): The log records.
+        """
+        for record in records:
+            self._apply(record)
+        self._append(records)
+
+    def _append(self, records: list[list]):
+        """
+        Appends already applied records to the log, compacting the log when it grows much larger than the index.
+
+        Args:
+            records (list[list]): The log records.
+        """
+        if self._log_lines + len(records) > 2 * len(self.ids) + 1024:
+            self._rewrite()
+        else:
+            with open(os.path.join(self.path, "records.jsonl"), 'a', encoding='utf-8') as output_file:
+                output_file.writelines(json.dumps(record) + "\n" for record in records)
+            self._log_lines += len(records)
+
+    def _rewrite(self):
+        """
+        Rewrites the log with a single record per row.
+        """
+        records = [[self.ids[row], row, self.metadata[row]] for row in range(len(self.ids))]
+        with tempfile.NamedTemporaryFile('w', dir=self.path, suffix='.tmp', delete=False,
+                                         encoding='utf-8') as output_file:
+            output_file.writelines(json.dumps(record) + "\n" for record in records)
+        os.replace(output_file.name, os.path.join(self.path, "records.jsonl"))
+        self._log_lines = len(records)
+
+    def _map(self, rows: int):
+        """
+        Memory-maps the vectors file, growing it geometrically if it cannot hold the given number of rows.
+
+        Args:
+            rows (int): The number of rows the matrix must hold.
+        """
+        file = os.path.join(self.path, "vectors.f32")
+        row_bytes = self.dimension * np.dtype(np.float32).itemsize
+        capacity = os.path.getsize(file) // row_bytes
+        if rows > capacity:
+            if self.vectors is not None and len(self.vectors) > 0:
+                self.vectors.flush()
+            self.vectors = None
+            capacity = max(16, 2 * rows)
+            with open(file, 'r+b') as vectors_file:
+                vectors_file.truncate(capacity * row_bytes)
+        elif self.vectors is not None:
+            return
+        if capacity == 0:
+            self.vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        else:
+            self.vectors = np.memmap(file, dtype=np.float32, mode='r+', shape=(capacity, self.dimension))
+
+    def exists(self) -> bool:
+        """
+        Checks if the index exists on disk.
+
+        Returns:
+            bool: True if the index exists.
+        """
+        return os.path.exists(os.path.join(self.path, "records.jsonl"))
+
+    def create(self, dimension: int):
+        """
+        Creates an empty index on disk.
+
+        Args:
+            dimension (int): The vectors dimension.
+        """
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, "index.json"), 'w', encoding='utf-8') as output_file:
+                json.dump({'dimension': dimension}, output_file)
+            open(os.path.join(self.path, "vectors.f32"), 'wb').close()
+            # The log is created last, so the index only exists once complete
+            open(os.path.join(self.path, "records.jsonl"), 'w', encoding='utf-8').close()
+            self._load()
+
+    def delete(self):
+        """
+        Deletes the index from disk.
+        """
+        with self._lock:
+            self.vectors = None
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._load()
+
+    def upsert(self, ids: list[str], embeddings: list, metadata: list[dict]):
+        """
+        Inserts or updates vectors, normalising them so the similarity is a dot product. New vectors are appended to
+        the matrix and existing ones are overwritten in place.
+
+        Args:
+            ids (list[str]): The vectors ids.
+            embeddings (list): The vectors.
+            metadata (list[dict]): The metadata of each vector.
+        """
+        if len(ids) == 0:
+            return
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.maximum(norms, 1e-12)
+        with self._lock:
+            records = []
+            next_row = len(self.ids)
+            rows = {}
+            for i, record_id in enumerate(ids):
+                if record_id not in rows:
+                    rows[record_id] = self.rows.get(record_id)
+                    if rows[record_id] is None:
+                        rows[record_id] = next_row
+                        next_row += 1
+                records.append([record_id, rows[record_id], metadata[i]])
+            self._map(next_row)
+            self.vectors[[record[1] for record in records]] = embeddings
+            self.vectors.flush()
+            self._log(records)
+
+    def _move_row(self, source: int, target: int):
+        """
+        Copies the vector of a row over another row, to fill the gap left by a deleted row.
+
+        Args:
+            source (int): The row to be copied.
+            target (int): The row to be overwritten.
+        """
+        self.vectors[target] = self.vectors[source]
+
+    def _permute_rows(self, order: np.ndarray):
+        """
+        Reorders the rows, so the new row i holds the old row order[i], and rewrites the log. Only the rows that move
+        are copied.
+
+        Args:
+            order (np.ndarray): The old row of each new row.
+        """
+        moved = np.flatnonzero(order != np.arange(len(order)))
+        self.vectors[moved] = self.vectors[order[moved]]
+        self.vectors.flush()
+        self.ids = [self.ids[row] for row in order]
+        self.metadata = [self.metadata[row] for row in order]
+        self.rows = {record_id: row for row, record_id in enumerate(self.ids)}
+        self._rewrite()
+
+    def partitions(self) -> dict:
+        """
+        Returns the slice of rows of each document, first grouping the rows of each document together if upserts or
+        deletes interleaved them. The documents keep the order of their first row, and the rows their relative order.
+
+        Returns:
+            dict: The start and end rows of each document, by the document id of the metadata.
+        """
+        with self._lock:
+            if self._partitions is None:
+                keys = [(metadata or {}).get(self.PARTITION_KEY) for metadata in self.metadata]
+                numbers = {}
+                for key in keys:
+                    numbers.setdefault(key, len(numbers))
+                codes = np.fromiter((numbers[key] for key in keys), dtype=np.int64, count=len(keys))
+                order = np.argsort(codes, kind='stable')
+                if np.any(np.diff(order) != 1):
+                    self._permute_rows(order)
+                    codes = codes[order]
+                bounds = np.searchsorted(codes, np.arange(len(numbers) + 1))
+                self._partitions = {key: (int(bounds[number]), int(bounds[number + 1]))
+                                    for key, number in numbers.items()}
+            return self._partitions
+
+    def list_ids(self, prefix: str) -> list[str]:
+        """
+        Lists the ids of the vectors starting with a prefix.
+
+        Args:
+            prefix (str): The ids prefix.
+
+        Returns:
+            list[str]: The ids, in row order.
+        """
+        with self._lock:
+            return [record_id for record_id in self.ids if record_id.startswith(prefix)]
+
+    def fetch(self, ids: list[str]) -> dict[str, dict]:
+        """
+        Retrieves the metadata of vectors, ignoring the ids that do not exist.
+
+        Args:
+            ids (list[str]): The vectors ids.
+
+        Returns:
+            dict[str, dict]: The metadata of each vector found, by id.
+        """
+        with self._lock:
+            return {record_id: self.metadata[self.rows[record_id]] for record_id in ids if record_id in self.rows}
+
+    def delete_ids(self, ids: list[str]):
+        """
+        Deletes vectors, moving the last row into the row of each deleted vector so the matrix stays contiguous.
+
+        Args:
+            ids (list[str]): The ids of the vectors to be deleted.
+        """
+        with self._lock:
+            records = []
+            for record_id in dict.fromkeys(ids):
+                row = self.rows.get(record_id)
+                if row is None:
+                    continue
+                last = len(self.ids) - 1
+                if row != last:
+                    self._move_row(last, row)
+                    records.append([self.ids[last], row, self.metadata[last]])
+                    self._apply(records[-1])
+                records.append([None, last])
+                self._apply(records[-1])
+            if records:
+                self.vectors.flush()
+                self._append(records)
+
+    def query(self, embedding: list, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the most similar vectors with a matrix-vector product and a partial sort of the top_k scores. A
+        query restricted to some documents only multiplies their slices of the matrix.
+
+        Args:
+            embedding (list): The query vector.
+            top_k (int): The number of vectors to retrieve.
+            documents (list[str]): The ids of the documents to search in. Defaults to all the vectors.
+
+        Returns:
+            dict: The matches, each one with its 'id', 'score' and 'metadata', sorted by decreasing score.
+        """
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            count = len(self.ids)
+            if count == 0 or top_k <= 0:
+                return {'matches': []}
+            if documents is None:
+                rows = np.arange(count)
+                scores = self.vectors[:count] @ query
+            else:
+                partitions = self.partitions()
+                slices = [partitions[document] for document in dict.fromkeys(documents) if document in partitions]
+                if not slices:
+                    return {'matches': []}
+                rows = np.concatenate([np.arange(start, end) for start, end in slices])
+                scores = np.concatenate([self.vectors[start:end] @ query for start, end in slices])
+            top_k = min(top_k, len(rows))
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return {'matches': [{'id': self.ids[rows[i]], 'score': float(scores[i]),
+                                 'metadata': self.metadata[rows[i]]} for i in best]}
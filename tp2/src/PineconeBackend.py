@@ -0,0 +1,216 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pinecone import ServerlessSpec
+
+from VectorBackend import VectorBackend
+
+
+class PineconeBackend(VectorBackend):
+    """
+    This class stores the vectors in a Pinecone serverless index. The index handle is created once and reused, and the
+    upserts are split into batches bounded by the Pinecone request limits, which are sent concurrently by a bounded
+    thread pool that also serves the async queries.
+    """
+
+    MAX_BATCH_VECTORS = 1000
+    MAX_BATCH_BYTES = 2 * 1024 * 1024
+    DELETE_BATCH_SIZE = 1000
+
+    def __init__(self, pc, index_name: str, max_workers: int = 8, batch_vectors: int = 200):
+        """
+        Initializes the backend for a Pinecone index.
+
+        Args:
+            pc (Pinecone): The Pinecone client, or a client with the same interface such as LocalPinecone.
+            index_name (str): The index name.
+            max_workers (int): The maximum number of concurrent requests.
+            batch_vectors (int): The maximum number of vectors per upsert request, capped by MAX_BATCH_VECTORS.
+        """
+        self.pc = pc
+        self.index_name = index_name
+        self.max_workers = max_workers
+        self.batch_vectors = min(batch_vectors, self.MAX_BATCH_VECTORS)
+        self._index = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        """
+        Returns the handle of the Pinecone index, creating it on first use, since building a handle may require a
+        request to resolve the index host.
+
+        Returns:
+            Index: The Pinecone index handle.
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = self.pc.Index(self.index_name)
+            return self._index
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool of the concurrent requests, creating it on first use.
+
+        Returns:
+            ThreadPoolExecutor: The thread pool.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f"pinecone-{self.index_name}")
+            return self._executor
+
+    def exists(self) -> bool:
+        """
+        Checks if the Pinecone index exists.
+
+        Returns:
+            bool: True if the index exists.
+        """
+        return self.index_name in [index.name for index in self.pc.list_indexes()]
+
+    def create(self, dimension: int):
+        """
+        Creates the Pinecone index with cosine similarity.
+
+        Args:
+            dimension (int): The vectors dimension.
+        """
+        self.pc.create_index(
+            name=self.index_name,
+            dimension=dimension,
+            metric="cosine",
+            spec=ServerlessSpec(
+                cloud="aws",
+                region="us-east-1"
+            )
+        )
+        self._index = None
+
+    def delete(self):
+        """
+        Deletes the Pinecone index.
+        """
+        self.pc.delete_index(self.index_name)
+        self._index = None
+
+    def batches(self, data: list[tuple]) -> list[list[tuple]]:
+        """
+        Splits the records into batches of at most batch_vectors records and MAX_BATCH_BYTES estimated request bytes.
+
+        Args:
+            data (list[tuple]): The records as (id, values, metadata) tuples.
+
+        Returns:
+            list[list[tuple]]: The batches.
+        """
+        batches = []
+        batch = []
+        batch_bytes = 0
+        for record in data:
+            # Each value is serialised as a float of up to 24 characters in the request body
+            record_bytes = len(record[0]) + 24 * len(record[1]) + len(json.dumps(record[2]))
+            if batch and (len(batch) == self.batch_vectors or batch_bytes + record_bytes > self.MAX_BATCH_BYTES):
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+            batch.append(record)
+            batch_bytes += record_bytes
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def upsert(self, ids: list[str], embeddings: list, metadata: list[dict]):
+        """
+        Inserts or updates vectors in the Pinecone index, sending the size-bounded batches concurrently.
+
+        Args:
+            ids (list[str]): The vectors ids.
+            embeddings (list): The vectors.
+            metadata (list[dict]): The metadata of each vector.
+        """
+        index = self.index
+        data = [(ids[i], [float(value) for value in embeddings[i]], metadata[i]) for i in range(len(ids))]
+        # Consuming the results raises the error of any failed batch
+        list(self.executor.map(lambda batch: index.upsert(vectors=batch), self.batches(data)))
+
+    def list_ids(self, prefix: str) -> list[str]:
+        """
+        Lists the ids of the vectors starting with a prefix, following the Pinecone pagination.
+
+        Args:
+            prefix (str): The ids prefix.
+
+        Returns:
+            list[str]: The ids.
+        """
+        return [vector.id for page in self.index.list(prefix=prefix) for vector in page.vectors]
+
+    def fetch(self, ids: list[str]) -> dict[str, dict]:
+        """
+        Retrieves the metadata of vectors from the Pinecone index, in concurrent batches of the maximum size accepted by
+        Pinecone, ignoring the ids that do not exist.
+
+        Args:
+            ids (list[str]): The vectors ids.
+
+        Returns:
+            dict[str, dict]: The metadata of each vector found, by id.
+        """
+        index = self.index
+        batches = [ids[start:start + self.DELETE_BATCH_SIZE] for start in range(0, len(ids), self.DELETE_BATCH_SIZE)]
+        responses = self.executor.map(lambda batch: index.fetch(ids=batch), batches)
+        return {record_id: vector.metadata for response in responses for record_id, vector in response.vectors.items()}
+
+    def delete_ids(self, ids: list[str]):
+        """
+        Deletes vectors from the Pinecone index, in concurrent batches of the maximum size accepted by Pinecone.
+
+        Args:
+            ids (list[str]): The ids of the vectors to be deleted.
+        """
+        index = self.index
+        batches = [ids[start:start + self.DELETE_BATCH_SIZE] for start in range(0, len(ids), self.DELETE_BATCH_SIZE)]
+        list(self.executor.map(lambda batch: index.delete(ids=batch), batches))
+
+    def query(self, embedding: list, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the most similar vectors from the Pinecone index. A query restricted to some documents filters on
+        the 'document' metadata, so any subset of the documents is searched in a single request.
+
+        Args:
+            embedding (list): The query vector.
+            top_k (int): The number of vectors to retrieve.
+            documents (list[str]): The ids of the documents to search in. Defaults to all the vectors.
+
+        Returns:
+            dict: The Pinecone query response, with the matches and their metadata.
+        """
+        return self.index.query(
+            vector=[float(value) for value in embedding],
+            top_k=top_k,
+            filter={"document": {"$in": list(documents)}} if documents is not None else None,
+            include_values=False,
+            include_metadata=True
+        )
+
+    async def aquery(self, embedding: list, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the most similar vectors from the Pinecone index without blocking the event loop. The request runs
+        in the bounded thread pool, so many concurrent sessions share at most max_workers connections.
+
+        Args:
+            embedding (list): The query vector.
+            top_k (int): The number of vectors to retrieve.
+            documents (list[str]): The ids of the documents to search in. Defaults to all the vectors.
+
+        Returns:
+            dict: The Pinecone query response, with the matches and their metadata.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.query, embedding, top_k,
+                                                                documents)
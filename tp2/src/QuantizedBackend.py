@@ -0,0 +1,274 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from NumpyBackend import NumpyBackend
+
+
+class QuantizedBackend(NumpyBackend):
+    """
+    This class extends the in-process backend with compact codes for the search: the vectors are optionally reduced
+    to a smaller dimension, by PCA or by truncation for Matryoshka embeddings, and quantized to int8 with a scale per
+    dimension. A query scans the codes and rescores a small set of candidates with the full precision vectors. The
+    vectors, ids and metadata are stored as in NumpyBackend, and the quantizer and the codes are persisted next to
+    them, so the float32 vectors are still on disk and memory-mapped: the codes reduce the memory scanned by a query,
+    but the rows of the rescored candidates are read too, and stay in the page cache while memory allows. With
+    rescore=0, the queries only read the codes and return their approximate scores. Until the index holds
+    min_train_size vectors, the queries are exact, and the quantizer is trained again as the index grows.
+    """
+
+    PROJECTIONS = ('pca', 'truncate')
+
+    def __init__(self, directory: str, index_name: str, dimension: int = None, projection: str = 'pca',
+                 rescore: int = 10, min_train_size: int = 1024, retrain_growth: float = 4.0):
+        """
+        Initializes the backend, loading the index and its codes if they already exist on disk.
+
+        Args:
+            directory (str): The directory where the indexes are stored.
+            index_name (str): The index name.
+            dimension (int): The dimension of the codes. Defaults to the dimension of the vectors.
+            projection (str): The dimension reduction, 'pca' or 'truncate' to keep the first dimensions.
+            rescore (int): The number of candidates rescored with the full precision vectors, per retrieved vector,
+                or 0 to rank the vectors by their approximate scores without reading the full precision vectors.
+            min_train_size (int): The number of vectors from which the quantizer is trained.
+            retrain_growth (float): The growth factor of the index since the last training from which the quantizer
+                is trained again, so the projection and the scales keep following the data distribution.
+        """
+        if projection not in self.PROJECTIONS:
+            raise ValueError(f"Unknown projection '{projection}', expected one of {self.PROJECTIONS}")
+        self.code_dimension = dimension
+        self.projection = projection
+        self.rescore = rescore
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        super().__init__(directory, index_name)
+
+    def _load(self):
+        """
+        Loads the index from disk, together with the quantizer and the codes if it was trained.
+        """
+        super()._load()
+        self.mean = None
+        self.components = None
+        self.scale = None
+        self.codes = None
+        self._buffer = None
+        self.trained_size = 0
+        if self.vectors is None or not os.path.exists(os.path.join(self.path, "quantizer.npz")):
+            return
+        with np.load(os.path.join(self.path, "quantizer.npz")) as quantizer:
+            self.scale = quantizer['scale']
+            # The quantizers saved without their training size are trained again once the index grows
+            self.trained_size = int(quantizer['trained_size']) if 'trained_size' in quantizer else self.min_train_size
+            if 'components' in quantizer:
+                self.mean, self.components = quantizer['mean'], quantizer['components']
+        self._map_codes(len(self.ids))
+        encoded = 0
+        if os.path.exists(os.path.join(self.path, "codes.json")):
+            with open(os.path.join(self.path, "codes.json"), 'r', encoding='utf-8') as input_file:
+                encoded = json.load(input_file)['rows']
+        # Rows written after the last saved codes, e.g. by an interrupted upsert, are encoded now
+        if encoded < len(self.ids):
+            self._encode_rows(np.arange(encoded, len(self.ids)))
+
+    def _map_codes(self, rows: int):
+        """
+        Memory-maps the codes file, growing it geometrically if it cannot hold the given number of rows.
+
+        Args:
+            rows (int): The number of rows the codes must hold.
+        """
+        file = os.path.join(self.path, "codes.i8")
+        if not os.path.exists(file):
+            open(file, 'wb').close()
+        row_bytes = len(self.scale)
+        capacity = os.path.getsize(file) // row_bytes
+        if rows > capacity:
+            if self.codes is not None and len(self.codes) > 0:
+                self.codes.flush()
+            self.codes = None
+            capacity = max(16, 2 * rows)
+            with open(file, 'r+b') as codes_file:
+                codes_file.truncate(capacity * row_bytes)
+        elif self.codes is not None:
+            return
+        self.codes = np.memmap(file, dtype=np.int8, mode='r+', shape=(capacity, row_bytes)) if capacity > 0 else None
+
+    def _project(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Reduces vectors to the dimension of the codes.
+
+        Args:
+            vectors (np.ndarray): The normalised vectors, one per row.
+
+        Returns:
+            np.ndarray: The projected vectors.
+        """
+        if self.components is None:
+            return vectors
+        return (vectors - self.mean) @ self.components.T
+
+    def train(self, sample_size: int = 65536):
+        """
+        Trains the projection and the int8 scales on a sample of the stored vectors, and encodes every row.
+
+        Args:
+            sample_size (int): The maximum number of sampled vectors.
+        """
+        with self._lock:
+            count = len(self.ids)
+            rng = np.random.default_rng(0)
+            sample = np.asarray(self.vectors[np.sort(rng.choice(count, min(count, sample_size), replace=False))])
+            dimension = min(self.code_dimension or self.dimension, self.dimension)
+            self.mean, self.components = None, None
+            if dimension < self.dimension:
+                if self.projection == 'pca':
+                    self.mean = sample.mean(axis=0)
+                    self.components = np.linalg.svd(sample - self.mean, full_matrices=False)[2][:dimension].astype(
+                        np.float32)
+                else:
+                    self.mean = np.zeros(self.dimension, dtype=np.float32)
+                    self.components = np.eye(dimension, self.dimension, dtype=np.float32)
+            # The scales ignore the most extreme values, so a few outliers do not waste the code range
+            self.scale = np.maximum(np.percentile(np.abs(self._project(sample)), 99.9, axis=0), 1e-6) / 127
+            self.scale = self.scale.astype(np.float32)
+            self.trained_size = count
+            projection = {'mean': self.mean, 'components': self.components} if self.components is not None else {}
+            if os.path.exists(os.path.join(self.path, "codes.json")):
+                # The previous codes are invalid with the new quantizer
+                os.remove(os.path.join(self.path, "codes.json"))
+            with tempfile.NamedTemporaryFile(dir=self.path, suffix='.tmp', delete=False) as output_file:
+                np.savez(output_file, scale=self.scale, trained_size=self.trained_size, **projection)
+            os.replace(output_file.name, os.path.join(self.path, "quantizer.npz"))
+            self.codes = None
+            open(os.path.join(self.path, "codes.i8"), 'wb').close()
+            self._map_codes(count)
+            self._encode_rows(np.arange(count))
+
+    def _encode_rows(self, rows: np.ndarray, batch_size: int = 65536):
+        """
+        Encodes rows into int8 codes, in batches to bound the memory of the projection, and records the number of
+        encoded rows.
+
+        Args:
+            rows (np.ndarray): The rows to be encoded.
+            batch_size (int): The number of rows encoded together.
+        """
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            projected = self._project(np.asarray(self.vectors[batch]))
+            self.codes[batch] = np.clip(np.rint(projected / self.scale), -127, 127).astype(np.int8)
+        self.codes.flush()
+        with open(os.path.join(self.path, "codes.json"), 'w', encoding='utf-8') as output_file:
+            json.dump({'rows': len(self.ids)}, output_file)
+
+    def upsert(self, ids: list[str], embeddings: list, metadata: list[dict]):
+        """
+        Inserts or updates vectors and their codes. The quantizer is trained once the index reaches min_train_size
+        vectors, and trained again once it grew retrain_growth times since the last training, as the vectors added
+        later may not follow the distribution of the first ones.
+
+        Args:
+            ids (list[str]): The vectors ids.
+            embeddings (list): The vectors.
+            metadata (list[dict]): The metadata of each vector.
+        """
+        with self._lock:
+            super().upsert(ids, embeddings, metadata)
+            if self.scale is None:
+                if len(self.ids) >= self.min_train_size:
+                    self.train()
+            elif len(self.ids) >= self.retrain_growth * self.trained_size:
+                self.train()
+            elif len(ids) > 0:
+                self._map_codes(len(self.ids))
+                self._encode_rows(np.unique([self.rows[record_id] for record_id in ids]))
+
+    def _move_row(self, source: int, target: int):
+        """
+        Copies the vector and the codes of a row over another row, to fill the gap left by a deleted row.
+
+        Args:
+            source (int): The row to be copied.
+            target (int): The row to be overwritten.
+        """
+        super()._move_row(source, target)
+        if self.scale is not None:
+            self.codes[target] = self.codes[source]
+
+    def _permute_rows(self, order: np.ndarray):
+        """
+        Reorders the rows together with their codes.
+
+        Args:
+            order (np.ndarray): The old row of each new row.
+        """
+        super()._permute_rows(order)
+        if self.scale is not None:
+            self.codes[:len(order)] = self.codes[order]
+            self.codes.flush()
+
+    def _scan(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Computes the approximate score of every row from its codes. The codes are converted to float in blocks that
+        fit in the CPU cache, so the scan reads one byte per dimension.
+
+        Args:
+            weights (np.ndarray): The projected query multiplied by the scales.
+
+        Returns:
+            np.ndarray: The approximate scores.
+        """
+        count = len(self.ids)
+        block = max(256, (1 << 18) // len(weights))
+        if self._buffer is None or self._buffer.shape != (block, len(weights)):
+            self._buffer = np.empty((block, len(weights)), dtype=np.float32)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, block):
+            end = min(start + block, count)
+            buffer = self._buffer[:end - start]
+            buffer[...] = self.codes[start:end]
+            scores[start:end] = buffer @ weights
+        return scores
+
+    def query(self, embedding: list, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the most similar vectors, scanning the codes for the top_k * rescore candidates and sorting them by
+        their exact score, or by their approximate score if rescore is 0, or among all the vectors if the quantizer is
+        not trained yet. A query restricted to some documents scans their slices exactly, as they are small compared
+        with the index.
+
+        Args:
+            embedding (list): The query vector.
+            top_k (int): The number of vectors to retrieve.
+            documents (list[str]): The ids of the documents to search in. Defaults to all the vectors.
+
+        Returns:
+            dict: The matches, each one with its 'id', 'score' and 'metadata', sorted by decreasing score.
+        """
+        with self._lock:
+            if self.scale is None or documents is not None:
+                return super().query(embedding, top_k, documents)
+            query = np.asarray(embedding, dtype=np.float32).ravel()
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            count = len(self.ids)
+            if count == 0 or top_k <= 0:
+                return {'matches': []}
+            projected = query @ self.components.T if self.components is not None else query
+            approximate = self._scan(projected * self.scale)
+            if self.rescore > 0:
+                candidates = min(top_k * self.rescore, count)
+                candidates = np.sort(np.argpartition(-approximate, candidates - 1)[:candidates])
+                scores = self.vectors[candidates] @ query
+            else:
+                candidates = np.arange(count)
+                # The codes encode the vectors minus their mean
+                scores = approximate + float(self.mean @ query) if self.mean is not None else approximate
+            top_k = min(top_k, count)
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return {'matches': [{'id': self.ids[candidates[i]], 'score': float(scores[i]),
+                                 'metadata': self.metadata[candidates[i]]} for i in best]}
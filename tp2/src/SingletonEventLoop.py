@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from typing import AsyncIterable, Coroutine, Iterator
+
+
+class SingletonEventLoop:
+    """
+    This class implements a singleton pattern to ensure that only one event loop runs the async agents graphs,
+    shared throughout the application. The loop runs in a background thread, so the questions of all the sessions,
+    submitted from their own script threads, are served concurrently by the single loop and the shared async client,
+    without a thread per question waiting on the LLM.
+    """
+    _instance = None
+    loop = None
+
+    def __new__(cls, *args, **kwargs):
+        """
+        Ensures that only one instance of the class is created. If an instance already exists, it returns the existing
+        instance.
+        """
+        if not cls._instance:
+            cls._instance = super(SingletonEventLoop, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """
+        Starts the event loop in a background thread if it has not already been started.
+        """
+        if self.loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="event-loop", daemon=True).start()
+            SingletonEventLoop.loop = loop
+
+    def run(self, coroutine: Coroutine):
+        """
+        Runs a coroutine on the event loop, waiting for its result in the calling thread.
+
+        Args:
+            coroutine (Coroutine): The coroutine, e.g. the ainvoke of an agents graph.
+
+        Returns:
+            object: The result of the coroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def iterate(self, iterable: AsyncIterable) -> Iterator:
+        """
+        Iterates an async iterable on the event loop from the calling thread, e.g. to render the tokens of an answer
+        streamed by the async client with st.write_stream.
+
+        Args:
+            iterable (AsyncIterable): The async iterable.
+
+        Returns:
+            Iterator: The items of the iterable, as they arrive.
+        """
+        iterator = iterable.__aiter__()
+
+        async def next_item():
+            return await iterator.__anext__()
+
+        while True:
+            try:
+                yield self.run(next_item())
+            except StopAsyncIteration:
+                return
@@ -1,15 +1,17 @@
 import os
 
-from groq import Groq
+from groq import AsyncGroq, Groq
 
 
 class SingletonGroq:
     """
     This class implements a singleton pattern to ensure that only one instance of the Groq client is created and shared
-    throughout the application.
+    throughout the application. The async client, used by the agents graph when it runs on an event loop, is shared
+    the same way.
     """
     _instance = None
     groq = None
+    _async_groq = None
 
     def __new__(cls, *args, **kwargs):
         """
@@ -27,3 +29,16 @@ class SingletonGroq:
         """
         if self.groq is None:
             self.groq = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+
+    @property
+    def async_groq(self) -> AsyncGroq:
+        """
+        Returns the async Groq client, created on first use with the API key from the GROQ_API_KEY environment variable.
+        Its connections are pooled by the event loop it is used on, so it should always be used on the same event loop.
+
+        Returns:
+            AsyncGroq: The async client.
+        """
+        if self._async_groq is None:
+            SingletonGroq._async_groq = AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"))
+        return self._async_groq
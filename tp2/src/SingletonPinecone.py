@@ -3,15 +3,24 @@ import os
 from pinecone import Pinecone
 from transformers import AutoModel
 
+from BucketedEncoder import BucketedEncoder
+from EmbeddingBatcher import EmbeddingBatcher
+from EmbeddingCache import EmbeddingCache
+from EmbeddingClient import EmbeddingClient
+
 
 class SingletonPinecone:
     """
-    This class implements a singleton pattern to ensure that single instances of the Pinecone client and the embedding
-    model are created and shared throughout the application.
+    This class implements a singleton pattern to ensure that single instances of the Pinecone client, the embedding
+    model, its cache, its encoder and its batcher are created and shared throughout the application.
     """
+    MODEL_NAME = 'jinaai/jina-embeddings-v2-small-en'
     _instance = None
+    _pc = None
+    _embedding_cache = None
+    _encoder = None
+    _batcher = None
     model = None
-    pc = None
 
     def __new__(cls, *args, **kwargs):
         """
@@ -24,10 +33,77 @@ class SingletonPinecone:
 
     def __init__(self):
         """
-        Initializes the Pinecone client and the embedding model if they have not already been initialized,
-        using the API key from the PINECONE_API_KEY environment variable.
+        Initializes the embedding model if it has not already been initialized. If the EMBEDDING_SERVER_URL
+        environment variable is set, the model is a client of the embedding server shared by the application
+        processes, instead of a copy loaded in this process.
         """
         if self.model is None:
-            self.model = AutoModel.from_pretrained('jinaai/jina-embeddings-v2-small-en', trust_remote_code=True)
-        if self.pc is None:
-            self.pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+            url = os.environ.get("EMBEDDING_SERVER_URL")
+            if url:
+                self.model = EmbeddingClient(url)
+            else:
+                self.model = AutoModel.from_pretrained(self.MODEL_NAME, trust_remote_code=True)
+
+    @property
+    def pc(self) -> Pinecone:
+        """
+        Returns the Pinecone client, initializing it on first use with the API key from the PINECONE_API_KEY
+        environment variable, so the local vector backends do not require it.
+
+        Returns:
+            Pinecone: The Pinecone client.
+        """
+        if self._pc is None:
+            SingletonPinecone._pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+        return self._pc
+
+    @property
+    def embedding_cache(self) -> EmbeddingCache:
+        """
+        Returns the cache of the embedding model, shared by all the vector databases.
+
+        Returns:
+            EmbeddingCache: The embedding cache.
+        """
+        if self._embedding_cache is None:
+            SingletonPinecone._embedding_cache = EmbeddingCache(self.MODEL_NAME)
+        return self._embedding_cache
+
+    @property
+    def encoder(self) -> BucketedEncoder:
+        """
+        Returns the encoder of the embedding model, which embeds the texts in micro-batches of similar lengths. Its
+        maximum number of texts and padded tokens per micro-batch are read from the EMBEDDING_MICRO_BATCH_SIZE and
+        EMBEDDING_MAX_BATCH_TOKENS environment variables, and its number of torch threads from the EMBEDDING_THREADS
+        environment variable.
+
+        Returns:
+            BucketedEncoder: The embedding encoder.
+        """
+        if self._encoder is None:
+            threads = os.environ.get("EMBEDDING_THREADS")
+            SingletonPinecone._encoder = BucketedEncoder(
+                self.model.encode,
+                max_batch_size=int(os.environ.get("EMBEDDING_MICRO_BATCH_SIZE", "32")),
+                max_batch_tokens=int(os.environ.get("EMBEDDING_MAX_BATCH_TOKENS", "16384")),
+                threads=int(threads) if threads else None
+            )
+        return self._encoder
+
+    @property
+    def batcher(self) -> EmbeddingBatcher:
+        """
+        Returns the batcher of the embedding model, which coalesces the concurrent requests of all the sessions. Its
+        maximum batch size and wait time are read from the EMBEDDING_BATCH_SIZE and EMBEDDING_BATCH_WAIT_MS
+        environment variables.
+
+        Returns:
+            EmbeddingBatcher: The embedding batcher.
+        """
+        if self._batcher is None:
+            SingletonPinecone._batcher = EmbeddingBatcher(
+                self.encoder.encode,
+                max_batch_size=int(os.environ.get("EMBEDDING_BATCH_SIZE", "32")),
+                max_wait=float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", "3")) / 1000
+            )
+        return self._batcher
@@ -0,0 +1,107 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+
+class VectorBackend(ABC):
+    """
+    This class defines the interface of the vector storage behind VectorDB, so the vectors can be stored in Pinecone
+    or in a local backend.
+    """
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """
+        Checks if the index exists.
+
+        Returns:
+            bool: True if the index exists.
+        """
+
+    @abstractmethod
+    def create(self, dimension: int):
+        """
+        Creates an empty index.
+
+        Args:
+            dimension (int): The vectors dimension.
+        """
+
+    @abstractmethod
+    def delete(self):
+        """
+        Deletes the index and all its vectors.
+        """
+
+    @abstractmethod
+    def upsert(self, ids: list[str], embeddings: list, metadata: list[dict]):
+        """
+        Inserts or updates vectors in the index.
+
+        Args:
+            ids (list[str]): The vectors ids.
+            embeddings (list): The vectors.
+            metadata (list[dict]): The metadata of each vector.
+        """
+
+    @abstractmethod
+    def list_ids(self, prefix: str) -> list[str]:
+        """
+        Lists the ids of the vectors starting with a prefix.
+
+        Args:
+            prefix (str): The ids prefix.
+
+        Returns:
+            list[str]: The ids.
+        """
+
+    @abstractmethod
+    def fetch(self, ids: list[str]) -> dict[str, dict]:
+        """
+        Retrieves the metadata of vectors, ignoring the ids that do not exist.
+
+        Args:
+            ids (list[str]): The vectors ids.
+
+        Returns:
+            dict[str, dict]: The metadata of each vector found, by id.
+        """
+
+    @abstractmethod
+    def delete_ids(self, ids: list[str]):
+        """
+        Deletes vectors from the index, ignoring the ids that do not exist.
+
+        Args:
+            ids (list[str]): The ids of the vectors to be deleted.
+        """
+
+    @abstractmethod
+    def query(self, embedding: list, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the vectors most similar to the given one by cosine similarity, optionally among the vectors of some
+        documents only, identified by the 'document' of their metadata.
+
+        Args:
+            embedding (list): The query vector.
+            top_k (int): The number of vectors to retrieve.
+            documents (list[str]): The ids of the documents to search in. Defaults to all the vectors.
+
+        Returns:
+            dict: The matches, each one with its 'id', 'score' and 'metadata', sorted by decreasing score.
+        """
+
+    async def aquery(self, embedding: list, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Retrieves the vectors most similar to the given one without blocking the event loop, running the query in
+        the default thread pool of the loop.
+
+        Args:
+            embedding (list): The query vector.
+            top_k (int): The number of vectors to retrieve.
+            documents (list[str]): The ids of the documents to search in. Defaults to all the vectors.
+
+        Returns:
+            dict: The matches, each one with its 'id', 'score' and 'metadata', sorted by decreasing score.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.query, embedding, top_k, documents)
@@ -1,6 +1,21 @@
-from pinecone import ServerlessSpec
+import asyncio
+import hashlib
+import os
 
+import numpy as np
+
+from AnswerCache import AnswerCache
+from ChunkCache import ChunkCache
+from DocumentStore import DocumentStore
+from EmbeddingCache import EmbeddingCache
+from IvfBackend import IvfBackend
+from KeywordIndex import KeywordIndex
+from LocalPinecone import LocalPinecone
+from NumpyBackend import NumpyBackend
+from PineconeBackend import PineconeBackend
+from QuantizedBackend import QuantizedBackend
 from SingletonPinecone import SingletonPinecone
+from VectorBackend import VectorBackend
 
 
 class VectorDB:
@@ -8,69 +23,315 @@ class VectorDB:
     This class manages a vector database for storing and retrieving text.
     """
 
-    def __init__(self, index_name: str):
+    BACKENDS = ('pinecone', 'numpy', 'ivf', 'quantized', 'local-pinecone')
+    _answers = AnswerCache()
+
+    def __init__(self, index_name: str, cache: EmbeddingCache = None, backend: VectorBackend = None,
+                 keywords: KeywordIndex = None, store: DocumentStore = None, answers: AnswerCache = None):
         """
-        Initializes the VectorDB for a specific index with the transformer model and Pinecone client.
+        Initializes the VectorDB for a specific index with the transformer model and vector backend.
 
         Args:
             index_name (str): The index for the vector database.
+            cache (EmbeddingCache): The cache of the text embeddings. Defaults to the model cache shared by the
+                application.
+            backend (VectorBackend): The vector storage. Defaults to the backend selected by the VECTOR_BACKEND
+                environment variable.
+            keywords (KeywordIndex): The keyword index of the text, for the hybrid retrieval. Defaults to the index
+                in the default directory.
+            store (DocumentStore): The store of the documents text, sliced by the offsets in the vectors metadata.
+                Defaults to the store in the default directory.
+            answers (AnswerCache): The cache of the answers to the questions about the documents, invalidated when
+                a document is saved again. Defaults to the in-memory cache shared by the instances of the process, so
+                saving a document through one instance invalidates the answers cached through the others.
         """
+        self.cache = cache if cache is not None else SingletonPinecone().embedding_cache
         self.model = SingletonPinecone().model
-        self.pc = SingletonPinecone().pc
+        self.batcher = SingletonPinecone().batcher
         self.index_name = index_name
+        self.backend = backend if backend is not None else self.create_backend(index_name)
+        self.keywords = keywords if keywords is not None else KeywordIndex(index_name)
+        self.store = store if store is not None else DocumentStore()
+        self.answers = answers if answers is not None else VectorDB._answers
+        self.versions = {}
+
+    @classmethod
+    def create_backend(cls, index_name: str) -> VectorBackend:
+        """
+        Creates the vector backend selected by the VECTOR_BACKEND environment variable: 'pinecone' (default) for
+        Pinecone with the API key from the PINECONE_API_KEY environment variable, 'numpy' for the in-process backend
+        stored in resources/vectors, 'ivf' for the same backend with an approximate IVF index probing the number of
+        clusters from the IVF_NPROBE environment variable, 'quantized' for the same backend searching int8 codes of
+        the dimension from the QUANTIZED_DIMENSION environment variable, rescoring the number of candidates per result
+        from the QUANTIZED_RESCORE environment variable, or 'local-pinecone' for the local Pinecone stand-in.
+
+        Args:
+            index_name (str): The index name.
+
+        Returns:
+            VectorBackend: The vector backend.
+        """
+        backend = os.environ.get("VECTOR_BACKEND", "pinecone")
+        if backend == 'pinecone':
+            return PineconeBackend(SingletonPinecone().pc, index_name)
+        elif backend == 'numpy':
+            return NumpyBackend("resources/vectors", index_name)
+        elif backend == 'ivf':
+            return IvfBackend("resources/vectors", index_name, nprobe=int(os.environ.get("IVF_NPROBE", "8")))
+        elif backend == 'quantized':
+            return QuantizedBackend("resources/vectors", index_name,
+                                    dimension=int(os.environ.get("QUANTIZED_DIMENSION", "0")) or None,
+                                    rescore=int(os.environ.get("QUANTIZED_RESCORE", "10")))
+        elif backend == 'local-pinecone':
+            return PineconeBackend(LocalPinecone(), index_name)
+        else:
+            raise ValueError(f"Unknown vector backend '{backend}', expected one of {cls.BACKENDS}")
 
     def get_embeddings(self, text: list[str]):
         """
-        Generates embeddings for a list of text strings.
+        Generates embeddings for a list of text strings. The embeddings are taken from the cache, and the text strings
+        not cached yet are embedded by the model together with the concurrent requests of the other sessions.
 
         Args:
             text (list[str]): A list of text strings to generate embeddings for.
 
         Returns:
-            list: A list of embeddings corresponding to the input text.
+            np.ndarray: The embeddings corresponding to the input text.
+        """
+        return self.cache.embed(text, self.batcher.encode)
+
+    def profile_embedding(self, text: list[str]) -> np.ndarray:
+        """
+        Returns the profile embedding of a document: the normalized mean of the embeddings of its chunks, which are
+        taken from the cache once the document is saved.
+
+        Args:
+            text (list[str]): The text chunks of the document.
+
+        Returns:
+            np.ndarray: The profile embedding, of unit norm.
+        """
+        if not text:
+            return None
+        profile = np.asarray(self.get_embeddings(text), dtype=np.float32).mean(axis=0)
+        norm = np.linalg.norm(profile)
+        return profile / norm if norm > 0 else profile
+
+    @staticmethod
+    def chunk_ids(document: str, text: list[str]) -> list[str]:
+        """
+        Builds stable ids for the text chunks of a document, from the document id and the chunks content, so the same
+        chunk always has the same id.
+
+        Args:
+            document (str): The document id.
+            text (list[str]): The document text chunks.
+
+        Returns:
+            list[str]: The id of each text chunk, prefixed by the document id.
         """
-        return self.model.encode(text)
+        return [f"{document}#{hashlib.sha256(item.encode('utf-8')).hexdigest()[:16]}" for item in text]
 
-    def save_text(self, text: list[str]):
+    @staticmethod
+    def chunk_metadata(document: str, ids: list[str], offsets: list[tuple[int, int]], **fields) -> dict:
         """
-        Saves text data to the vector database by creating embeddings and storing them.
+        Builds the metadata of the vectors of text chunks: the document id and the offsets of each chunk in the
+        document store, instead of the chunk text.
+
+        Args:
+            document (str): The document id.
+            ids (list[str]): The chunks ids.
+            offsets (list[tuple[int, int]]): The start and end byte offsets of each chunk in the document store.
+            **fields: The additional metadata fields, the same for every chunk.
+
+        Returns:
+            dict: The metadata of each chunk, by chunk id.
+        """
+        return {chunk_id: {"document": document, "start": start, "end": end, **fields}
+                for chunk_id, (start, end) in zip(ids, offsets)}
+
+    def save_text(self, text: list[str], document: str = "cv") -> str:
+        """
+        Saves the text chunks of a document to the vector database, replacing its previous version. The chunks are
+        identified by their content, so only the new chunks are embedded and upserted, and only the removed ones are
+        deleted, while the other documents in the index are kept. The text of the new chunks is appended to the
+        document store, and the vectors only carry its offsets.
 
         Args:
             text (list[str]): A list of text strings to save in the vector database.
+            document (str): The document id. Saving text under the same id replaces the document.
+
+        Returns:
+            str: The document version, a hash of its chunks.
+        """
+        chunks = dict(zip(self.chunk_ids(document, text), text))
+        version = ChunkCache.key(sorted(chunks))[:16]
+        exists = self.backend.exists()
+        if exists and self.versions.get(document) == version:
+            return version
+        saved = set(self.backend.list_ids(f"{document}#")) if exists else set()
+        # The saved chunks are only kept if their text is in the store, e.g. not if they were saved before the store
+        kept = saved if self.store.exists(document) else set()
+        dead = self.store.size(document) - self.store.encoded_size([chunks[chunk_id] for chunk_id in kept
+                                                                     if chunk_id in chunks])
+        if kept and dead > self.store.encoded_size(list(chunks.values())):
+            # The text of the removed chunks outweighs the text of the document, which is compacted by writing it
+            # again, with all its chunks upserted with their new offsets and their cached embeddings
+            kept = set()
+        new_ids = [chunk_id for chunk_id in chunks if chunk_id not in kept]
+        metadata = {}
+        if new_ids:
+            new_text = [chunks[chunk_id] for chunk_id in new_ids]
+            offsets = self.store.append(document, new_text) if kept else self.store.write(document, new_text)
+            metadata = self.chunk_metadata(document, new_ids, offsets, version=version)
+            embeddings = self.get_embeddings(new_text)
+            if not exists:
+                self.backend.create(len(embeddings[0]))
+            self.backend.upsert(new_ids, embeddings, [metadata[chunk_id] for chunk_id in new_ids])
+        # The keyword index is completed with any chunk it misses, e.g. if it was built after the vectors
+        missing_ids = [chunk_id for chunk_id in chunks
+                       if chunk_id not in metadata and chunk_id not in self.keywords.slots]
+        if missing_ids:
+            # Their text is already in the document store at the offsets of their vectors, and only the chunks
+            # stored without offsets are appended
+            stored = {chunk_id: fields for chunk_id, fields in self.backend.fetch(missing_ids).items()
+                      if 'start' in fields and 'end' in fields}
+            metadata.update(stored)
+            missing_ids = [chunk_id for chunk_id in missing_ids if chunk_id not in stored]
+        if missing_ids:
+            offsets = self.store.append(document, [chunks[chunk_id] for chunk_id in missing_ids])
+            metadata.update(self.chunk_metadata(document, missing_ids, offsets, version=version))
+        self.keywords.add(list(metadata), [chunks[chunk_id] for chunk_id in metadata], list(metadata.values()))
+        removed_ids = [chunk_id for chunk_id in saved if chunk_id not in chunks]
+        if removed_ids:
+            self.backend.delete_ids(removed_ids)
+            self.keywords.delete(removed_ids)
+        self.answers.invalidate(document)
+        self.versions[document] = version
+        return version
+
+    def delete_document(self, document: str):
+        """
+        Deletes a document from the vector database: its vectors, its keywords and its text, keeping the other
+        documents of the index.
+
+        Args:
+            document (str): The document id.
+        """
+        if self.backend.exists():
+            ids = self.backend.list_ids(f"{document}#")
+            if ids:
+                self.backend.delete_ids(ids)
+                self.keywords.delete(ids)
+        self.store.delete(document)
+        self.answers.invalidate(document)
+        self.versions.pop(document, None)
+
+    def documents_version(self, documents: list[str] = None) -> str:
+        """
+        Returns the version of the documents searched by a query, from the versions of the documents saved.
+
+        Args:
+            documents (list[str]): The ids of the documents searched. Defaults to all the documents.
+
+        Returns:
+            str: A hash of the documents versions.
+        """
+        if documents is None:
+            return ChunkCache.key(None, sorted(self.versions.items()))[:16]
+        documents = sorted(documents)
+        return ChunkCache.key(documents, [self.versions.get(document) for document in documents])[:16]
+
+    def cached_answer(self, question: str, documents: list[str] = None):
+        """
+        Returns the cached answer to a question similar enough to the given one, asked about the same version of the
+        documents.
+
+        Args:
+            question (str): The question.
+            documents (list[str]): The ids of the documents searched to answer the question. Defaults to all the
+                documents.
+
+        Returns:
+            Optional[str]: The cached answer, or None if the question must be answered.
+        """
+        return self.answers.get(self.get_embeddings([question])[0], self.documents_version(documents))
+
+    def cache_answer(self, question: str, answer: str, documents: list[str] = None, version: str = None):
+        """
+        Caches the answer to a question. The question embedding is taken from the embedding cache, as it was embedded
+        to retrieve the context.
+
+        Args:
+            question (str): The question.
+            answer (str): The answer.
+            documents (list[str]): The ids of the documents searched to answer the question. Defaults to all the
+                documents.
+            version (str): The version of the documents when the question was asked. Defaults to their current
+                version.
+        """
+        version = version if version is not None else self.documents_version(documents)
+        self.answers.put(self.get_embeddings([question])[0], version, answer, documents)
+
+    def hybrid_results(self, text: str, dense: dict, top_k: int, documents: list[str] = None) -> dict:
+        """
+        Fuses the dense results of a query with the keyword results, by reciprocal rank fusion.
+
+        Args:
+            text (str): The query text.
+            dense (dict): The dense results, with the matches sorted by decreasing similarity.
+            top_k (int): The number of top similar entries to retrieve.
+            documents (list[str]): The ids of the documents searched. Defaults to all the documents.
+
+        Returns:
+            dict: The fused results, or the dense results if no keyword of the query is indexed.
         """
-        embeddings = self.get_embeddings(text)
-        if self.index_name in [index.name for index in self.pc.list_indexes()]:
-            self.pc.delete_index(self.index_name)
-        self.pc.create_index(
-            name=self.index_name,
-            dimension=len(embeddings[0]),
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud="aws",
-                region="us-east-1"
-            )
-        )
-        index = self.pc.Index(self.index_name)
-        data = [(f"id-{i}", embeddings[i], {"text": text[i]}) for i in range(len(embeddings))]
-        index.upsert(vectors=data)
-
-    def get_similar_text(self, text: str, top_k: int = 5):
-        """
-        Retrieves the most similar text entries from the vector database.
+        sparse = self.keywords.query(text, len(dense['matches']), documents)
+        if not sparse['matches']:
+            return {'matches': dense['matches'][:top_k]}
+        return KeywordIndex.fuse([dense, sparse], top_k)
+
+    def get_similar_text(self, text: str, top_k: int = 5, hybrid: bool = True,
+                         documents: list[str] = None):
+        """
+        Retrieves the most similar text entries from the vector database. With hybrid retrieval, the dense results
+        are fused with the BM25 results of the keyword index, so exact tokens such as technologies or companies are
+        not missed.
 
         Args:
             text (str): The input text to find similar entries for.
             top_k (int): The number of top similar entries to retrieve.
+            hybrid (bool): Whether to fuse the dense results with the keyword results.
+            documents (list[str]): The ids of the documents to search in, e.g. a subset of the candidates. Defaults to
+                all the documents of the index.
 
         Returns:
             dict: A dictionary containing the results of the similarity query.
         """
         embedding = self.get_embeddings([text])
-        index = self.pc.Index(self.index_name)
-        result = index.query(
-            vector=embedding[0].tolist(),
-            top_k=top_k,
-            include_values=False,
-            include_metadata=True
-        )
-        return result
+        if not hybrid:
+            return self.backend.query(embedding[0], top_k, documents)
+        dense = self.backend.query(embedding[0], max(2 * top_k, 10), documents)
+        return self.hybrid_results(text, dense, top_k, documents)
+
+    async def aget_similar_text(self, text: str, top_k: int = 5, hybrid: bool = True,
+                                documents: list[str] = None):
+        """
+        Retrieves the most similar text entries from the vector database without blocking the event loop, so many
+        sessions can query concurrently.
+
+        Args:
+            text (str): The input text to find similar entries for.
+            top_k (int): The number of top similar entries to retrieve.
+            hybrid (bool): Whether to fuse the dense results with the keyword results.
+            documents (list[str]): The ids of the documents to search in, e.g. a subset of the candidates. Defaults to
+                all the documents of the index.
+
+        Returns:
+            dict: A dictionary containing the results of the similarity query.
+        """
+        embedding = await asyncio.to_thread(self.get_embeddings, [text])
+        if not hybrid:
+            return await self.backend.aquery(embedding[0], top_k, documents)
+        dense = await self.backend.aquery(embedding[0], max(2 * top_k, 10), documents)
+        return self.hybrid_results(text, dense, top_k, documents)
@@ -1,14 +1,15 @@
 """
-This script implements a Streamlit-based CV agent bot application. The application allows users to upload up to 3 CVs,
-process them to extract chunks of text, store the chunks in a vector database, and interact with agent bots that
-coordinate themselves to answer questions about the uploaded CVs.
+This script implements a Streamlit-based CV agent bot application. The application allows users to upload any number
+of CVs, process them to extract chunks of text, store the chunks in a vector database, and interact with agent bots
+that coordinate themselves to answer questions about the uploaded CVs.
 """
 
-import os
+import itertools
 
 import streamlit as st
 
 from AgentEnvironment import AgentEnvironment
+from SingletonEventLoop import SingletonEventLoop
 
 # Start the Streamlit app
 st.title("CV Chat Bot")
@@ -22,65 +23,53 @@ for message in st.session_state['messages']:
 if "uploader_key" not in st.session_state:
     st.session_state["uploader_key"] = 1
 
+if "abot" not in st.session_state:
+    # Init the agents environment, the candidates are added as their CVs are uploaded
+    st.session_state["abot"] = AgentEnvironment(stream=True)
+abot = st.session_state["abot"]
+
 question = st.chat_input("Ask a question:")
 
-# Upload each CV
-if "cv1_file" not in st.session_state:
-    uploaded_cv = st.file_uploader("Upload CV1", type=["pdf"], key=st.session_state["uploader_key"])
-    if uploaded_cv:
-        temp_file = f"resources/temp/{uploaded_cv.name}"
-        with open(temp_file, 'wb') as output_temporary_file:
-            output_temporary_file.write(uploaded_cv.read())
-        st.session_state['cv1_file'] = temp_file
-        st.session_state["uploader_key"] += 1
-        message = f"CV-1 {uploaded_cv.name} uploaded"
-        st.session_state['messages'].append({"role": "assistant", "content": message})
-        with st.chat_message("assistant"):
-            st.markdown(message)
-        st.rerun()
-elif "cv2_file" not in st.session_state:
-    uploaded_cv = st.file_uploader("Upload CV2", type=["pdf"], key=st.session_state["uploader_key"])
-    if uploaded_cv:
-        temp_file = f"resources/temp/{uploaded_cv.name}"
-        with open(temp_file, 'wb') as output_temporary_file:
-            output_temporary_file.write(uploaded_cv.read())
-        st.session_state['cv2_file'] = temp_file
-        st.session_state["uploader_key"] += 1
-        message = f"CV-2 {uploaded_cv.name} uploaded"
+# Upload the CVs
+uploaded_cvs = st.file_uploader("Upload CVs", type=["pdf"], accept_multiple_files=True,
+                                key=st.session_state["uploader_key"])
+if uploaded_cvs:
+    for uploaded_cv in uploaded_cvs:
+        # Keep the CV in memory, without writing it to disk
+        name = abot.add_candidate((uploaded_cv.name, uploaded_cv.getvalue()))
+        message = f"CV of {name} uploaded"
         st.session_state['messages'].append({"role": "assistant", "content": message})
-        with st.chat_message("assistant"):
-            st.markdown(message)
-        st.rerun()
-elif "cv3_file" not in st.session_state:
-    uploaded_cv = st.file_uploader("Upload CV3", type=["pdf"], key=st.session_state["uploader_key"])
-    if uploaded_cv:
-        temp_file = f"resources/temp/{uploaded_cv.name}"
-        with open(temp_file, 'wb') as output_temporary_file:
-            output_temporary_file.write(uploaded_cv.read())
-        st.session_state['cv3_file'] = temp_file
-        st.session_state["uploader_key"] += 1
-        message = f"CV-3 {uploaded_cv.name} uploaded"
+    st.session_state["uploader_key"] += 1
+    st.rerun()
+
+# List the candidates, each one can be removed
+with st.sidebar:
+    st.header(f"Candidates ({len(abot.registry)})")
+    for name in abot.registry.names():
+        if st.button(f"Remove {name}", key=f"remove_{name}"):
+            abot.remove_candidate(name)
+            st.session_state['messages'].append({"role": "assistant", "content": f"CV of {name} removed"})
+            st.rerun()
+
+if question:
+    st.session_state['messages'].append({"role": "user", "content": question})
+    with st.chat_message("user"):
+        st.markdown(question)
+    if not len(abot.registry):
+        message = "Upload at least one CV before asking questions."
         st.session_state['messages'].append({"role": "assistant", "content": message})
         with st.chat_message("assistant"):
             st.markdown(message)
-        st.rerun()
-elif "abot" not in st.session_state:
-    # After CV upload, init agents environment
-    st.session_state["abot"] = AgentEnvironment(st.session_state["cv1_file"],
-                                                st.session_state["cv2_file"],
-                                                st.session_state["cv3_file"])
-    os.remove(st.session_state["cv1_file"])
-    os.remove(st.session_state["cv2_file"])
-    os.remove(st.session_state["cv3_file"])
-else:
-    if question:
-        # Answer questions
-        st.session_state['messages'].append({"role": "user", "content": question})
-        with st.chat_message("user"):
-            st.markdown(question)
-        abot = st.session_state["abot"]
-        answer = abot.graph.invoke({"question": question})
+    else:
+        # Answer questions on the event loop shared by the sessions, with the async agents
+        loop = SingletonEventLoop()
+        answer = loop.run(abot.graph.ainvoke({"question": question}))
         for message in answer['chat_history']:
             st.session_state['messages'].append(message)
             with st.chat_message(message['role']):
                 st.markdown(message['content'])
+        # Render the final answer as its tokens arrive, and save its full text once complete
+        with st.chat_message("llm"):
+            content = st.write_stream(itertools.chain([f"{abot.llm.greetings()} "],
+                                                      loop.iterate(answer['answer_stream'])))
+        st.session_state['messages'].append({"role": "llm", "content": content})
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from AgentEnvironment import AgentEnvironment  # noqa: E402
+from AgentRegistry import AgentRegistry  # noqa: E402
+from AgentRouter import AgentRouter  # noqa: E402
+
+
+class FakeCVAgent:
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.document = name
+        self.latency = latency
+
+    def greetings(self):
+        return f"Hello, I am the fake CV agent of {self.name}."
+
+    def answer(self, question: str):
+        time.sleep(self.latency)
+        return f"{self.name} answers {question}"
+
+    async def aanswer(self, question: str):
+        await asyncio.sleep(self.latency)
+        return f"{self.name} answers {question}"
+
+
+class FakeCoordinator:
+    def __init__(self, agents: list[str]):
+        self.agents = agents
+
+    def greetings(self):
+        return "Hello, I am a fake coordinator."
+
+    def answer(self, question: str):
+        return list(self.agents), question
+
+    async def aanswer(self, question: str):
+        return list(self.agents), question
+
+
+class FakeLLM:
+    def greetings(self):
+        return "Hello, I am a fake LLM agent."
+
+    def answer(self, question: str, context: list[dict[str, str]]):
+        return ', '.join(item['candidate'] for item in context)
+
+    async def aanswer(self, question: str, context: list[dict[str, str]]):
+        return ', '.join(item['candidate'] for item in context)
+
+
+def set_up(latencies: dict[str, float], selected: list[str]) -> AgentEnvironment:
+    env = AgentEnvironment.__new__(AgentEnvironment)
+    env.registry = AgentRegistry(MagicMock())
+    for name, latency in latencies.items():
+        env.registry.agents[name] = FakeCVAgent(name, latency)
+    env.coordinator = FakeCoordinator(selected)
+    env.router = AgentRouter(env.registry, env.coordinator, shadow_rate=0.0, log_file=os.devnull)
+    env.llm = FakeLLM()
+    env.stream = False
+    env.graph = env._build_graph()
+    return env
+
+
+def test_graph_invoke_takes_the_time_of_the_slowest_cv_agent():
+    # Given
+    latencies = {"candidate1": 0.2, "candidate2": 0.4, "candidate3": 0.6}
+    env = set_up(latencies, list(latencies))
+
+    # When
+    begin = time.perf_counter()
+    result = env.graph.invoke({"question": "Who knows Python?"})
+    elapsed = time.perf_counter() - begin
+
+    # Then
+    assert result["answer"] == "candidate1, candidate2, candidate3"
+    assert elapsed >= max(latencies.values())
+    assert elapsed < max(latencies.values()) + 0.25
+    assert elapsed < sum(latencies.values())
+
+
+def test_graph_ainvoke_takes_the_time_of_the_slowest_cv_agent():
+    # Given
+    latencies = {"candidate1": 0.2, "candidate2": 0.4, "candidate3": 0.6}
+    env = set_up(latencies, list(latencies))
+
+    # When
+    begin = time.perf_counter()
+    result = asyncio.run(env.graph.ainvoke({"question": "Who knows Python?"}))
+    elapsed = time.perf_counter() - begin
+
+    # Then
+    assert result["answer"] == "candidate1, candidate2, candidate3"
+    assert elapsed < max(latencies.values()) + 0.25
+
+
+def test_graph_invoke_keeps_the_selection_order_when_the_first_agent_finishes_last():
+    # Given
+    latencies = {"candidate1": 0.3, "candidate2": 0.1, "candidate3": 0.2}
+    env = set_up(latencies, ["candidate1", "candidate3", "candidate2"])
+
+    # When
+    result = env.graph.invoke({"question": "Who knows Python?"})
+
+    # Then
+    assert result["answer"] == "candidate1, candidate3, candidate2"
+    assert [message["role"] for message in result["chat_history"]] == ["coordinator", "selector", "agent1", "agent2",
+                                                                        "agent3", "llm"]
+
+
+def test_merge_context_returns_answers_in_selection_order():
+    # Given
+    state = {"agents": ["candidate2", "candidate1"],
+             "chat_history": [{"role": "coordinator", "content": "coordinator"}],
+             "context": [{"candidate": "candidate1", "context": "answer1", "message": {"role": "agent2"}},
+                         {"candidate": "candidate2", "context": "answer2", "message": {"role": "agent1"}}]}
+
+    # When
+    chat_history, context = AgentEnvironment._merge_context(state)
+
+    # Then
+    assert context == [{"candidate": "candidate2", "context": "answer2"},
+                       {"candidate": "candidate1", "context": "answer1"}]
+    assert [message["role"] for message in chat_history] == ["coordinator", "agent1", "agent2"]
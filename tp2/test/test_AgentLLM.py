@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from AgentLLM import AgentLLM  # noqa: E402
+from ContextPacker import ContextPacker  # noqa: E402
+
+
+def set_up(max_tokens: int = None) -> AgentLLM:
+    agent = AgentLLM.__new__(AgentLLM)
+    agent.packer = ContextPacker("llama-3.3-70b-versatile", max_tokens=max_tokens)
+    return agent
+
+
+def test_messages_keep_every_candidate_with_the_same_answer():
+    # Given
+    agent = set_up()
+    same = "The candidate worked five years as a data engineer building pipelines with Spark and Airflow."
+    context = [{"candidate": "Alice", "context": same}, {"candidate": "Bob", "context": same},
+               {"candidate": "Carol", "context": "I don't know"}, {"candidate": "Dave", "context": "I don't know"}]
+
+    # When
+    messages = agent._messages("Who knows Spark?", context)
+
+    # Then
+    prompt = messages[0]["content"]
+    for item in context:
+        assert f"{item['candidate']}:\n{item['context']}" in prompt
+    assert messages[1] == {"role": "user", "content": "Who knows Spark?"}
+
+
+def test_messages_keep_every_candidate_within_the_budget():
+    # Given
+    agent = set_up(max_tokens=120)
+    context = [{"candidate": "Alice", "context": "Python and Spark. " * 40},
+               {"candidate": "Bob", "context": "Java and Kafka. " * 40},
+               {"candidate": "Carol", "context": "I don't know"},
+               {"candidate": "Dave", "context": "Go and Kubernetes. " * 40}]
+
+    # When
+    packed = agent._pack_context(context)
+
+    # Then
+    assert ContextPacker.estimate_tokens(packed) <= 120
+    assert "Carol:\nI don't know" in packed
+    for name in ("Alice", "Bob", "Dave"):
+        assert f"{name}:\n" in packed
+    assert packed.index("Alice:") < packed.index("Bob:") < packed.index("Carol:") < packed.index("Dave:")
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from CompletionStream import CompletionStream  # noqa: E402
+
+TOKENS = ["The ", "candidate ", "knows ", "Spark."]
+
+
+def chunks() -> list:
+    return [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))]) for token in TOKENS]
+
+
+async def async_chunks():
+    for chunk in chunks():
+        yield chunk
+
+
+def test_read_after_partial_iteration_returns_the_full_text():
+    # Given
+    completed = []
+    stream = CompletionStream(iter(chunks()), on_complete=completed.append)
+    tokens = iter(stream)
+    first = [next(tokens), next(tokens)]
+
+    # When
+    text = stream.read()
+
+    # Then
+    assert first == TOKENS[:2]
+    assert text == "".join(TOKENS)
+    assert stream.text == "".join(TOKENS)
+    assert completed == ["".join(TOKENS)]
+
+
+def test_aread_after_partial_iteration_returns_the_full_text():
+    # Given
+    completed = []
+    stream = CompletionStream(async_chunks(), on_complete=completed.append)
+
+    async def partial_then_read():
+        tokens = stream.__aiter__()
+        first = [await tokens.__anext__(), await tokens.__anext__()]
+        return first, await stream.aread()
+
+    # When
+    first, text = asyncio.run(partial_then_read())
+
+    # Then
+    assert first == TOKENS[:2]
+    assert text == "".join(TOKENS)
+    assert completed == ["".join(TOKENS)]
@@ -0,0 +1,51 @@
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from TextProvider import TextProvider  # noqa: E402
+
+TEXT = " ".join(f"The candidate led project number {i} with a team of {i % 7 + 2} engineers." for i in range(60))
+
+
+class AlternatingClient:
+    """
+    This class emulates a chat completion client that only keeps the first sentence of a window, and fails to answer
+    for the next window, so the text left uncovered by the first window is prepended to the second one.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages: list[dict[str, str]], model: str, **kwargs) -> SimpleNamespace:
+        self.calls += 1
+        sentence = re.search(r"[^.]*\.", messages[-1]["content"]).group()
+        content = str({"chunk": sentence, "topic": "projects"}) if self.calls % 2 else "Sorry, I cannot help."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def set_up() -> TextProvider:
+    provider = TextProvider(b"")
+    provider.client = AlternatingClient()
+    provider.get_text = lambda: TEXT
+    return provider
+
+
+def chunk_content(chunk: str) -> str:
+    return re.sub(r"^\{'topic': '.*?', '(content': '|chunk': )", "", chunk)[:-1]
+
+
+def test_concurrent_chunks_do_not_exceed_the_maximum_size():
+    # Given
+    provider = set_up()
+
+    # When
+    chunks = provider.get_chunks_concurrent(200, max_workers=1, overlap=32)
+
+    # Then
+    contents = [chunk_content(chunk) for chunk in chunks]
+    assert max(map(len, contents)) <= 200
+    assert "".join(contents).replace(" ", "") == TEXT.replace(" ", "")
@@ -33,32 +33,80 @@ class AgentAccountant:
         Initialize the class required services.
         """
         self.client = SingletonGroq().groq
+        self.async_client = SingletonGroq().async_groq
 
-    def answer(self, question: str, reasoning: list = None) -> tuple[dict[str, str], tuple[int, int]]:
+    def _messages(self, question: str, reasoning: list = None) -> list[dict[str, str]]:
         """
-        Returns a reasoning step. If the step requires the help of another agent, it returns the question to be asked to
-        them. If the step is the final answer, it returns the final answer.
+        Builds the chat messages asking for the next reasoning step.
 
         Args:
             question (str): The user prompt.
             reasoning (list): The reasoning steps already taken.
 
         Returns:
-            tuple: The answer with the reasoning step and the token usage. If the answer is not found, returns a default
-             value.
+            list: The system prompt, the user prompt and the reasoning steps.
         """
         messages = [{"role": "system", "content": self.AGENT_ACCOUNTANT_PROMPT},
                     {"role": "user", "content": question}]
         if reasoning:
             messages.extend(reasoning)
-        chat_completion = self.client.chat.completions.create(
-            messages=messages,
-            model="llama-3.3-70b-versatile",
-            max_tokens=5000
-        )
+        return messages
+
+    @staticmethod
+    def _parse(chat_completion) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Parses the reasoning step of the chat completion.
+
+        Args:
+            chat_completion (object): The chat completion.
+
+        Returns:
+            tuple: The answer with the reasoning step and the token usage. If the answer is not found, returns a default
+             value.
+        """
         try:
             usage_tokens = (chat_completion.usage.prompt_tokens, chat_completion.usage.completion_tokens)
             answer = ast.literal_eval(chat_completion.choices[0].message.content)
             return answer, usage_tokens
         except (Exception,):
             return {'answer': 'I don\'t know'}, (0, 0)
+
+    def answer(self, question: str, reasoning: list = None) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Returns a reasoning step. If the step requires the help of another agent, it returns the question to be asked to
+        them. If the step is the final answer, it returns the final answer.
+
+        Args:
+            question (str): The user prompt.
+            reasoning (list): The reasoning steps already taken.
+
+        Returns:
+            tuple: The answer with the reasoning step and the token usage. If the answer is not found, returns a default
+             value.
+        """
+        chat_completion = self.client.chat.completions.create(
+            messages=self._messages(question, reasoning),
+            model="llama-3.3-70b-versatile",
+            max_tokens=5000
+        )
+        return self._parse(chat_completion)
+
+    async def aanswer(self, question: str, reasoning: list = None) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Returns a reasoning step with the async client, so the event loop serves other questions while the LLM
+        answers.
+
+        Args:
+            question (str): The user prompt.
+            reasoning (list): The reasoning steps already taken.
+
+        Returns:
+            tuple: The answer with the reasoning step and the token usage. If the answer is not found, returns a default
+             value.
+        """
+        chat_completion = await self.async_client.chat.completions.create(
+            messages=self._messages(question, reasoning),
+            model="llama-3.3-70b-versatile",
+            max_tokens=5000
+        )
+        return self._parse(chat_completion)
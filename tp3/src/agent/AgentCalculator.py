@@ -19,22 +19,32 @@ class AgentCalculator:
         Initialize the class required services.
         """
         self.client = SingletonGroq().groq
+        self.async_client = SingletonGroq().async_groq
 
-    def answer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+    def _messages(self, question: str) -> list[dict[str, str]]:
         """
-        Answers the mathematical question.
+        Builds the chat messages asking the mathematical question.
 
         Args:
             question (str): The user's question.
 
+        Returns:
+            list: The system prompt and the question.
+        """
+        return [{"role": "system", "content": self.AGENT_CALCULATOR_PROMPT},
+                {"role": "user", "content": question}]
+
+    @staticmethod
+    def _parse(chat_completion) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Parses and executes the calculation of the chat completion.
+
+        Args:
+            chat_completion (object): The chat completion.
+
         Returns:
             tuple: The calculation result and the token usage. If the answer is not found, returns a default value.
         """
-        chat_completion = self.client.chat.completions.create(
-            messages=[{"role": "system", "content": self.AGENT_CALCULATOR_PROMPT},
-                      {"role": "user", "content": question}],
-            model="llama-3.3-70b-versatile"
-        )
         try:
             usage_tokens = (chat_completion.usage.prompt_tokens, chat_completion.usage.completion_tokens)
             answer = ast.literal_eval(chat_completion.choices[0].message.content)
@@ -42,3 +52,36 @@ class AgentCalculator:
             return answer, usage_tokens
         except (Exception,):
             return {'calculator': 'I don\'t know'}, (0, 0)
+
+    def answer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Answers the mathematical question.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple: The calculation result and the token usage. If the answer is not found, returns a default value.
+        """
+        chat_completion = self.client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile"
+        )
+        return self._parse(chat_completion)
+
+    async def aanswer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Answers the mathematical question with the async client, so the event loop serves other questions while the
+        LLM answers.
+
+        Args:
+            question (str): The user's question.
+
+        Returns:
+            tuple: The calculation result and the token usage. If the answer is not found, returns a default value.
+        """
+        chat_completion = await self.async_client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile"
+        )
+        return self._parse(chat_completion)
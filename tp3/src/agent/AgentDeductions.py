@@ -25,6 +25,7 @@ class AgentDeductions:
         Initialize the class required services.
         """
         self.client = SingletonGroq().groq
+        self.async_client = SingletonGroq().async_groq
         self.deductions_data = self.read_csv(file_path)
 
     @staticmethod
@@ -45,27 +46,69 @@ class AgentDeductions:
                 data.append(row)
         return data
 
-    def answer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+    def _messages(self, question: str) -> list[dict[str, str]]:
         """
-        Returns the applicable deductible categories with the deductible amount based on the input.
+        Builds the chat messages asking the question with the deductions data.
 
         Args:
             question (str): The question with the declared deductions.
 
         Returns:
-            tuple: The deduction values and the token usage. If the answer is not found, returns a default value.
+            list: The system prompt with the deductions data, and the question.
         """
         sys_prompt = f"""{self.AGENT_DEDUCTION_PROMPT}
 
         Deductions data:
         {self.deductions_data}"""
-        chat_completion = self.client.chat.completions.create(
-            messages=[{"role": "system", "content": sys_prompt}, {"role": "user", "content": question}],
-            model="llama-3.3-70b-versatile"
-        )
+        return [{"role": "system", "content": sys_prompt}, {"role": "user", "content": question}]
+
+    @staticmethod
+    def _parse(chat_completion) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Parses the answer of the chat completion.
+
+        Args:
+            chat_completion (object): The chat completion.
+
+        Returns:
+            tuple: The deduction values and the token usage. If the answer is not found, returns a default value.
+        """
         try:
             usage_tokens = (chat_completion.usage.prompt_tokens, chat_completion.usage.completion_tokens)
             answer = ast.literal_eval(chat_completion.choices[0].message.content)
             return answer, usage_tokens
         except (Exception,):
             return {"deductions": "I don\'t know"}, (0, 0)
+
+    def answer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Returns the applicable deductible categories with the deductible amount based on the input.
+
+        Args:
+            question (str): The question with the declared deductions.
+
+        Returns:
+            tuple: The deduction values and the token usage. If the answer is not found, returns a default value.
+        """
+        chat_completion = self.client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile"
+        )
+        return self._parse(chat_completion)
+
+    async def aanswer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Returns the applicable deductible categories with the deductible amount based on the input, with the async
+        client.
+
+        Args:
+            question (str): The question with the declared deductions.
+
+        Returns:
+            tuple: The deduction values and the token usage. If the answer is not found, returns a default value.
+        """
+        chat_completion = await self.async_client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile"
+        )
+        return self._parse(chat_completion)
@@ -1,5 +1,6 @@
 from typing import TypedDict
 
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
 from .AgentAccountant import AgentAccountant
@@ -24,6 +25,8 @@ class AgentState(TypedDict):
 class AgentEnvironment:
     """
     This class orchestrates the interaction between different agents to answer user questions about tax calculations.
+    The graph runs with invoke, or on an event loop with ainvoke and astream, in which case the agents call the LLM
+    with the async client, so one loop serves many questions at once.
     """
 
     def __init__(self):
@@ -38,10 +41,11 @@ class AgentEnvironment:
 
         # Initialize the state graph
         graph = StateGraph(AgentState)
-        graph.add_node("accountant", self.process_accountant)
-        graph.add_node("calculator", self.process_calculator)
-        graph.add_node("deductions", self.process_deductions)
-        graph.add_node("percentage", self.process_percentage)
+        # The agents nodes have a sync and an async variant, run by invoke and by ainvoke respectively
+        graph.add_node("accountant", RunnableLambda(self.process_accountant, afunc=self.aprocess_accountant))
+        graph.add_node("calculator", RunnableLambda(self.process_calculator, afunc=self.aprocess_calculator))
+        graph.add_node("deductions", RunnableLambda(self.process_deductions, afunc=self.aprocess_deductions))
+        graph.add_node("percentage", RunnableLambda(self.process_percentage, afunc=self.aprocess_percentage))
         graph.add_node("pricer", self.pricer)
         graph.add_conditional_edges("accountant", self._select_agent)
         graph.add_edge("calculator", "accountant")
@@ -62,10 +66,38 @@ class AgentEnvironment:
         Returns:
             dict: Updated state with the next agent and the agent prompt or the final answer, among other information.
         """
-        if 'reasoning' in state:
-            reasoning = state['reasoning']
-        else:
-            reasoning = []
+        reasoning = state['reasoning'] if 'reasoning' in state else []
+        return self._accountant_step(state, reasoning, *self.accountant.answer(state['question'], reasoning))
+
+    async def aprocess_accountant(self, state: AgentState):
+        """
+        Performs an accountant reasoning step without blocking the event loop, and updates the state with the next
+        agent to be called or the final answer.
+
+        Args:
+            state (AgentState): The current state of the environment.
+
+        Returns:
+            dict: Updated state with the next agent and the agent prompt or the final answer, among other information.
+        """
+        reasoning = state['reasoning'] if 'reasoning' in state else []
+        return self._accountant_step(state, reasoning, *await self.accountant.aanswer(state['question'], reasoning))
+
+    @staticmethod
+    def _accountant_step(state: AgentState, reasoning: list[dict[str, str]], accountant_answer: dict[str, str],
+                         token_usage: tuple[int, int]):
+        """
+        Updates the state with an accountant reasoning step.
+
+        Args:
+            state (AgentState): The current state of the environment.
+            reasoning (list[dict[str, str]]): The reasoning steps already taken.
+            accountant_answer (dict[str, str]): The accountant reasoning step.
+            token_usage (tuple[int, int]): The token usage of the step.
+
+        Returns:
+            dict: Updated state with the next agent and the agent prompt or the final answer, among other information.
+        """
         if 'chat_history' in state:
             chat_history = state['chat_history']
         else:
@@ -74,7 +106,6 @@ class AgentEnvironment:
             token_usage_history = state['token_usage_history']
         else:
             token_usage_history = []
-        accountant_answer, token_usage = self.accountant.answer(state['question'], reasoning)
         token_usage_history.append(token_usage)
         print(accountant_answer)
         reasoning.append({"role": "assistant", "content": str(accountant_answer)})
@@ -118,13 +149,40 @@ class AgentEnvironment:
         Args:
             state (AgentState): The current state of the environment.
 
+        Returns:
+            dict: Updated state with the calculator answer, among other information.
+        """
+        return self._calculator_update(state, *self.calculator.answer(state['agent_prompt']))
+
+    async def aprocess_calculator(self, state: AgentState):
+        """
+        Processes the calculator reasoning without blocking the event loop, and updates the state with the calculation
+        result.
+
+        Args:
+            state (AgentState): The current state of the environment.
+
+        Returns:
+            dict: Updated state with the calculator answer, among other information.
+        """
+        return self._calculator_update(state, *await self.calculator.aanswer(state['agent_prompt']))
+
+    @staticmethod
+    def _calculator_update(state: AgentState, calculator_answer: dict[str, str], token_usage: tuple[int, int]):
+        """
+        Updates the state with the calculator answer.
+
+        Args:
+            state (AgentState): The current state of the environment.
+            calculator_answer (dict[str, str]): The calculator answer.
+            token_usage (tuple[int, int]): The token usage of the answer.
+
         Returns:
             dict: Updated state with the calculator answer, among other information.
         """
         reasoning = state['reasoning']
         chat_history = state['chat_history']
         token_usage_history = state['token_usage_history']
-        calculator_answer, token_usage = self.calculator.answer(state['agent_prompt'])
         token_usage_history.append(token_usage)
         print(calculator_answer)
         reasoning.append({"role": "user", "content": str(calculator_answer['calculator'])})
@@ -138,13 +196,40 @@ class AgentEnvironment:
         Args:
             state (AgentState): The current state of the environment.
 
+        Returns:
+            dict: Updated state with the percentage answer, among other information.
+        """
+        return self._percentage_update(state, *self.percentage.answer(state['agent_prompt']))
+
+    async def aprocess_percentage(self, state: AgentState):
+        """
+        Processes the percentage reasoning without blocking the event loop, and updates the state with the tax values to
+        apply.
+
+        Args:
+            state (AgentState): The current state of the environment.
+
+        Returns:
+            dict: Updated state with the percentage answer, among other information.
+        """
+        return self._percentage_update(state, *await self.percentage.aanswer(state['agent_prompt']))
+
+    @staticmethod
+    def _percentage_update(state: AgentState, percentage_answer: dict[str, str], token_usage: tuple[int, int]):
+        """
+        Updates the state with the percentage answer.
+
+        Args:
+            state (AgentState): The current state of the environment.
+            percentage_answer (dict[str, str]): The percentage answer.
+            token_usage (tuple[int, int]): The token usage of the answer.
+
         Returns:
             dict: Updated state with the percentage answer, among other information.
         """
         reasoning = state['reasoning']
         chat_history = state['chat_history']
         token_usage_history = state['token_usage_history']
-        percentage_answer, token_usage = self.percentage.answer(state['agent_prompt'])
         token_usage_history.append(token_usage)
         print(percentage_answer)
         reasoning.append({"role": "user", "content": str(percentage_answer['percentage'])})
@@ -158,13 +243,40 @@ class AgentEnvironment:
         Args:
             state (AgentState): The current state of the environment.
 
+        Returns:
+            dict: Updated state with the deductions answer, among other information.
+        """
+        return self._deductions_update(state, *self.deductions.answer(state['agent_prompt']))
+
+    async def aprocess_deductions(self, state: AgentState):
+        """
+        Processes the deductions reasoning without blocking the event loop, and updates the state with the deduction
+        amounts.
+
+        Args:
+            state (AgentState): The current state of the environment.
+
+        Returns:
+            dict: Updated state with the deductions answer, among other information.
+        """
+        return self._deductions_update(state, *await self.deductions.aanswer(state['agent_prompt']))
+
+    @staticmethod
+    def _deductions_update(state: AgentState, deductions_answer: dict[str, str], token_usage: tuple[int, int]):
+        """
+        Updates the state with the deductions answer.
+
+        Args:
+            state (AgentState): The current state of the environment.
+            deductions_answer (dict[str, str]): The deductions answer.
+            token_usage (tuple[int, int]): The token usage of the answer.
+
         Returns:
             dict: Updated state with the deductions answer, among other information.
         """
         reasoning = state['reasoning']
         chat_history = state['chat_history']
         token_usage_history = state['token_usage_history']
-        deductions_answer, token_usage = self.deductions.answer(state['agent_prompt'])
         token_usage_history.append(token_usage)
         print(deductions_answer)
         reasoning.append({"role": "user", "content": str(deductions_answer['deductions'])})
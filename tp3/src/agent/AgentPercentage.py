@@ -21,6 +21,7 @@ class AgentPercentage:
         Initialize the class required services.
         """
         self.client = SingletonGroq().groq
+        self.async_client = SingletonGroq().async_groq
         self.tax_data = self.read_csv(file_path)
 
     @staticmethod
@@ -41,27 +42,69 @@ class AgentPercentage:
                 data.append(row)
         return data
 
-    def answer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+    def _messages(self, question: str) -> list[dict[str, str]]:
         """
-        Returns the fixed amount, base surplus and percentage over the surplus for a given taxable income.
+        Builds the chat messages asking the question with the tax data.
 
         Args:
             question (str): The question with the taxable amount.
 
         Returns:
-            tuple: The tax values and the token usage. If the answer is not found, returns a default value.
+            list: The system prompt with the tax data, and the question.
         """
         sys_prompt = f"""{self.AGENT_PERCENTAGE_PROMPT}
 
         Tax data:
         {self.tax_data}"""
-        chat_completion = self.client.chat.completions.create(
-            messages=[{"role": "system", "content": sys_prompt}, {"role": "user", "content": question}],
-            model="llama-3.3-70b-versatile"
-        )
+        return [{"role": "system", "content": sys_prompt}, {"role": "user", "content": question}]
+
+    @staticmethod
+    def _parse(chat_completion) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Parses the answer of the chat completion.
+
+        Args:
+            chat_completion (object): The chat completion.
+
+        Returns:
+            tuple: The tax values and the token usage. If the answer is not found, returns a default value.
+        """
         try:
             usage_tokens = (chat_completion.usage.prompt_tokens, chat_completion.usage.completion_tokens)
             answer = ast.literal_eval(chat_completion.choices[0].message.content)
             return answer, usage_tokens
         except (Exception,):
             return {'percentage': 'I don\'t know'}, (0, 0)
+
+    def answer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Returns the fixed amount, base surplus and percentage over the surplus for a given taxable income.
+
+        Args:
+            question (str): The question with the taxable amount.
+
+        Returns:
+            tuple: The tax values and the token usage. If the answer is not found, returns a default value.
+        """
+        chat_completion = self.client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile"
+        )
+        return self._parse(chat_completion)
+
+    async def aanswer(self, question: str) -> tuple[dict[str, str], tuple[int, int]]:
+        """
+        Returns the fixed amount, base surplus and percentage over the surplus for a given taxable income, with the
+        async client.
+
+        Args:
+            question (str): The question with the taxable amount.
+
+        Returns:
+            tuple: The tax values and the token usage. If the answer is not found, returns a default value.
+        """
+        chat_completion = await self.async_client.chat.completions.create(
+            messages=self._messages(question),
+            model="llama-3.3-70b-versatile"
+        )
+        return self._parse(chat_completion)
@@ -7,6 +7,7 @@ reasoning to provide an accurate response.
 import streamlit as st
 
 from agent.AgentEnvironment import AgentEnvironment
+from agent.client.SingletonEventLoop import SingletonEventLoop
 
 # Start the Streamlit app
 st.title("Tax Calculator Bot")
@@ -32,7 +33,8 @@ else:
         with st.chat_message("user"):
             st.markdown(question)
         tax_bot = st.session_state["tax_bot"]
-        agent_state = tax_bot.graph.invoke({"question": question})
+        # Answer on the event loop shared by the sessions, with the async agents
+        agent_state = SingletonEventLoop().run(tax_bot.graph.ainvoke({"question": question}))
         for message in agent_state['chat_history']:
             st.session_state['messages'].append(message)
             with st.chat_message(message['role']):
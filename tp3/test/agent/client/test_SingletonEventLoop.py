@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from src.agent.client.SingletonEventLoop import SingletonEventLoop
+
+
+def test_get_instance_return_same_instance():
+    # Given
+    # When
+    instance1 = SingletonEventLoop()
+    instance2 = SingletonEventLoop()
+
+    # Then
+    assert instance2 is instance1
+    assert instance2.loop is instance1.loop
+
+
+def test_run_returns_coroutine_result_from_loop_thread():
+    # Given
+    async def coroutine():
+        await asyncio.sleep(0)
+        return threading.current_thread().name
+
+    # When
+    result = SingletonEventLoop().run(coroutine())
+
+    # Then
+    assert result == "event-loop"
+
+
+def test_iterate_yields_async_items_in_order():
+    # Given
+    async def items():
+        for item in range(3):
+            await asyncio.sleep(0)
+            yield item
+
+    # When
+    result = list(SingletonEventLoop().iterate(items()))
+
+    # Then
+    assert result == [0, 1, 2]
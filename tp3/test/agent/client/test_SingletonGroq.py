@@ -10,4 +10,20 @@ def test_get_instance_return_same_instance():
         instance2 = SingletonGroq()
 
         # Then
-        assert instance2 is instance1
\ No newline at end of file
+        assert instance2 is instance1
+
+
+def test_get_async_groq_return_same_client():
+    # Given
+    with patch("src.agent.client.SingletonGroq.Groq", MagicMock()), \
+            patch("src.agent.client.SingletonGroq.AsyncGroq", MagicMock()) as asyncGroqMock:
+        SingletonGroq._async_groq = None
+
+        # When
+        client1 = SingletonGroq().async_groq
+        client2 = SingletonGroq().async_groq
+
+        # Then
+        assert client2 is client1
+        asyncGroqMock.assert_called_once()
+        SingletonGroq._async_groq = None
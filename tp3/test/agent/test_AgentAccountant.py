@@ -1,4 +1,5 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from src.agent.AgentAccountant import AgentAccountant
 
@@ -97,3 +98,30 @@ def test_answer_completion_with_incorrect_format_returns_default_answer():
         # Then
         assert "don't know" in str(answer)
         assert tokens == (0, 0)
+
+
+def test_aanswer_calls_async_chat_completion_with_reasoning():
+    # Given
+    with patch("src.agent.AgentAccountant.SingletonGroq") as singletonGroqMock:
+        async_groq_mock = MagicMock()
+        chat_completion = MagicMock()
+        singletonGroqMock.return_value = singletonGroqMock
+        singletonGroqMock.async_groq = async_groq_mock
+        expected_answer = {"thought": "some thought", "answer": "some answer"}
+        async_groq_mock.chat.completions.create = AsyncMock(return_value=chat_completion)
+        chat_completion.usage.prompt_tokens = 10
+        chat_completion.usage.completion_tokens = 50
+        chat_completion.choices = [MagicMock()]
+        chat_completion.choices[0].message.content = str(expected_answer)
+        reasoning = [{"role": "assistant", "content": "step 1"}]
+        accountant = AgentAccountant()
+
+        # When
+        answer, tokens = asyncio.run(accountant.aanswer("test question", reasoning))
+
+        # Then
+        messages = async_groq_mock.chat.completions.create.call_args.kwargs["messages"]
+        assert messages[1] == {"role": "user", "content": "test question"}
+        assert messages[2:] == reasoning
+        assert answer == expected_answer
+        assert tokens == (10, 50)
@@ -1,4 +1,5 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.agent.AgentCalculator import AgentCalculator
 
 
@@ -78,4 +79,47 @@ def test_answer_evaluates_calculation_correctly():
         answer, _ = calculator.answer("2 * 3")
 
         # Then
-        assert answer["calculator"] == 6
\ No newline at end of file
+        assert answer["calculator"] == 6
+
+
+def test_aanswer_calls_async_chat_completion():
+    # Given
+    with patch("src.agent.AgentCalculator.SingletonGroq") as singletonGroqMock:
+        async_groq_mock = MagicMock()
+        chat_completion = MagicMock()
+        singletonGroqMock.return_value = singletonGroqMock
+        singletonGroqMock.async_groq = async_groq_mock
+        async_groq_mock.chat.completions.create = AsyncMock(return_value=chat_completion)
+        chat_completion.usage.prompt_tokens = 5
+        chat_completion.usage.completion_tokens = 10
+        chat_completion.choices = [MagicMock()]
+        chat_completion.choices[0].message.content = "{'thought': 'simple addition', 'calculator': '2 + 2'}"
+        calculator = AgentCalculator()
+
+        # When
+        answer, tokens = asyncio.run(calculator.aanswer("2 + 2"))
+
+        # Then
+        async_groq_mock.chat.completions.create.assert_awaited_once()
+        assert answer == {"thought": "simple addition", "calculator": 4}
+        assert tokens == (5, 10)
+
+
+def test_aanswer_with_invalid_format_returns_default_answer():
+    # Given
+    with patch("src.agent.AgentCalculator.SingletonGroq") as singletonGroqMock:
+        async_groq_mock = MagicMock()
+        chat_completion = MagicMock()
+        singletonGroqMock.return_value = singletonGroqMock
+        singletonGroqMock.async_groq = async_groq_mock
+        async_groq_mock.chat.completions.create = AsyncMock(return_value=chat_completion)
+        chat_completion.choices = [MagicMock()]
+        chat_completion.choices[0].message.content = "invalid format"
+        calculator = AgentCalculator()
+
+        # When
+        answer, tokens = asyncio.run(calculator.aanswer("invalid input"))
+
+        # Then
+        assert "I don't know" in answer["calculator"]
+        assert tokens == (0, 0)
@@ -1,4 +1,5 @@
-from unittest.mock import patch, MagicMock, mock_open
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock, mock_open
 
 from src.agent.AgentDeductions import AgentDeductions
 
@@ -103,3 +104,29 @@ def test_answer_uses_deductions_data_in_prompt():
         _, kwargs = groq_mock.chat.completions.create.call_args
         assert "General" in str(kwargs["messages"][0]["content"])
         assert "1000" in str(kwargs["messages"][0]["content"])
+
+
+def test_aanswer_returns_async_chat_completion_content_and_tokens():
+    # Given
+    with patch("src.agent.AgentDeductions.SingletonGroq") as singletonGroqMock, \
+            patch("src.agent.AgentDeductions.AgentDeductions.read_csv",
+                  return_value=[["Category", "Max Amount"], ["General", "1000"]]):
+        async_groq_mock = MagicMock()
+        chat_completion = MagicMock()
+        singletonGroqMock.return_value = singletonGroqMock
+        singletonGroqMock.async_groq = async_groq_mock
+        expected_answer = {"thought": "some thought", "deductions": "Applicable deductions: General: 1000"}
+        async_groq_mock.chat.completions.create = AsyncMock(return_value=chat_completion)
+        chat_completion.usage.prompt_tokens = 10
+        chat_completion.usage.completion_tokens = 50
+        chat_completion.choices = [MagicMock()]
+        chat_completion.choices[0].message.content = str(expected_answer)
+        deductions = AgentDeductions("deductions.csv")
+
+        # When
+        answer, tokens = asyncio.run(deductions.aanswer("test question"))
+
+        # Then
+        async_groq_mock.chat.completions.create.assert_awaited_once()
+        assert answer == expected_answer
+        assert tokens == (10, 50)
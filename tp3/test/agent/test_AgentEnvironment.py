@@ -1,4 +1,6 @@
-from unittest.mock import patch
+import asyncio
+import time
+from unittest.mock import patch, AsyncMock
 
 from src.agent.AgentEnvironment import AgentEnvironment, AgentState
 
@@ -210,3 +212,107 @@ def test_pricer_calculates_token_usage():
     assert result["input_tokens"] == 10
     assert result["reasoning_tokens"] == 50
     assert result["output_tokens"] == 30
+
+
+def test_aprocess_accountant_awaits_accountant_aanswer():
+    # Given
+    accountant_mock, _, _, _, env = set_up()
+    accountant_mock.aanswer = AsyncMock(return_value=({"calculator": "test calculator"}, (10, 20)))
+    state = get_agent_state(question="test")
+    env = AgentEnvironment()
+
+    # When
+    result = asyncio.run(env.aprocess_accountant(state))
+
+    # Then
+    accountant_mock.aanswer.assert_awaited_once()
+    assert result["next_agent"] == "calculator"
+    assert result["agent_prompt"] == "test calculator"
+
+
+def test_aprocess_calculator_awaits_calculator_aanswer():
+    # Given
+    _, calculator_mock, _, _, env = set_up()
+    calculator_mock.aanswer = AsyncMock(return_value=({"calculator": "4"}, (5, 10)))
+    state = get_agent_state(agent_prompt="calculator:2 + 2")
+    env = AgentEnvironment()
+
+    # When
+    result = asyncio.run(env.aprocess_calculator(state))
+
+    # Then
+    calculator_mock.aanswer.assert_awaited_once()
+    assert "4" in result["reasoning"][-1]["content"]
+
+
+def test_aprocess_deductions_awaits_deductions_aanswer():
+    # Given
+    _, _, deductions_mock, _, env = set_up()
+    deductions_mock.aanswer = AsyncMock(return_value=({"deductions": "test deductions"}, (10, 20)))
+    state = get_agent_state(agent_prompt="test deductions")
+    env = AgentEnvironment()
+
+    # When
+    result = asyncio.run(env.aprocess_deductions(state))
+
+    # Then
+    deductions_mock.aanswer.assert_awaited_once()
+    assert "test deductions" in result["reasoning"][-1]["content"]
+
+
+def test_aprocess_percentage_awaits_percentage_aanswer():
+    # Given
+    _, _, _, percentage_mock, env = set_up()
+    percentage_mock.aanswer = AsyncMock(return_value=({"percentage": "10%"}, (15, 30)))
+    state = get_agent_state(agent_prompt="10%")
+    env = AgentEnvironment()
+
+    # When
+    result = asyncio.run(env.aprocess_percentage(state))
+
+    # Then
+    percentage_mock.aanswer.assert_awaited_once()
+    assert "10%" in result["reasoning"][-1]["content"]
+
+
+def test_graph_ainvoke_uses_async_agents():
+    # Given
+    accountant_mock, calculator_mock, _, _, env = set_up()
+    accountant_mock.aanswer = AsyncMock(side_effect=[({"calculator": "2 + 2"}, (10, 20)),
+                                                     ({"answer": "4"}, (5, 10))])
+    calculator_mock.aanswer = AsyncMock(return_value=({"calculator": 4}, (1, 2)))
+    env = AgentEnvironment()
+
+    # When
+    result = asyncio.run(env.graph.ainvoke({"question": "test"}))
+
+    # Then
+    assert result["answer"] == "4"
+    assert calculator_mock.aanswer.await_count == 1
+    assert not accountant_mock.answer.called
+    assert result["input_tokens"] == 10
+    assert result["output_tokens"] == 10
+
+
+def test_graph_ainvoke_answers_concurrent_questions_on_one_loop():
+    # Given
+    accountant_mock, _, _, _, env = set_up()
+
+    async def answer(question, reasoning):
+        await asyncio.sleep(0.2)
+        return {"answer": question}, (1, 1)
+
+    accountant_mock.aanswer = answer
+    env = AgentEnvironment()
+
+    async def answer_all():
+        return await asyncio.gather(*(env.graph.ainvoke({"question": f"question {index}"}) for index in range(10)))
+
+    # When
+    begin = time.perf_counter()
+    results = asyncio.run(answer_all())
+    elapsed = time.perf_counter() - begin
+
+    # Then
+    assert [result["answer"] for result in results] == [f"question {index}" for index in range(10)]
+    assert elapsed < 1.0
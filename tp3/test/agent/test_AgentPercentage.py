@@ -1,4 +1,5 @@
-from unittest.mock import patch, MagicMock, mock_open
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock, mock_open
 
 from src.agent.AgentPercentage import AgentPercentage
 
@@ -105,3 +106,29 @@ def test_answer_uses_tax_data_in_prompt():
         assert "0-1000" in str(kwargs["messages"][0]["content"])
         assert "100" in str(kwargs["messages"][0]["content"])
         assert "10%" in str(kwargs["messages"][0]["content"])
+
+
+def test_aanswer_returns_async_chat_completion_content_and_tokens():
+    # Given
+    with patch("src.agent.AgentPercentage.SingletonGroq") as singletonGroqMock, \
+            patch("src.agent.AgentPercentage.AgentPercentage.read_csv",
+                  return_value=[["Range", "Fixed Amount", "Base Surplus", "Percentage"]]):
+        async_groq_mock = MagicMock()
+        chat_completion = MagicMock()
+        singletonGroqMock.return_value = singletonGroqMock
+        singletonGroqMock.async_groq = async_groq_mock
+        expected_answer = {"thought": "some thought", "percentage": "Fixed: 100, Base: 500, Percent: 10%"}
+        async_groq_mock.chat.completions.create = AsyncMock(return_value=chat_completion)
+        chat_completion.usage.prompt_tokens = 15
+        chat_completion.usage.completion_tokens = 30
+        chat_completion.choices = [MagicMock()]
+        chat_completion.choices[0].message.content = str(expected_answer)
+        percentage = AgentPercentage("percentage.csv")
+
+        # When
+        answer, tokens = asyncio.run(percentage.aanswer("test question"))
+
+        # Then
+        async_groq_mock.chat.completions.create.assert_awaited_once()
+        assert answer == expected_answer
+        assert tokens == (15, 30)
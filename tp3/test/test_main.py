@@ -1,6 +1,6 @@
 import os
 import sys
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from streamlit.testing.v1 import AppTest
 
@@ -24,6 +24,7 @@ def test_main_user_input_calls_agent():
     # Given
     with patch("agent.AgentEnvironment.AgentEnvironment", autospec=True) as agent_env_mock:
         env_mock = MagicMock()
+        env_mock.graph.ainvoke = AsyncMock(return_value=MagicMock())
         agent_env_mock.return_value = env_mock
         app = AppTest.from_file("../src/main.py")
 
@@ -33,4 +34,4 @@ def test_main_user_input_calls_agent():
 
         # Then
         assert not app.exception
-        env_mock.graph.invoke.assert_called_once()
+        env_mock.graph.ainvoke.assert_awaited_once()